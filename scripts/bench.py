@@ -0,0 +1,54 @@
+"""
+Shared helpers for the opt-in benchmarks in scripts/. Each benchmark runs as
+'python -m scripts.bench_<name>' and prints one JSON object per measurement.
+Benchmarks that need Neo4j, Qdrant or an LLM read the usual settings from the
+environment; none of them run as part of the test suite.
+"""
+import json
+import time
+from typing import Any, Dict, List
+
+
+def percentiles(seconds: List[float]) -> Dict[str, float]:
+    """p50/p90/p99/max and mean of samples, in milliseconds"""
+    ordered = sorted(seconds)
+    if not ordered:
+        return {}
+
+    def at(quantile: float) -> float:
+        return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))] * 1e3
+
+    return {
+        "p50_ms": round(at(0.50), 3),
+        "p90_ms": round(at(0.90), 3),
+        "p99_ms": round(at(0.99), 3),
+        "max_ms": round(ordered[-1] * 1e3, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1e3, 3),
+    }
+
+
+def report(benchmark: str, **fields: Any):
+    print(json.dumps({"benchmark": benchmark, **fields}))
+
+
+def neo4j_driver():
+    """Async driver for the NEO4J_* settings"""
+    from neo4j import AsyncGraphDatabase
+    from src.config import settings
+
+    return AsyncGraphDatabase.driver(settings.NEO4J_URI, auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD))
+
+
+class Timer:
+    """Context manager collecting the wall time of each block into samples"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.started)
+        return False
@@ -0,0 +1,82 @@
+"""
+Neo4j planning time of generated queries: parameterized templates, as
+CypherQueryGenerator builds them now, against the same queries with the
+values pasted in as literals, as the old f-string generator did. Literal
+queries are textually unique, so Neo4j plans every one of them.
+
+    python -m scripts.bench_cypher_planning [--queries 200]
+
+Planning is timed with EXPLAIN, which plans without executing. The full
+run's time to first result (summary.result_available_after) is reported
+as well.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+from src.entity import GENRES, MovieEntities
+from src.query import CypherQueryGenerator
+from .bench import neo4j_driver, percentiles, report
+
+_parameter = re.compile(r"\$(\w+)")
+
+
+def with_literals(query: str, params: dict) -> str:
+    """The query as the old generator built it, every value inline"""
+    return _parameter.sub(lambda match: json.dumps(params[match.group(1)]), query)
+
+
+def random_entities(rng: random.Random, titles, people) -> MovieEntities:
+    shape = rng.choice(["similarity", "combined", "standard", "people"])
+    year_start = rng.choice([None, rng.randrange(1950, 2020)])
+    entities = MovieEntities(year_start=year_start)
+    if shape in ("similarity", "combined"):
+        entities.movie = rng.sample(titles, rng.randint(1, 3))
+    if shape in ("combined", "standard"):
+        entities.genre = rng.sample(GENRES, rng.randint(1, 2))
+        entities.genres_union = rng.random() < 0.5
+    if shape == "people":
+        entities.actor = rng.sample(people, rng.randint(1, 2))
+        entities.actors_union = True
+    return entities
+
+
+async def main(args):
+    generator = CypherQueryGenerator()
+    driver = neo4j_driver()
+    try:
+        async with driver.session() as session:
+            result = await session.run("MATCH (m:Movie) RETURN m.title AS title ORDER BY m.popularity DESC LIMIT 500")
+            titles = [record["title"] async for record in result]
+            result = await session.run("MATCH (a:Actor) RETURN a.name AS name LIMIT 500")
+            people = [record["name"] async for record in result]
+
+            rng = random.Random(0)
+            queries = [generator.generate_query_manually(random_entities(rng, titles, people)) for _ in range(args.queries)]
+            await generator.warm_plan_cache(driver)
+
+            variants = {
+                "parameterized": [(query, params) for query, params in queries],
+                "literal": [(with_literals(query, params), {}) for query, params in queries],
+            }
+            for name, runs in variants.items():
+                planning, first_result = [], []
+                for query, params in runs:
+                    started = time.perf_counter()
+                    await (await session.run("EXPLAIN " + query, params)).consume()
+                    planning.append(time.perf_counter() - started)
+                    summary = await (await session.run(query, params)).consume()
+                    first_result.append(summary.result_available_after / 1e3)
+                report("cypher_planning", variant=name, measure="explain", queries=len(runs), **percentiles(planning))
+                report("cypher_planning", variant=name, measure="result_available_after", queries=len(runs),
+                       **percentiles(first_result))
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
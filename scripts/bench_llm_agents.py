@@ -0,0 +1,100 @@
+"""
+Per-request overhead of the LLM agents at a steady request rate: building
+EntityExtractorAgent and MovieExtractor for every request, each with its own
+HTTP pool, as the stream endpoint used to, against the process-wide agents
+from LLMClientSingleton.
+
+    python -m scripts.bench_llm_agents [--rps 50] [--seconds 10]
+    python -m scripts.bench_llm_agents --live --seconds 5   # also call the LLM, needs real API keys
+
+Without --live each request only gets its agents and renders the entity
+prompt, so the numbers are the client-side overhead alone. Memory churn is
+measured in a second pass under tracemalloc, so tracing doesn't skew the
+timings. --live adds the network side: a fresh pool per request pays its own
+TLS handshake.
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from src.entity import EntityExtractorAgent
+from src.extractor import MovieExtractor
+from src.llm_client_singleton import LLMClientSingleton
+from .bench import percentiles, report
+
+QUERY = "movies like heat but set in space"
+
+
+async def per_request_agents():
+    return EntityExtractorAgent(), MovieExtractor()
+
+
+async def shared_agents():
+    return await LLMClientSingleton.get_entity_extractor(), await LLMClientSingleton.get_movie_extractor()
+
+
+async def handle(get_agents, live: bool):
+    entity_extractor, _ = await get_agents()
+    if live:
+        return await entity_extractor.extract_entities(QUERY)
+    return entity_extractor.format_prompt(QUERY)
+
+
+async def paced(get_agents, args, trace: bool = False):
+    """
+    Starts one request every 1/rps seconds; returns each request's time and
+    stats. Agent construction runs on the event loop, so if it can't keep up
+    achieved_rps falls below rps.
+    """
+    samples = []
+
+    async def one():
+        started = time.perf_counter()
+        try:
+            await handle(get_agents, args.live)
+        except Exception as e:
+            report("llm_agents", error=str(e))
+        samples.append(time.perf_counter() - started)
+
+    gc.collect()
+    collections = sum(stats["collections"] for stats in gc.get_stats())
+    if trace:
+        tracemalloc.start()
+    tasks = []
+    interval = 1.0 / args.rps
+    started = time.perf_counter()
+    for i in range(int(args.rps * args.seconds)):
+        await asyncio.sleep(max(0.0, started + i * interval - time.perf_counter()))
+        tasks.append(asyncio.create_task(one()))
+    await asyncio.gather(*tasks)
+    stats = {"achieved_rps": round(len(samples) / (time.perf_counter() - started), 1)}
+    if trace:
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["retained_kib_per_request"] = round(current / 1024 / len(samples), 1)
+        stats["peak_traced_mib"] = round(peak / 2**20, 1)
+    stats["gc_collections"] = sum(stats["collections"] for stats in gc.get_stats()) - collections
+    return samples, stats
+
+
+async def main(args):
+    variants = {"per_request": per_request_agents, "shared": shared_agents}
+    try:
+        for name, get_agents in variants.items():
+            await handle(get_agents, live=False)  # warm-up, imports and singletons
+            samples, stats = await paced(get_agents, args)
+            _, traced = await paced(get_agents, args, trace=True)
+            stats.update({key: value for key, value in traced.items() if key != "achieved_rps"})
+            report("llm_agents", agents=name, rps=args.rps, requests=len(samples), live=args.live,
+                   **percentiles(samples), **stats)
+    finally:
+        await LLMClientSingleton.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", type=float, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--live", action="store_true", help="Call the LLM in each request")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,91 @@
+"""
+Cost of fetching one batch of movie documents: the old detail query, which
+collected every relationship with all properties of each connected node and
+shaped it client-side through one asyncio.to_thread per record, against
+MOVIES_BY_IDS_QUERY, which projects the final document server-side.
+
+    python -m scripts.bench_movie_projection [--ids 500] [--rounds 20]
+
+The driver does not expose bytes on the wire, so the size of the records
+serialized as JSON is reported as a proxy for it.
+"""
+import argparse
+import asyncio
+import json
+import time
+from src.neo4j import HIDDEN_PROPERTIES, MOVIES_BY_IDS_QUERY, process_result
+from .bench import neo4j_driver, percentiles, report
+
+COLLECTED_QUERY = """
+    UNWIND $ids as id
+    MATCH (target {id: id})
+    OPTIONAL MATCH (target)-[r]-(connected)
+    RETURN
+        target { .* } AS target,
+        COLLECT({
+            relationship: TYPE(r),
+            direction: CASE WHEN startNode(r) = target THEN 'OUTGOING' ELSE 'INCOMING' END,
+            connected: connected { .* }
+        }) AS connections
+"""
+
+
+def process_collected(result):
+    """The client-side shaping the old query needed"""
+    target = {key: value for key, value in result.get("target", {}).items() if key not in HIDDEN_PROPERTIES}
+    outgoing = [conn for conn in result.get("connections", []) if conn.get("direction") == "OUTGOING"]
+
+    def names(relationship):
+        return [conn["connected"]["name"] for conn in outgoing if conn.get("relationship") == relationship]
+
+    year = next((conn["connected"]["year"] for conn in outgoing if conn.get("relationship") == "RELEASED_IN"), None)
+    return {**target, "actors": names("ACTED_IN"), "directors": names("DIRECTED_BY"),
+            "genres": names("HAS_GENRE"), "year": year}
+
+
+async def collected(session, ids):
+    records = await (await session.run(COLLECTED_QUERY, {"ids": ids})).data()
+    movies = await asyncio.gather(*[asyncio.to_thread(process_collected, record) for record in records])
+    return records, movies
+
+
+async def projected(session, ids):
+    records = await (await session.run(MOVIES_BY_IDS_QUERY, {"ids": ids})).data()
+    return records, [process_result(record) for record in records]
+
+
+async def main(args):
+    driver = neo4j_driver()
+    try:
+        async with driver.session() as session:
+            result = await session.run("MATCH (m:Movie) RETURN m.id AS id ORDER BY m.popularity DESC LIMIT $n",
+                                       {"n": args.ids})
+            ids = [record["id"] async for record in result]
+
+            documents = {}
+            for name, fetch in {"collected": collected, "projected": projected}.items():
+                await fetch(session, ids)  # warm-up, plans and page cache
+                samples = []
+                for _ in range(args.rounds):
+                    started = time.perf_counter()
+                    records, movies = await fetch(session, ids)
+                    samples.append(time.perf_counter() - started)
+                documents[name] = sorted(movies, key=lambda movie: movie["id"])
+                report("movie_projection", query=name, ids=len(ids), rounds=args.rounds, records=len(records),
+                       record_bytes=len(json.dumps(records, default=str)), **percentiles(samples))
+
+            # Same documents either way, up to list order
+            def normalized(movies):
+                return [{key: sorted(value) if isinstance(value, list) else value for key, value in movie.items()}
+                        for movie in movies]
+            same = normalized(documents["collected"]) == normalized(documents["projected"])
+            report("movie_projection", same_documents=same)
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ids", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(main(parser.parse_args()))
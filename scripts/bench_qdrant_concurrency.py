@@ -0,0 +1,99 @@
+"""
+Throughput of concurrent movies_plot similarity searches: the old sync
+QdrantClient behind asyncio.to_thread against the AsyncQdrantClient the
+service now uses.
+
+    python -m scripts.bench_qdrant_concurrency [--concurrency 100] [--rounds 5]
+    python -m scripts.bench_qdrant_concurrency --memory   # no server, synthetic collection
+
+--memory runs both clients in-process, so it only shows the thread-pool and
+hop overhead; run against the real QDRANT_URI for network numbers.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from qdrant_client import AsyncQdrantClient, QdrantClient, models
+from src.config import settings
+from src.qdrant_client_singleton import QdrantClientSingleton
+from .bench import Timer, percentiles, report
+
+COLLECTION_NAME = "movies_plot"
+
+
+def synthetic_points(count: int, dim: int):
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    return [
+        models.PointStruct(id=i, vector=vector.tolist(), payload={"title": f"movie {i}"})
+        for i, vector in enumerate(vectors)
+    ]
+
+
+async def clients(args):
+    if not args.memory:
+        sync_client = QdrantClient(url=settings.QDRANT_URI, api_key=settings.QDRANT_API_KEY)
+        async_client = await QdrantClientSingleton.get_instance()
+        collection = await async_client.get_collection(COLLECTION_NAME)
+        return sync_client, async_client, collection.config.params.vectors.size
+
+    points = synthetic_points(args.points, args.dim)
+    config = models.VectorParams(size=args.dim, distance=models.Distance.COSINE)
+    sync_client = QdrantClient(location=":memory:")
+    sync_client.create_collection(COLLECTION_NAME, vectors_config=config)
+    sync_client.upsert(COLLECTION_NAME, points=points)
+    async_client = AsyncQdrantClient(location=":memory:")
+    await async_client.create_collection(COLLECTION_NAME, vectors_config=config)
+    await async_client.upsert(COLLECTION_NAME, points=points)
+    return sync_client, async_client, args.dim
+
+
+async def run_round(search, queries):
+    timer = Timer()
+
+    async def one(query):
+        with timer:
+            await search(query)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[one(query) for query in queries])
+    return time.perf_counter() - started, timer.samples
+
+
+async def main(args):
+    sync_client, async_client, dim = await clients(args)
+    rng = np.random.default_rng(1)
+
+    def search_kwargs(query):
+        return {"collection_name": COLLECTION_NAME, "query_vector": query, "limit": 10, "with_payload": ["title"]}
+
+    variants = {
+        "sync_to_thread": lambda query: asyncio.to_thread(sync_client.search, **search_kwargs(query)),
+        "async_client": lambda query: async_client.search(**search_kwargs(query)),
+    }
+    try:
+        for name, search in variants.items():
+            await run_round(search, [rng.normal(size=dim).tolist() for _ in range(args.concurrency)])  # warm-up
+            elapsed, samples = 0.0, []
+            for _ in range(args.rounds):
+                queries = [rng.normal(size=dim).tolist() for _ in range(args.concurrency)]
+                round_elapsed, round_samples = await run_round(search, queries)
+                elapsed += round_elapsed
+                samples += round_samples
+            report(
+                "qdrant_concurrency", client=name, concurrency=args.concurrency, rounds=args.rounds,
+                memory=args.memory, searches_per_s=round(len(samples) / elapsed, 1), **percentiles(samples),
+            )
+    finally:
+        sync_client.close()
+        await async_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--memory", action="store_true", help="In-process clients over a synthetic collection")
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1024)
+    asyncio.run(main(parser.parse_args()))
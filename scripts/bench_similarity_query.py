@@ -0,0 +1,83 @@
+"""
+Latency of 'movies like X' queries: live similarity scoring over every Movie
+against the precomputed template that reads the reference movies' SIMILAR_TO
+neighbours (SIMILARITY_MODE="precomputed").
+
+    python -m scripts.bench_similarity_query [--queries 200]
+
+Reference movies are drawn from those that already have SIMILAR_TO edges, so
+run 'python -m src.similarity_job' first. The precomputed timings include the
+neighbours probe and live fallback that process_cypher_query runs when the
+template comes back empty.
+"""
+import argparse
+import asyncio
+import random
+import time
+from src.entity import GENRES, MovieEntities
+from src.query import CypherQueryGenerator
+from .bench import neo4j_driver, percentiles, report
+
+
+def random_entities(rng: random.Random, titles) -> MovieEntities:
+    entities = MovieEntities(movie=rng.sample(titles, rng.randint(1, 3)))
+    if rng.random() < 0.5:
+        entities.genre = rng.sample(GENRES, 1)
+        entities.year_start = rng.choice([None, rng.randrange(1970, 2015)])
+    return entities
+
+
+async def run(session, query, params):
+    result = await session.run(query, params)
+    return await result.data()
+
+
+async def precomputed(session, generator, entities):
+    records = await run(session, *generator.generate_query_manually(entities, precomputed=True))
+    if records:
+        return records
+    probe = await run(session, *generator.neighbours_probe(entities))
+    if probe and probe[0]["has_neighbours"]:
+        return records
+    return await run(session, *generator.generate_query_manually(entities))
+
+
+async def main(args):
+    generator = CypherQueryGenerator()
+    driver = neo4j_driver()
+    try:
+        async with driver.session() as session:
+            result = await session.run(
+                "MATCH (m:Movie) WHERE EXISTS { (m)-[:SIMILAR_TO]->() } "
+                "RETURN m.title AS title ORDER BY m.popularity DESC LIMIT 500"
+            )
+            titles = [record["title"] async for record in result]
+            if not titles:
+                raise SystemExit("No SIMILAR_TO edges; run 'python -m src.similarity_job' first")
+
+            rng = random.Random(0)
+            workload = [random_entities(rng, titles) for _ in range(args.queries)]
+            await generator.warm_plan_cache(driver)
+
+            variants = {
+                "live": lambda entities: run(session, *generator.generate_query_manually(entities)),
+                "precomputed": lambda entities: precomputed(session, generator, entities),
+            }
+            for name, query in variants.items():
+                for entities in workload[:10]:  # warm-up, page cache
+                    await query(entities)
+                samples, rows = [], 0
+                for entities in workload:
+                    started = time.perf_counter()
+                    rows += len(await query(entities))
+                    samples.append(time.perf_counter() - started)
+                report("similarity_query", mode=name, queries=len(workload), mean_rows=round(rows / len(workload), 1),
+                       **percentiles(samples))
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,113 @@
+"""
+Throughput of the local TitleExtractor on Reddit comments, and how its
+matches compare with the hand labels in tests/fixtures/reddit_comments.json
+and, optionally, with what the LLM extracts from the same comments.
+
+    python -m scripts.bench_title_extraction [--filler 50000]
+    python -m scripts.bench_title_extraction --neo4j          # real catalog
+    python -m scripts.bench_title_extraction --neo4j --llm    # also ask the MovieExtractor LLM
+
+Without --neo4j the catalog is the labelled titles plus --filler synthetic
+ones, which sizes the automaton but can't show false positives from real
+titles that double as ordinary words; use --neo4j for precision. --llm sends
+every fixture comment to the LLM in one batch with local extraction off and
+reports the local matches' recall against the LLM's answers, both overall
+and for the LLM titles that are in the catalog.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List, Set
+from src.config import settings
+from src.text import normalize_text
+from src.title_extractor import TitleExtractor
+from .bench import neo4j_driver, percentiles, report
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "tests", "fixtures", "reddit_comments.json")
+
+
+def titles(movies: List[str]) -> Set[str]:
+    return {normalize_text(movie) for movie in movies}
+
+
+def scores(predicted: List[Set[str]], expected: List[Set[str]]):
+    hits = sum(len(p & e) for p, e in zip(predicted, expected))
+    found, wanted = sum(map(len, predicted)), sum(map(len, expected))
+    return {
+        "precision": round(hits / found, 3) if found else None,
+        "recall": round(hits / wanted, 3) if wanted else None,
+        "comments": len(expected),
+    }
+
+
+async def catalog_titles(args, labelled: List[str]):
+    if not args.neo4j:
+        return labelled + [f"Filler Picture {i}" for i in range(args.filler)], None
+    from src.catalog import load_catalog
+
+    driver = neo4j_driver()
+    try:
+        catalog = await load_catalog(driver, genres=False, people=False)
+    finally:
+        await driver.close()
+    return catalog.titles, catalog.popularity
+
+
+async def llm_titles(comments: List[str]) -> List[Set[str]]:
+    from src.llm_client_singleton import LLMClientSingleton
+
+    settings.LOCAL_TITLE_EXTRACTION = False
+    try:
+        extractor = await LLMClientSingleton.get_movie_extractor()
+        # One thread per comment, so answers stay per comment
+        results = await extractor.aextract_movies_batch({str(i): [comment] for i, comment in enumerate(comments)})
+    finally:
+        await LLMClientSingleton.close()
+    return [titles(results[str(i)]) for i in range(len(comments))]
+
+
+async def main(args):
+    with open(FIXTURE) as f:
+        fixture = json.load(f)
+    comments = [entry["comment"] for entry in fixture]
+    labels = [titles(entry["movies"]) for entry in fixture]
+
+    catalog, popularity = await catalog_titles(args, sorted({movie for entry in fixture for movie in entry["movies"]}))
+    started = time.perf_counter()
+    extractor = TitleExtractor(catalog, popularity)
+    report("title_extraction", measure="build", titles=len(catalog), patterns=extractor.patterns,
+           build_s=round(time.perf_counter() - started, 3))
+
+    workload = (comments * (args.comments // len(comments) + 1))[:args.comments]
+    samples = []
+    started = time.perf_counter()
+    for comment in workload:
+        comment_started = time.perf_counter()
+        extractor.extract(comment)
+        samples.append(time.perf_counter() - comment_started)
+    elapsed = time.perf_counter() - started
+    report("title_extraction", measure="throughput", comments=len(workload),
+           comments_per_s=round(len(workload) / elapsed), **percentiles(samples))
+
+    local = [titles(extractor.extract(comment)) for comment in comments]
+    report("title_extraction", measure="local_vs_labels", **scores(local, labels))
+    if args.llm:
+        llm = await llm_titles(comments)
+        if not any(llm):
+            raise SystemExit("The LLM returned no movies at all, see the log for the error")
+        in_catalog = titles(catalog)
+        report("title_extraction", measure="llm_vs_labels", **scores(llm, labels))
+        report("title_extraction", measure="local_vs_llm", **scores(local, llm))
+        report("title_extraction", measure="local_vs_llm_in_catalog",
+               **scores(local, [movies & in_catalog for movies in llm]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--filler", type=int, default=50000, help="Synthetic catalog titles without --neo4j")
+    parser.add_argument("--neo4j", action="store_true", help="Build the extractor from the Neo4j catalog")
+    parser.add_argument("--llm", action="store_true", help="Compare with the MovieExtractor LLM, needs GROQ_API_KEY")
+    asyncio.run(main(parser.parse_args()))
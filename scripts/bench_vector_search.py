@@ -0,0 +1,94 @@
+"""
+Latency of one movies_plot similarity search in each embedded mode, with
+recall@10 against exact search, and optionally the Qdrant round trip.
+
+    python -m scripts.bench_vector_search --path data/movies_plot [--qdrant]
+    python -m scripts.bench_vector_search --movies 50000 --dim 1024   # synthetic snapshot
+
+The synthetic snapshot gives its leading dimensions most of the variance, as
+Matryoshka embeddings do, so its prefix recall is only indicative; use
+'python -m src.vector_index recall' on the real snapshot for that.
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+from src.vector_index import PlotVectorIndex, PrefixPlotIndex, QuantizedPlotIndex, quantize
+from .bench import percentiles, report
+
+
+def synthetic_snapshot(movies: int, dim: int, seed: int = 0) -> PlotVectorIndex:
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(movies, dim)).astype(np.float32)
+    vectors *= (1.0 / np.sqrt(1.0 + np.arange(dim) / 16.0)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return PlotVectorIndex(vectors, [f"movie {i}" for i in range(movies)])
+
+
+def indexes(exact: PlotVectorIndex, args):
+    yield "embedded", exact
+    if exact.vectors.dtype == np.float32:
+        codes, scales = quantize(exact.vectors)
+        yield "quantized", QuantizedPlotIndex(exact.vectors, exact.titles, codes, scales,
+                                              metric=exact.metric, rescore=args.rescore)
+    for dims in args.prefix_dims:
+        yield f"prefix{dims}", PrefixPlotIndex(exact.vectors, exact.titles, dims=dims,
+                                              metric=exact.metric, rescore=args.rescore)
+
+
+def measure(index: PlotVectorIndex, queries, truth, k: int = 10):
+    samples, hits = [], 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        positions, _ = index.ranked(index.prepare_query(query), k)
+        samples.append(time.perf_counter() - started)
+        hits += len(expected & set(positions.tolist()))
+    return samples, hits / (k * len(queries))
+
+
+async def qdrant_samples(queries, k: int = 10):
+    from src.qdrant_client_singleton import QdrantClientSingleton
+
+    client = await QdrantClientSingleton.get_instance()
+    samples = []
+    try:
+        for query in queries:
+            started = time.perf_counter()
+            await client.search(collection_name="movies_plot", query_vector=query.tolist(), limit=k,
+                                with_payload=["title"])
+            samples.append(time.perf_counter() - started)
+    finally:
+        await QdrantClientSingleton.close()
+    return samples
+
+
+def main(args):
+    exact = PlotVectorIndex.load(args.path) if args.path else synthetic_snapshot(args.movies, args.dim)
+    rng = np.random.default_rng(1)
+    # Perturbed snapshot rows stand in for query embeddings
+    sample = rng.choice(len(exact), size=args.queries, replace=False)
+    queries = [
+        np.asarray(exact.vectors[position], dtype=np.float32) + rng.normal(scale=0.02, size=exact.vectors.shape[1])
+        for position in sample
+    ]
+    truth = [set(exact.ranked(exact.prepare_query(query), 10)[0].tolist()) for query in queries]
+
+    for mode, index in indexes(exact, args):
+        measure(index, queries[:10], truth[:10])  # warm-up, pages in the memory map
+        samples, recall = measure(index, queries, truth)
+        report("vector_search", mode=mode, movies=len(exact), dim=int(exact.vectors.shape[1]),
+               rescore=args.rescore, recall_at_10=round(recall, 4), **percentiles(samples))
+    if args.qdrant:
+        report("vector_search", mode="qdrant", **percentiles(asyncio.run(qdrant_samples(queries))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--path", help="Snapshot directory; a synthetic snapshot is generated without it")
+    parser.add_argument("--movies", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--rescore", type=int, default=256)
+    parser.add_argument("--prefix-dims", type=int, nargs="*", default=[128, 256])
+    parser.add_argument("--qdrant", action="store_true", help="Also time the same searches against QDRANT_URI")
+    main(parser.parse_args())
@@ -0,0 +1,61 @@
+import logging
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# One row per movie with what the in-memory indexes need. People are keyed by
+# element ID since names aren't unique; genres by their lowercase name.
+CATALOG_FIELDS = [
+    "m.id AS id",
+    "m.title AS title",
+    "coalesce(m.popularity, 0.0) AS popularity",
+]
+GENRE_YEAR_FIELDS = [
+    "head([(m)-[:RELEASED_IN]->(released) | released.year]) AS year",
+    "[(m)-[:HAS_GENRE]->(genre) | genre.name_lower] AS genres",
+]
+PEOPLE_FIELDS = [
+    "[(m)-[:DIRECTED_BY]->(director) | elementId(director)] AS directors",
+    "[(m)-[:ACTED_IN]->(actor) | elementId(actor)] AS actors",
+]
+
+
+def catalog_query(genres: bool = True, people: bool = True) -> str:
+    fields = CATALOG_FIELDS + (GENRE_YEAR_FIELDS if genres else []) + (PEOPLE_FIELDS if people else [])
+    return "MATCH (m:Movie)\nRETURN " + ",\n    ".join(fields)
+
+
+class Catalog:
+    """Column-oriented snapshot of every Movie and its director/actor/genre/year links"""
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self.titles: List[str] = []
+        self.popularity: List[float] = []
+        self.years: List[Optional[int]] = []
+        self.directors: List[List[str]] = []
+        self.actors: List[List[str]] = []
+        self.genres: List[List[str]] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, record):
+        self.ids.append(record["id"])
+        self.titles.append(record["title"] or "")
+        self.popularity.append(float(record["popularity"]))
+        self.years.append(record.get("year"))
+        self.directors.append(record.get("directors") or [])
+        self.actors.append(record.get("actors") or [])
+        self.genres.append([genre for genre in record.get("genres") or [] if genre])
+
+
+async def load_catalog(driver, genres: bool = True, people: bool = True) -> Catalog:
+    """Every Movie, optionally without its genres/year or its directors/actors"""
+    catalog = Catalog()
+    async with driver.session() as session:
+        result = await session.run(catalog_query(genres=genres, people=people))
+        async for record in result:
+            catalog.append(record)
+    logger.info(f"Loaded catalog of {len(catalog)} movies from Neo4j")
+    return catalog
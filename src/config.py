@@ -17,6 +17,109 @@ class Settings(BaseSettings):
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY")
     REDDIT_CLIENT_ID: str = os.getenv("REDDIT_CLIENT_ID")
     REDDIT_SECRET: str = os.getenv("REDDIT_SECRET")
+    JINA_API_KEY: str = os.getenv("JINA_API_KEY")
+
+    # Jina embeddings client
+    JINA_EMBEDDING_URL: str = "https://api.jina.ai/v1/embeddings"
+    JINA_EMBEDDING_MODEL: str = "jina-embeddings-v3"
+    JINA_EMBEDDING_TASK: str = "retrieval.query"
+    JINA_TIMEOUT: float = 10.0
+    JINA_CONNECT_TIMEOUT: float = 3.0
+    JINA_MAX_RETRIES: int = 2
+    JINA_RETRY_BACKOFF: float = 0.25
+    JINA_MAX_CONNECTIONS: int = 20
+    JINA_BATCH_MAX_SIZE: int = 32
+    JINA_BATCH_WAIT_MS: float = 10.0
+
+    # HTTP pools shared by the long-lived LLM agents
+    LLM_TIMEOUT: float = 60.0
+    LLM_CONNECT_TIMEOUT: float = 5.0
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    # Hedged LLM calls: the next provider is tried once the current one is slower
+    # than its recent LLM_HEDGE_QUANTILE latency (LLM_HEDGE_DEFAULT_DELAY until it
+    # has LLM_HEDGE_MIN_SAMPLES answers); every call gives up after LLM_DEADLINE
+    LLM_DEADLINE: float = 20.0
+    LLM_HEDGE_QUANTILE: float = 90
+    LLM_HEDGE_MIN_SAMPLES: int = 20
+    LLM_HEDGE_DEFAULT_DELAY: float = 2.0
+    LLM_HEDGE_MIN_DELAY: float = 0.2
+    # Fallback models, used only when their provider's API key is set
+    ENTITY_HEDGE_GROQ_MODEL: str = "llama-3.3-70b-versatile"
+    ENTITY_HEDGE_GEMINI_MODEL: str = "gemini-2.0-flash-lite"
+    REDDIT_HEDGE_OPENAI_MODEL: str = "gpt-4o-mini"
+
+    # Simple genre/era/"movies like X" queries are parsed locally when the rule-based
+    # parser is at least this confident; everything else goes to the LLM. Its movie
+    # suggestions for genre/era queries come from the genre/year index below, without
+    # it those queries go to the LLM too
+    RULE_PARSER_ENABLED: bool = True
+    RULE_PARSER_MIN_CONFIDENCE: float = 0.9
+
+    # Stream entity extraction and start downstream searches from the partial JSON
+    SPECULATIVE_PIPELINE: bool = True
+
+    # Extracted entities by normalized query and filters; queries whose embeddings
+    # reach the cosine threshold reuse each other's entities (above 1 disables that)
+    ENTITY_CACHE_SIZE: int = 5000
+    ENTITY_CACHE_TTL: float = 86400.0
+    ENTITY_CACHE_SIMILARITY: float = 0.95
+    ENTITY_CACHE_EMBED_TIMEOUT: float = 1.0
+
+    # Reddit comment hash -> movies extracted from it
+    REDDIT_COMMENT_CACHE_SIZE: int = 20000
+    # Find catalog titles in comments locally, only comments without any go to the LLM
+    LOCAL_TITLE_EXTRACTION: bool = True
+
+    # Embedding cache; an empty path keeps it in memory only
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: str = "data/embeddings.sqlite3"
+
+    # Refuse to start when a query the API runs can't be planned or would scan every node
+    NEO4J_FAIL_ON_ALL_NODES_SCAN: bool = True
+
+    # Movie detail cache for /{id} and /movies/batch-by-ids
+    MOVIE_CACHE_SIZE: int = 5000
+    MOVIE_CACHE_TTL: float = 3600.0
+    # Shared secret for admin routes such as cache invalidation, sent as X-Admin-Token;
+    # they're disabled while it's empty
+    ADMIN_TOKEN: str = ""
+    # IDs/titles per UNWIND query in the streaming (NDJSON) batch mode
+    BATCH_STREAM_CHUNK_SIZE: int = 200
+
+    # "live" scores every Movie per request, "precomputed" reads SIMILAR_TO edges
+    # built by src.similarity_job and falls back to live scoring when there are none,
+    # "memory" scores against an in-process snapshot of the graph (src.graph_index)
+    SIMILARITY_MODE: str = "live"
+    SIMILAR_TO_TOP_N: int = 50
+    # How often the in-memory catalog indexes (title resolver, "memory" similarity
+    # graph) are rebuilt from Neo4j; 0 disables refreshing
+    CATALOG_REFRESH_SECONDS: float = 3600.0
+    # Fuzzy reference-title resolution; the score is the share of the query's
+    # trigrams found in the matched title
+    TITLE_RESOLVER_ENABLED: bool = True
+    TITLE_MATCH_MIN_SCORE: float = 0.6
+    # Answer genre/year-only queries from popularity-ranked in-memory buckets
+    GENRE_YEAR_INDEX_ENABLED: bool = True
+
+    # Qdrant transport
+    QDRANT_PREFER_GRPC: bool = False
+    QDRANT_GRPC_PORT: int = 6334
+    QDRANT_TIMEOUT: int = 10
+    QDRANT_HTTP2: bool = False
+    QDRANT_MAX_CONNECTIONS: int = 100
+    QDRANT_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    TITLE_VECTOR_CACHE_SIZE: int = 2048
+
+    # "qdrant" searches remotely, "embedded" serves movies_plot from a local snapshot,
+    # "quantized" scores int8 codes of that snapshot and rescores with exact vectors,
+    # "prefix" scores the first VECTOR_PREFIX_DIMS dimensions and rescores likewise
+    VECTOR_SEARCH_MODE: str = "qdrant"
+    VECTOR_SNAPSHOT_DIR: str = "data/movies_plot"
+    VECTOR_SNAPSHOT_DTYPE: str = "float32"
+    VECTOR_QUANTIZATION_QUANTILE: float = 1.0
+    VECTOR_RESCORE_CANDIDATES: int = 256
+    VECTOR_PREFIX_DIMS: int = 128
 
 
     
@@ -0,0 +1,111 @@
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from .cache import LRUCache
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class SqliteVectorStore:
+    """Persistent key -> float32 vector store; safe to share between uvicorn workers"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector FROM embeddings WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+    def set(self, key: str, vector: List[float]):
+        blob = np.asarray(vector, dtype=np.float32).tobytes()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", (key, blob)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmbeddingCache:
+    """
+    Two-tier embedding cache: an in-process LRU in front of an optional
+    SQLite store. Keys combine the model, the task and the normalized text.
+    """
+
+    def __init__(self, model: str, task: str, maxsize: int = 10000, path: Optional[str] = None):
+        self.model = model
+        self.task = task
+        self.memory = LRUCache(maxsize)
+        self.disk = SqliteVectorStore(path) if path else None
+        self.disk_hits = 0
+        self.misses = 0
+
+    def key(self, text: str) -> str:
+        raw = f"{self.model}\x00{self.task}\x00{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, text: str) -> Optional[List[float]]:
+        key = self.key(text)
+        vector = self.memory.get(key)
+        if vector is not None:
+            return vector
+
+        if self.disk:
+            try:
+                vector = await asyncio.to_thread(self.disk.get, key)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache read failed: {e}")
+            if vector is not None:
+                self.disk_hits += 1
+                self.memory.set(key, vector)
+                return vector
+
+        self.misses += 1
+        return None
+
+    async def set(self, text: str, vector: List[float]):
+        key = self.key(text)
+        self.memory.set(key, vector)
+        if self.disk:
+            try:
+                await asyncio.to_thread(self.disk.set, key, vector)
+            except sqlite3.Error as e:
+                logger.warning(f"Embedding cache write failed: {e}")
+
+    def close(self):
+        if self.disk:
+            self.disk.close()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory.hits + self.memory.misses
+        return {
+            "memory": self.memory.stats(),
+            "disk_enabled": self.disk is not None,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+        }
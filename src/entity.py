@@ -2,6 +2,7 @@ from typing import Dict, Optional, List
 from langchain_openai import ChatOpenAI
 from langchain_groq import ChatGroq
 from langchain.output_parsers import PydanticOutputParser
+from langchain_core.utils.json import parse_json_markdown
 from langchain.prompts import ChatPromptTemplate, PromptTemplate
 from pydantic import BaseModel, Field
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -23,15 +24,19 @@ class MovieEntities(BaseModel):
 
     parsing_review: Optional[str] = Field(None, description="Review of the parsing of the query")
 
+GENRES = ['drama', 'war', 'crime', 'animation', 'comedy', 'romance', 'history', 'family', 'sci-fi', 'documentary', 'music', 'tv movie', 'children', 'imax', 'western', 'musical', 'film-noir', 'action', 'fantasy', 'mystery', 'horror', 'thriller', 'adventure']
+
 class EntityExtractorAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.7,api_key=settings.OPENAI_API_KEY)
+    def __init__(self, http_async_client=None, llm=None):
+        # llm may be any chat model or a HedgedLLMRouter over several
+        self.llm = llm or ChatOpenAI(model="gpt-4o-mini", temperature=0.7,api_key=settings.OPENAI_API_KEY,
+                                     http_async_client=http_async_client)
         # self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash-lite", temperature=.7,api_key=settings.GEMINI_API_KEY)
         # self.llm = ChatGoogleGenerativeAI(model="gemini-1.5-pro", temperature=0,api_key=settings.GEMINI_API_KEY)
         # self.llm = ChatGroq(model="mixtral-8x7b-32768", temperature=0, api_key=settings.GROQ_API_KEY)
         # self.llm = ChatGroq(model="llama-3.3-70b-versatile", temperature=0, api_key=settings.GROQ_API_KEY)
         self.parser = PydanticOutputParser(pydantic_object=MovieEntities)
-        self.genres = ['drama', 'war', 'crime', 'animation', 'comedy', 'romance', 'history', 'family', 'sci-fi', 'documentary', 'music', 'tv movie', 'children', 'imax', 'western', 'musical', 'film-noir', 'action', 'fantasy', 'mystery', 'horror', 'thriller', 'adventure']
+        self.genres = GENRES
         
         self.prompt = ChatPromptTemplate.from_messages([
             (
@@ -108,22 +113,43 @@ class EntityExtractorAgent:
         {genres}"""
             ),
             ("user", "{query} {min_year} {max_year} {user_genres}")
-        ])
-
+        # The genre list and format instructions never change, fill them in once
+        ]).partial(genres=self.genres, format_instructions=self.parser.get_format_instructions())
 
 
-    async def extract_entities(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None, genres: Optional[str] = None) -> MovieEntities:
 
-        formatted_prompt = self.prompt.format(
+    def format_prompt(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None, genres: Optional[str] = None) -> str:
+        return self.prompt.format(
             query=query,
             min_year=min_year if min_year != "Infinity" else None,
             max_year=max_year if max_year != "-Infinity" else None,
             user_genres=genres,
-            genres=self.genres,
-            format_instructions=self.parser.get_format_instructions()
         )
+
+    async def extract_entities(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None, genres: Optional[str] = None) -> MovieEntities:
+
+        formatted_prompt = self.format_prompt(query, min_year, max_year, genres)
         
         response = await self.llm.ainvoke(formatted_prompt)
         
         result = self.parser.parse(response.content)
-        return result
\ No newline at end of file
+        return result
+
+    async def stream_entities(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None, genres: Optional[str] = None):
+        """
+        Same as extract_entities, but streams the completion: yields ("partial", dict)
+        whenever the incrementally parsed JSON grows, then ("result", MovieEntities).
+        """
+        content = ""
+        last = None
+        async for chunk in self.llm.astream(self.format_prompt(query, min_year, max_year, genres)):
+            content += chunk.content
+            try:
+                partial = parse_json_markdown(content)
+            except ValueError:
+                continue
+            if isinstance(partial, dict) and partial != last:
+                last = partial
+                yield ("partial", partial)
+
+        yield ("result", self.parser.parse(content))
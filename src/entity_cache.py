@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from .cache import LRUCache
+from .entity import MovieEntities
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+class QueryVectors:
+    """Unit query embeddings for one filter combination, kept as rows of a preallocated matrix"""
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.queries: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.queries)
+
+    def __iter__(self):
+        return iter(list(self.queries))
+
+    def add(self, query: str, vector: np.ndarray):
+        row = self.rows.get(query)
+        if row is None:
+            row = len(self.queries)
+            if row == len(self.matrix):
+                grown = np.empty((2 * len(self.matrix), self.matrix.shape[1]), dtype=np.float32)
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.queries.append(query)
+            self.rows[query] = row
+        self.matrix[row] = vector
+
+    def remove(self, query: str):
+        # Move the last row into the gap so the live rows stay contiguous
+        row = self.rows.pop(query)
+        last = self.queries.pop()
+        if last != query:
+            self.matrix[row] = self.matrix[len(self.queries)]
+            self.queries[row] = last
+            self.rows[last] = row
+
+    def scores(self, vector: np.ndarray) -> np.ndarray:
+        return self.matrix[:len(self.queries)] @ vector
+
+
+class EntityCache:
+    """
+    Extracted MovieEntities keyed by the normalized query and its filters.
+    Exact misses fall back to the most similar cached query with the same
+    filters when the cosine similarity of their embeddings reaches
+    similarity_threshold; a threshold above 1 disables that fallback.
+    The semantic lookup runs alongside the LLM instead of in front of it.
+    """
+
+    def __init__(self, embed: Optional[Callable[[str], Awaitable[List[float]]]] = None,
+                 maxsize: int = 5000, ttl: Optional[float] = None,
+                 similarity_threshold: float = 0.95, embed_timeout: float = 1.0):
+        self.embed = embed
+        self.similarity_threshold = similarity_threshold
+        self.embed_timeout = embed_timeout
+        self.entries = LRUCache(maxsize, ttl=ttl)
+        # filters -> embeddings of the cached queries, for semantic lookups
+        self.vectors: Dict[Tuple, QueryVectors] = {}
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.embed_failures = 0
+        self._tasks = set()
+
+    @property
+    def semantic(self) -> bool:
+        return self.embed is not None and self.similarity_threshold <= 1
+
+    @staticmethod
+    def filters_of(min_year: Optional[str], max_year: Optional[str], genres: Optional[str]) -> Tuple:
+        genre_list = sorted(normalize_text(g) for g in (genres or "").split(",") if g.strip())
+        return (normalize_text(min_year or ""), normalize_text(max_year or ""), tuple(genre_list))
+
+    async def _vector(self, query: str) -> Optional[np.ndarray]:
+        try:
+            vector = np.asarray(await asyncio.wait_for(self.embed(query), self.embed_timeout), dtype=np.float32)
+        except Exception as e:
+            self.embed_failures += 1
+            logger.error(f"Failed to embed query for the entity cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def get(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None,
+            genres: Optional[str] = None) -> Optional[MovieEntities]:
+        """Exact lookup only; it never waits on the embedding service"""
+        entities = self.entries.get((normalize_text(query), self.filters_of(min_year, max_year, genres)))
+        if entities is None:
+            return None
+        self.exact_hits += 1
+        return entities.model_copy(deep=True)
+
+    async def extract(self, query: str, extractor: Callable[[], AsyncIterator], min_year: Optional[str] = None,
+                      max_year: Optional[str] = None, genres: Optional[str] = None) -> AsyncIterator:
+        """
+        Read-through extraction. An exact hit yields ("cached", entities) right
+        away. Otherwise extractor() (an async generator ending in ("result",
+        entities), like EntityExtractorAgent.stream_entities) starts at once and
+        its messages pass through while the semantic lookup runs beside it; a
+        semantic hit that comes first cancels the LLM and yields ("cached", entities).
+        """
+        entities = self.get(query, min_year, max_year, genres)
+        if entities is not None:
+            yield ("cached", entities)
+            return
+
+        filters = self.filters_of(min_year, max_year, genres)
+        text = normalize_text(query)
+        vector = asyncio.create_task(self._vector(text)) if self.semantic else None
+        semantic = asyncio.create_task(self._semantic_get(text, filters, vector)) if vector else None
+        stream = extractor().__aiter__()
+        step = None
+        try:
+            while True:
+                if step is None:
+                    step = asyncio.ensure_future(stream.__anext__())
+                waiting = {step} if semantic is None else {step, semantic}
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+                if semantic in done:
+                    entities, semantic = semantic.result(), None
+                    if entities is not None:
+                        self.semantic_hits += 1
+                        yield ("cached", entities.model_copy(deep=True))
+                        return
+
+                if step in done:
+                    try:
+                        message = step.result()
+                    except StopAsyncIteration:
+                        return
+                    step = None
+                    if message[0] == "result":
+                        self.misses += 1
+                        self.set(query, message[1], min_year, max_year, genres, vector=vector)
+                        vector = None
+                    yield message
+        finally:
+            for task in (step, semantic, vector):
+                if task is not None:
+                    task.cancel()
+            if step is not None:
+                await asyncio.gather(step, return_exceptions=True)
+            await stream.aclose()
+
+    async def _semantic_get(self, text: str, filters: Tuple, vector: Awaitable) -> Optional[MovieEntities]:
+        candidates = self.vectors.get(filters)
+        if not candidates:
+            return None
+        vector = await asyncio.shield(vector)
+        if vector is None or vector.shape[0] != candidates.matrix.shape[1]:
+            return None
+
+        scores = candidates.scores(vector)
+        queries = list(candidates.queries)
+        for best in np.argsort(-scores):
+            if scores[best] < self.similarity_threshold:
+                break
+            entities = self.entries.get((queries[best], filters))
+            if entities is None:
+                # Expired or evicted, the next best match may still be valid
+                candidates.remove(queries[best])
+                continue
+            logger.info(f"Entity cache semantic hit ({scores[best]:.3f}): '{text}' ~ '{queries[best]}'")
+            return entities
+        return None
+
+    def _prune(self, filters: Tuple):
+        """Drop vectors of entries the LRU has evicted or that have expired"""
+        candidates = self.vectors.get(filters)
+        for stale in [q for q in candidates if (q, filters) not in self.entries]:
+            candidates.remove(stale)
+
+    def set(self, query: str, entities: MovieEntities, min_year: Optional[str] = None,
+            max_year: Optional[str] = None, genres: Optional[str] = None, vector: Optional[asyncio.Task] = None):
+        """Store entities; the embedding for semantic lookups is added in the background"""
+        filters = self.filters_of(min_year, max_year, genres)
+        text = normalize_text(query)
+        self.entries.set((text, filters), entities.model_copy(deep=True))
+        if self.semantic:
+            task = asyncio.create_task(self._add_vector(text, filters, vector or asyncio.create_task(self._vector(text))))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _add_vector(self, text: str, filters: Tuple, vector: Awaitable):
+        vector = await vector
+        if vector is None:
+            return
+        candidates = self.vectors.get(filters)
+        if candidates is None or candidates.matrix.shape[1] != vector.shape[0]:
+            candidates = self.vectors[filters] = QueryVectors(vector.shape[0])
+        candidates.add(text, vector)
+        if len(candidates) > self.entries.maxsize:
+            self._prune(filters)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.exact_hits + self.semantic_hits
+        lookups = hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.entries.maxsize,
+            "ttl": self.entries.ttl,
+            "similarity_threshold": self.similarity_threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "embed_failures": self.embed_failures,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
@@ -2,47 +2,118 @@ from langchain_openai import ChatOpenAI
 from langchain.prompts import PromptTemplate
 from langchain.output_parsers import PydanticOutputParser
 from pydantic import BaseModel
+from typing import Dict, List
+import hashlib
+import logging
 from .config import settings
+from .cache import LRUCache
+from .text import normalize_text
+from .title_extractor import get_title_extractor
 from langchain_groq import ChatGroq
 
-class MovieList(BaseModel):
+logger = logging.getLogger(__name__)
+
+class CommentMovies(BaseModel):
+    id: str
     movies: list[str]
 
+class CommentMovieList(BaseModel):
+    comments: list[CommentMovies]
+
 class MovieExtractor():
-    def __init__(self):
+    def __init__(self, http_async_client=None, llm=None):
         # self.llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=settings.OPENAI_API_KEY)
-        self.llm = ChatGroq(model="llama3-8b-8192", temperature=0, api_key=settings.GROQ_API_KEY)
-        self.parser = PydanticOutputParser(pydantic_object=MovieList)
-        self.prompt = PromptTemplate(
+        # llm may be any chat model or a HedgedLLMRouter over several
+        self.llm = llm or ChatGroq(model="llama3-8b-8192", temperature=0, api_key=settings.GROQ_API_KEY,
+                                   http_async_client=http_async_client)
+        # Comments from several threads in one request, answered per comment so
+        # results can be cached per comment
+        self.batch_parser = PydanticOutputParser(pydantic_object=CommentMovieList)
+        self.batch_prompt = PromptTemplate(
             template="""
-            You are a helpful assistant that extracts movies from a given list of comments.
-            Here is the list of comments:
-            {comments}
+            You are a helpful assistant that extracts movies from Reddit comments.
+            The comments below come from several threads. Each comment starts with its id in square brackets:
+            {threads}
 
             For each comment, extract the movies mentioned if the comment is about movies.
-            
+
             Important instructions:
             1. Correct any typos in movie titles based on your knowledge (e.g., "The Matrics" should be "The Matrix")
             2. Complete partial movie names with their full titles (e.g., "TDK" should become "The Dark Knight")
             3. Use the official movie title rather than abbreviations or nicknames
-            4. If a movie has a year mentioned, include it in parentheses after the title
-            5. If you're unsure about a movie reference, include it anyway with your best correction
-            6. Return only the titles, excluding year if present
-            
-            For example: 
-
-            ['Heat', 'It's the same film! Absolutely love both', 'Have you seen The Dark Knight?', 'For real. Op is describing TDKR but it sounds more like he's looking for TDK lol', 'Gladiator, sort of', 'Apocalypto (2006)', 'The Batman', 'Looper (2012)', 'I'm just delighted you like The Dark Knight Rises so much. It's far and away my favorite of the trilogy and one of my favorite superhero movies ever.']
+            4. If you're unsure about a movie reference, include it anyway with your best correction
+            5. Return only the titles, excluding year if present
+            6. Return every comment id exactly once, with an empty list if it mentions no movies
 
-            Should return:
-            ['Heat', 'The Dark Knight', 'The Dark Knight Rises', 'Gladiator', 'Apocalypto', 'The Batman', 'Looper']
+            For example, the comment "[t1c2] For real. Op is describing TDKR but it sounds more like he's looking for TDK lol"
+            should give {{"id": "t1c2", "movies": ["The Dark Knight Rises", "The Dark Knight"]}}
 
             Here is the format you should use to extract the movies:
             {format_instructions}
             """,
-            input_variables=["comments"],
-            partial_variables={"format_instructions": self.parser.get_format_instructions()}
+            input_variables=["threads"],
+            partial_variables={"format_instructions": self.batch_parser.get_format_instructions()}
         )
+        # Comment hash -> movies it mentions
+        self.comment_cache = LRUCache(settings.REDDIT_COMMENT_CACHE_SIZE)
+
+    @staticmethod
+    def comment_key(comment: str) -> str:
+        return hashlib.sha256(normalize_text(comment).encode("utf-8")).hexdigest()
+
+    async def aextract_movies_batch(self, threads: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """
+        Movies mentioned in each thread's comments, keyed like threads (by site URL).
+        Comments seen before are answered from the cache, comments naming catalog
+        titles by the local TitleExtractor; the rest of all threads go to the LLM
+        in a single request. If that request fails, its comments count as having
+        no movies (and aren't cached) rather than failing the whole search.
+        """
+        title_extractor = get_title_extractor() if settings.LOCAL_TITLE_EXTRACTION else None
+        movies_by_comment: Dict[str, List[str]] = {}
+        pending: Dict[str, str] = {}  # comment id -> comment key
+        sections = []
+        for t, (url, comments) in enumerate(threads.items(), start=1):
+            lines = []
+            for c, comment in enumerate(comments, start=1):
+                key = self.comment_key(comment)
+                if key in movies_by_comment or key in pending.values():
+                    continue
+                cached = self.comment_cache.get(key)
+                if cached is not None:
+                    movies_by_comment[key] = cached
+                    continue
+                local = title_extractor.extract(comment) if title_extractor else None
+                if local:
+                    movies_by_comment[key] = local
+                    continue
+                comment_id = f"t{t}c{c}"
+                pending[comment_id] = key
+                lines.append(f"[{comment_id}] {' '.join(comment.split())}")
+            if lines:
+                sections.append(f"### Thread {t}: {url}\n" + "\n".join(lines))
+
+        if pending:
+            try:
+                response = await self.llm.ainvoke(self.batch_prompt.format(threads="\n\n".join(sections)))
+                entries = self.batch_parser.parse(response.content).comments
+            except Exception as e:
+                # A failed call only loses the LLM's share; cached and local matches still count
+                logger.error(f"Movie extraction failed for {len(pending)} comments: {e}")
+                entries = []
+            for entry in entries:
+                key = pending.get(entry.id)
+                if key is not None:
+                    movies_by_comment[key] = entry.movies
+                    self.comment_cache.set(key, entry.movies)
+            missing = [comment_id for comment_id, key in pending.items() if key not in movies_by_comment]
+            if missing:
+                logger.error(f"Movie extraction returned no result for comments {missing}")
 
-    def extract_movies(self, comments: list[str]) -> list[str]:
-        response = self.llm.invoke(self.prompt.format(comments=comments))
-        return self.parser.parse(response.content)
+        results = {}
+        for url, comments in threads.items():
+            movies = []
+            for comment in comments:
+                movies += movies_by_comment.get(self.comment_key(comment), [])
+            results[url] = list(dict.fromkeys(movies))
+        return results
@@ -0,0 +1,95 @@
+import heapq
+import logging
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from .catalog import Catalog
+from .entity import MovieEntities
+
+logger = logging.getLogger(__name__)
+
+# Bucket key for "any year" / "any genre"
+ANY = None
+
+
+class GenreYearIndex:
+    """
+    Popularity-ranked buckets for the genre/year-only standard queries.
+    Movies are numbered by popularity rank, and each (genre, year) bucket holds
+    the ascending ranks of its movies, so merging buckets yields movies most
+    popular first and the merge can stop as soon as it has enough.
+    """
+
+    def __init__(self, catalog: Catalog):
+        order = np.argsort(-np.asarray(catalog.popularity, dtype=np.float32), kind="stable")
+        self.titles = [catalog.titles[position] for position in order]
+        self.genres: List[Set[str]] = [set(catalog.genres[position]) for position in order]
+
+        buckets: Dict[Tuple[Optional[str], Optional[int]], List[int]] = {}
+        for rank, position in enumerate(order):
+            year = catalog.years[position]
+            for genre in self.genres[rank] | {ANY}:
+                buckets.setdefault((genre, ANY), []).append(rank)
+                if year is not None:
+                    buckets.setdefault((genre, year), []).append(rank)
+        self.buckets = buckets
+        years = [year for _, year in buckets if year is not None]
+        self.min_year = min(years, default=0)
+        self.max_year = max(years, default=0)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @staticmethod
+    def can_answer(entities: MovieEntities) -> bool:
+        """Standard queries that filter on nothing but genres and years"""
+        return not (entities.movie or entities.director or entities.actor)
+
+    def _ranks(self, genre: Optional[str], year_start: Optional[int], year_end: Optional[int]) -> Iterator[int]:
+        if not (year_start or year_end):
+            return iter(self.buckets.get((genre, ANY), []))
+        years = range(year_start or self.min_year, (year_end or self.max_year) + 1)
+        return heapq.merge(*[self.buckets[(genre, year)] for year in years if (genre, year) in self.buckets])
+
+    def top(self, entities: MovieEntities, limit: int = 10) -> List[str]:
+        """Titles of the most popular movies matching the genre and year filters"""
+        genres = list(dict.fromkeys(g.lower() for g in entities.genre or []))
+        year_start, year_end = entities.year_start, entities.year_end
+
+        if not genres:
+            ranks = self._ranks(ANY, year_start, year_end)
+            required = set()
+        elif entities.genres_union:
+            ranks = heapq.merge(*[self._ranks(genre, year_start, year_end) for genre in genres])
+            required = set()
+        else:
+            # Walk the smallest genre, check the others per movie
+            smallest = min(genres, key=lambda genre: len(self.buckets.get((genre, ANY), [])))
+            ranks = self._ranks(smallest, year_start, year_end)
+            required = set(genres)
+
+        titles = []
+        previous = -1
+        for rank in ranks:
+            if rank == previous:
+                continue
+            previous = rank
+            if required and not required <= self.genres[rank]:
+                continue
+            titles.append(self.titles[rank])
+            if len(titles) >= limit:
+                break
+        return titles
+
+
+_genre_year_index: Optional[GenreYearIndex] = None
+
+
+def get_genre_year_index() -> Optional[GenreYearIndex]:
+    return _genre_year_index
+
+
+def build_genre_year_index(catalog: Catalog) -> GenreYearIndex:
+    global _genre_year_index
+    _genre_year_index = GenreYearIndex(catalog)
+    logger.info(f"Built popularity-ranked genre/year buckets for {len(_genre_year_index)} movies")
+    return _genre_year_index
@@ -0,0 +1,160 @@
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from .catalog import Catalog
+from .entity import MovieEntities
+
+logger = logging.getLogger(__name__)
+
+# Same weights as CypherQueryGenerator._similarity_query
+FEATURE_WEIGHTS = {
+    "directors": 2.0,
+    "actors": 1.0,
+    "genres": 0.5,
+}
+
+
+class Bipartite:
+    """Movie <-> feature links as a pair of CSR adjacency arrays"""
+
+    def __init__(self, per_movie: List[List[str]]):
+        self.feature_ids: Dict[str, int] = {}
+        rows, cols = [], []
+        for movie, features in enumerate(per_movie):
+            for feature in dict.fromkeys(features):
+                rows.append(movie)
+                cols.append(self.feature_ids.setdefault(feature, len(self.feature_ids)))
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+
+        # movie -> features; rows were emitted in movie order
+        self.movie_indptr = np.zeros(len(per_movie) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(per_movie)), out=self.movie_indptr[1:])
+        self.movie_features = cols
+
+        # feature -> movies
+        order = np.argsort(cols, kind="stable")
+        self.feature_indptr = np.zeros(len(self.feature_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.feature_ids)), out=self.feature_indptr[1:])
+        self.feature_movies = rows[order]
+
+    def features_of(self, movies: np.ndarray) -> np.ndarray:
+        if len(movies) == 0:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate([
+            self.movie_features[self.movie_indptr[m]:self.movie_indptr[m + 1]] for m in movies
+        ]))
+
+    def movie_counts(self, features: np.ndarray, n_movies: int) -> np.ndarray:
+        """How many of the given features each movie has"""
+        if len(features) == 0:
+            return np.zeros(n_movies, dtype=np.float32)
+        movies = np.concatenate([
+            self.feature_movies[self.feature_indptr[f]:self.feature_indptr[f + 1]] for f in features
+        ])
+        return np.bincount(movies, minlength=n_movies).astype(np.float32)
+
+
+class GraphSimilarityIndex:
+    """
+    In-process copy of the Movie-Director/Actor/Genre/Year graph that answers
+    'movies like X' queries with the same scoring as the live Cypher:
+    shared directors x2 + shared actors + shared genres x0.5, ties broken by
+    popularity, with year and genre filters applied as vectorized masks.
+    """
+
+    def __init__(self, catalog: Catalog):
+        self.titles = catalog.titles
+        self.ids = np.asarray(catalog.ids, dtype=np.int64)
+        self.positions = {movie_id: position for position, movie_id in enumerate(catalog.ids)}
+        self.popularity = np.asarray(catalog.popularity, dtype=np.float32)
+        self.years = np.asarray([-1 if year is None else year for year in catalog.years], dtype=np.int32)
+        self.graphs = {kind: Bipartite(getattr(catalog, kind)) for kind in FEATURE_WEIGHTS}
+        # Lowercased titles in one newline-separated blob, so CONTAINS lookups run at C speed
+        self._title_blob = "\n".join(title.lower() for title in self.titles)
+        self._title_offsets = np.cumsum([0] + [len(title) + 1 for title in self.titles[:-1]])
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def find_titles_containing(self, text: str) -> List[int]:
+        """Positions of movies whose lowercased title contains text, like toLower(title) CONTAINS"""
+        text = text.lower()
+        if not text or "\n" in text:
+            return []
+        positions = []
+        start = self._title_blob.find(text)
+        while start != -1:
+            position = int(np.searchsorted(self._title_offsets, start, side="right")) - 1
+            # Skip matches that straddle two titles
+            if start + len(text) <= self._title_offsets[position] + len(self.titles[position]):
+                positions.append(position)
+            start = self._title_blob.find(text, start + 1)
+        return positions
+
+    def reference_positions(self, titles: List[str], movie_ids: Iterable[int] = ()) -> np.ndarray:
+        """Movies whose title contains one of titles, plus the already resolved movie_ids"""
+        positions = {self.positions[i] for i in movie_ids if i in self.positions}
+        for title in titles:
+            positions.update(self.find_titles_containing(title))
+        return np.fromiter(positions, dtype=np.int64, count=len(positions))
+
+    def scores(self, refs: np.ndarray) -> np.ndarray:
+        scores = np.zeros(len(self), dtype=np.float32)
+        for kind, weight in FEATURE_WEIGHTS.items():
+            graph = self.graphs[kind]
+            scores += weight * graph.movie_counts(graph.features_of(refs), len(self))
+        return scores
+
+    def filter_mask(self, entities: MovieEntities, refs: np.ndarray) -> np.ndarray:
+        mask = np.ones(len(self), dtype=bool)
+        mask[refs] = False
+
+        if entities.genre:
+            genres = self.graphs["genres"]
+            wanted = [g.lower() for g in dict.fromkeys(entities.genre)]
+            known = np.asarray([genres.feature_ids[g] for g in wanted if g in genres.feature_ids], dtype=np.int64)
+            counts = genres.movie_counts(known, len(self))
+            if entities.genres_union:
+                mask &= counts > 0
+            elif len(known) < len(wanted):
+                # A required genre nobody has
+                mask[:] = False
+            else:
+                mask &= counts == len(wanted)
+
+        if entities.year_start or entities.year_end:
+            mask &= self.years >= 0
+            if entities.year_start:
+                mask &= self.years >= entities.year_start
+            if entities.year_end:
+                mask &= self.years <= entities.year_end
+
+        return mask
+
+    def similar(self, entities: MovieEntities, limit: int = 10, refs: Optional[np.ndarray] = None) -> List[Tuple[int, str]]:
+        """(movie id, title) of the best matches for a similarity or combined similarity+genre query"""
+        if refs is None:
+            refs = self.reference_positions(entities.movie or [])
+        # Like the Cypher, nothing is related to a reference that isn't in the catalog
+        if len(refs) == 0:
+            return []
+        scores = self.scores(refs)
+        candidates = np.flatnonzero(self.filter_mask(entities, refs))
+        # lexsort sorts by the last key first: score, then popularity
+        order = np.lexsort((-self.popularity[candidates], -scores[candidates]))[:limit]
+        return [(int(self.ids[p]), self.titles[p]) for p in candidates[order]]
+
+
+_graph_index: Optional[GraphSimilarityIndex] = None
+
+
+def get_graph_index() -> Optional[GraphSimilarityIndex]:
+    return _graph_index
+
+
+def build_graph_index(catalog: Catalog) -> GraphSimilarityIndex:
+    global _graph_index
+    _graph_index = GraphSimilarityIndex(catalog)
+    logger.info(f"Built in-memory similarity graph for {len(_graph_index)} movies")
+    return _graph_index
@@ -0,0 +1,179 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+import httpx
+from .metrics import RollingStats
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth another attempt: rate limiting and transient upstream failures
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class EmbeddingError(Exception):
+    """Raised when the Jina embeddings API does not return a usable vector"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class JinaEmbeddingClient:
+    """Async client for the Jina embeddings API backed by a keep-alive connection pool"""
+
+    def __init__(
+        self,
+        api_key: str,
+        url: str,
+        model: str,
+        task: str,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_retries: int = 2,
+        retry_backoff: float = 0.25,
+        max_connections: int = 20,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.url = url
+        self.model = model
+        self.task = task
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._client = client or httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        self._client.headers.update({
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        })
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed a list of texts, returning one vector per input in the same order"""
+        payload = {
+            "model": self.model,
+            "task": self.task,
+            "input": texts,
+        }
+
+        error = None
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = await self._client.post(self.url, json=payload)
+            except httpx.TransportError as e:
+                error = EmbeddingError(f"Request to Jina failed: {e}")
+            else:
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    error = EmbeddingError(
+                        f"Jina returned HTTP {response.status_code}",
+                        status_code=response.status_code,
+                    )
+                elif response.is_error:
+                    raise EmbeddingError(
+                        f"Jina returned HTTP {response.status_code}: {response.text}",
+                        status_code=response.status_code,
+                    )
+                else:
+                    return self._parse_response(response, len(texts))
+
+            if attempt < self.max_retries:
+                logger.warning(f"Embedding attempt {attempt + 1} failed: {error}, retrying")
+                await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+
+        raise error
+
+    async def embed_one(self, text: str) -> List[float]:
+        return (await self.embed([text]))[0]
+
+    async def close(self):
+        await self._client.aclose()
+
+    @staticmethod
+    def _parse_response(response: httpx.Response, expected: int) -> List[List[float]]:
+        try:
+            data = response.json().get("data")
+        except ValueError as e:
+            raise EmbeddingError(f"Invalid JSON from Jina: {e}")
+
+        if not data or len(data) != expected:
+            raise EmbeddingError(
+                f"Expected {expected} embeddings from Jina, got {len(data) if data else 0}"
+            )
+        # Results carry their input position, don't rely on response ordering
+        return [item["embedding"] for item in sorted(data, key=lambda item: item["index"])]
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent embedding requests into a single Jina call.
+    A batch is sent when max_batch_size texts are queued or max_wait_ms
+    has passed since the first one arrived, whichever comes first.
+    """
+
+    def __init__(self, client: JinaEmbeddingClient, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        self.client = client
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future, float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight = set()
+        self.batch_size = RollingStats()
+        self.queue_delay_ms = RollingStats()
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._send(batch))
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future, float]]):
+        sent_at = time.perf_counter()
+        # Identical queries in the same window share one input slot
+        positions: Dict[str, int] = {}
+        for text, _, _ in batch:
+            positions.setdefault(text, len(positions))
+
+        self.batch_size.record(len(positions))
+        for _, _, queued_at in batch:
+            self.queue_delay_ms.record((sent_at - queued_at) * 1000)
+
+        try:
+            vectors = await self.client.embed(list(positions))
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for text, future, _ in batch:
+            if not future.done():
+                future.set_result(vectors[positions[text]])
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            "batch_size": self.batch_size.snapshot(),
+            "queue_delay_ms": self.queue_delay_ms.snapshot(),
+        }
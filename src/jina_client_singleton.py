@@ -0,0 +1,60 @@
+from .jina import EmbeddingBatcher, JinaEmbeddingClient
+from .embedding_cache import EmbeddingCache
+from .config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class JinaClientSingleton:
+    _instance = None
+    _batcher = None
+    _cache = None
+
+    @classmethod
+    async def get_instance(cls):
+        if cls._instance is None:
+            cls._instance = JinaEmbeddingClient(
+                api_key=settings.JINA_API_KEY,
+                url=settings.JINA_EMBEDDING_URL,
+                model=settings.JINA_EMBEDDING_MODEL,
+                task=settings.JINA_EMBEDDING_TASK,
+                timeout=settings.JINA_TIMEOUT,
+                connect_timeout=settings.JINA_CONNECT_TIMEOUT,
+                max_retries=settings.JINA_MAX_RETRIES,
+                retry_backoff=settings.JINA_RETRY_BACKOFF,
+                max_connections=settings.JINA_MAX_CONNECTIONS,
+            )
+            logger.info("Jina embedding client initialized")
+        return cls._instance
+
+    @classmethod
+    async def get_batcher(cls):
+        if cls._batcher is None:
+            client = await cls.get_instance()
+            cls._batcher = EmbeddingBatcher(
+                client,
+                max_batch_size=settings.JINA_BATCH_MAX_SIZE,
+                max_wait_ms=settings.JINA_BATCH_WAIT_MS,
+            )
+        return cls._batcher
+
+    @classmethod
+    async def get_cache(cls):
+        if cls._cache is None:
+            cls._cache = EmbeddingCache(
+                model=settings.JINA_EMBEDDING_MODEL,
+                task=settings.JINA_EMBEDDING_TASK,
+                maxsize=settings.EMBEDDING_CACHE_SIZE,
+                path=settings.EMBEDDING_CACHE_PATH or None,
+            )
+        return cls._cache
+
+    @classmethod
+    async def close(cls):
+        cls._batcher = None
+        if cls._cache:
+            cls._cache.close()
+            cls._cache = None
+        if cls._instance:
+            await cls._instance.close()
+            cls._instance = None
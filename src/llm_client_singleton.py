@@ -0,0 +1,93 @@
+import httpx
+from langchain_openai import ChatOpenAI
+from langchain_groq import ChatGroq
+from langchain_google_genai import ChatGoogleGenerativeAI
+from .entity import EntityExtractorAgent
+from .extractor import MovieExtractor
+from .llm_router import HedgedLLMRouter
+from .config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+class LLMClientSingleton:
+    """Process-wide LLM agents sharing keep-alive HTTP pools"""
+    _http_async_client = None
+    _entity_extractor = None
+    _movie_extractor = None
+
+    @classmethod
+    def _transport_options(cls):
+        return {
+            "timeout": httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT),
+            "limits": httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        }
+
+    @classmethod
+    def _clients(cls):
+        if cls._http_async_client is None:
+            cls._http_async_client = httpx.AsyncClient(**cls._transport_options())
+        return {"http_async_client": cls._http_async_client}
+
+    @classmethod
+    def _router(cls, providers):
+        router = HedgedLLMRouter(
+            [(name, model) for name, model in providers if model is not None],
+            deadline=settings.LLM_DEADLINE,
+            hedge_quantile=settings.LLM_HEDGE_QUANTILE,
+            min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            default_hedge_delay=settings.LLM_HEDGE_DEFAULT_DELAY,
+            min_hedge_delay=settings.LLM_HEDGE_MIN_DELAY,
+        )
+        logger.info(f"LLM router over {[provider.name for provider in router.providers]}")
+        return router
+
+    @classmethod
+    async def get_entity_extractor(cls) -> EntityExtractorAgent:
+        if cls._entity_extractor is None:
+            clients = cls._clients()
+            router = cls._router([
+                ("openai:gpt-4o-mini", ChatOpenAI(model="gpt-4o-mini", temperature=0.7, api_key=settings.OPENAI_API_KEY, **clients)),
+                (f"groq:{settings.ENTITY_HEDGE_GROQ_MODEL}", ChatGroq(
+                    model=settings.ENTITY_HEDGE_GROQ_MODEL, temperature=0, api_key=settings.GROQ_API_KEY, **clients
+                ) if settings.GROQ_API_KEY else None),
+                (f"gemini:{settings.ENTITY_HEDGE_GEMINI_MODEL}", ChatGoogleGenerativeAI(
+                    model=settings.ENTITY_HEDGE_GEMINI_MODEL, temperature=0.7, api_key=settings.GEMINI_API_KEY
+                ) if settings.GEMINI_API_KEY else None),
+            ])
+            cls._entity_extractor = EntityExtractorAgent(llm=router)
+            logger.info("Entity extractor agent initialized")
+        return cls._entity_extractor
+
+    @classmethod
+    async def get_movie_extractor(cls) -> MovieExtractor:
+        if cls._movie_extractor is None:
+            clients = cls._clients()
+            router = cls._router([
+                ("groq:llama3-8b-8192", ChatGroq(model="llama3-8b-8192", temperature=0, api_key=settings.GROQ_API_KEY, **clients)),
+                (f"openai:{settings.REDDIT_HEDGE_OPENAI_MODEL}", ChatOpenAI(
+                    model=settings.REDDIT_HEDGE_OPENAI_MODEL, temperature=0, api_key=settings.OPENAI_API_KEY, **clients
+                ) if settings.OPENAI_API_KEY else None),
+            ])
+            cls._movie_extractor = MovieExtractor(llm=router)
+            logger.info("Movie extractor agent initialized")
+        return cls._movie_extractor
+
+    @classmethod
+    def stats(cls):
+        return {
+            name: agent.llm.stats()
+            for name, agent in (("entity_extractor", cls._entity_extractor), ("movie_extractor", cls._movie_extractor))
+            if agent is not None
+        }
+
+    @classmethod
+    async def close(cls):
+        cls._entity_extractor = None
+        cls._movie_extractor = None
+        if cls._http_async_client:
+            await cls._http_async_client.aclose()
+            cls._http_async_client = None
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from .metrics import RollingStats
+
+logger = logging.getLogger(__name__)
+
+
+class LLMDeadlineError(Exception):
+    """Raised when no provider answered within the call's deadline"""
+
+
+class Provider:
+    """A named chat model plus its latency history"""
+
+    def __init__(self, name: str, model: Any, window: int = 500):
+        self.name = name
+        self.model = model
+        # Seconds to a full response (ainvoke) and to the first chunk (astream)
+        self.latency = RollingStats(window)
+        self.first_chunk = RollingStats(window)
+        self.wins = 0
+        self.errors = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.snapshot(),
+            "first_chunk": self.first_chunk.snapshot(),
+            "wins": self.wins,
+            "errors": self.errors,
+        }
+
+
+class HedgedLLMRouter:
+    """
+    Sends a call to the first provider and, if it hasn't answered by that
+    provider's recent hedge_quantile latency, also to the next one; the first
+    success wins and the rest are cancelled. A provider that fails hands over
+    to the next one right away. deadline bounds the whole response, for
+    astream up to its last chunk.
+
+    Providers only need LangChain's ainvoke/astream, so fakes with scripted
+    latency can stand in for real models.
+    """
+
+    def __init__(self, providers: List[Tuple[str, Any]], deadline: float = 20.0,
+                 hedge_quantile: float = 90, min_samples: int = 20,
+                 default_hedge_delay: float = 2.0, min_hedge_delay: float = 0.2):
+        if not providers:
+            raise ValueError("HedgedLLMRouter needs at least one provider")
+        self.providers = [Provider(name, model) for name, model in providers]
+        self.deadline = deadline
+        self.hedge_quantile = hedge_quantile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.hedges = 0
+        self.deadline_errors = 0
+
+    def hedge_delay(self, provider: Provider, stats: RollingStats) -> float:
+        """How long to give provider before firing the next one"""
+        if stats.count < self.min_samples:
+            return self.default_hedge_delay
+        return max(self.min_hedge_delay, stats.percentile(self.hedge_quantile))
+
+    async def _race(self, start, stats_of, deadline_at: float, discard=None) -> Tuple[Provider, Any]:
+        """
+        Run start(provider) across the providers with hedging; returns the winning
+        provider and its result. stats_of(provider) picks the latency history the
+        hedge delay is derived from; discard(result) releases results of providers
+        that finished together with the winner.
+        """
+        loop = asyncio.get_running_loop()
+        pending: Dict[asyncio.Task, Tuple[Provider, float]] = {}
+        remaining = list(self.providers)
+        last_error: Optional[BaseException] = None
+
+        def launch():
+            provider = remaining.pop(0)
+            pending[asyncio.create_task(start(provider))] = (provider, time.perf_counter())
+            return provider
+
+        try:
+            current = launch()
+            while pending:
+                now = loop.time()
+                if now >= deadline_at:
+                    break
+                timeout = deadline_at - now
+                if remaining:
+                    timeout = min(timeout, self.hedge_delay(current, stats_of(current)))
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+                if not done:
+                    if remaining and loop.time() < deadline_at:
+                        self.hedges += 1
+                        logger.info(f"{current.name} is slow, hedging with {remaining[0].name}")
+                        current = launch()
+                    continue
+
+                winner = None
+                for task in done:
+                    provider, started = pending.pop(task)
+                    if task.exception() is None:
+                        stats_of(provider).record(time.perf_counter() - started)
+                        if winner is None:
+                            winner = provider, task.result()
+                        elif discard is not None:
+                            await discard(task.result())
+                        continue
+                    provider.errors += 1
+                    last_error = task.exception()
+                    logger.error(f"LLM provider {provider.name} failed: {last_error}")
+                if winner is not None:
+                    winner[0].wins += 1
+                    # Losers took at least this long; without these samples a
+                    # slow primary would never move its own hedge delay
+                    for other, other_started in pending.values():
+                        stats_of(other).record(time.perf_counter() - other_started)
+                    return winner
+                # Fail over without waiting for the hedge delay
+                if not pending and remaining:
+                    current = launch()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if last_error is not None and not remaining and loop.time() < deadline_at:
+            raise last_error
+        self.deadline_errors += 1
+        raise LLMDeadlineError(f"No LLM provider answered within {self.deadline}s")
+
+    async def ainvoke(self, prompt, **kwargs):
+        _, response = await self._race(
+            lambda provider: provider.model.ainvoke(prompt, **kwargs),
+            lambda provider: provider.latency,
+            asyncio.get_running_loop().time() + self.deadline,
+        )
+        return response
+
+    async def astream(self, prompt, **kwargs) -> AsyncIterator:
+        """Hedges on time to first chunk, then streams the winner to the end or the deadline"""
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + self.deadline
+
+        async def first_chunk(provider: Provider):
+            stream = provider.model.astream(prompt, **kwargs).__aiter__()
+            return stream, await stream.__anext__()
+
+        async def close(result):
+            await result[0].aclose()
+
+        _, (stream, chunk) = await self._race(first_chunk, lambda provider: provider.first_chunk, deadline_at, close)
+        try:
+            yield chunk
+            while True:
+                try:
+                    chunk = await asyncio.wait_for(stream.__anext__(), max(0.0, deadline_at - loop.time()))
+                except StopAsyncIteration:
+                    return
+                except asyncio.TimeoutError:
+                    self.deadline_errors += 1
+                    raise LLMDeadlineError(f"LLM stream didn't finish within {self.deadline}s")
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hedges": self.hedges,
+            "deadline_errors": self.deadline_errors,
+            "providers": {provider.name: provider.stats() for provider in self.providers},
+        }
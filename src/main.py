@@ -1,26 +1,40 @@
 from contextlib import asynccontextmanager
+import hmac
 import os
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI, Header, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 import asyncio
 from dotenv import load_dotenv
 from .brave import search_brave
 from .letterboxd import Letterboxd
-from .extractor import MovieExtractor
 from .reddit import RedditPost, RedditResult
 from .search_query import build_letterboxd_search_query, build_reddit_search_query
-from .qdrant import embed_text, find_similar_by_embedding, find_similar_by_plot
+from .qdrant import embed_text, find_similar_by_embedding, find_similar_by_plot, title_vector_cache
+from .qdrant_schema import NORMALIZED_TITLE_FIELD, check_normalized_titles, ensure_payload_indexes
+from .vector_index import load_plot_index
 from .query import CypherQueryGenerator, MovieEntities
-from .entity import EntityExtractorAgent
-from .neo4j import process_result
+from .llm_client_singleton import LLMClientSingleton
+from .neo4j import DETAIL_QUERIES, MOVIES_BY_IDS_QUERY, MOVIES_BY_TITLES_QUERY, process_result
+from .neo4j_schema import QueryPlanError, check_query_plans, ensure_schema, sync_normalized_properties
+from .catalog import load_catalog
+from .graph_index import build_graph_index, get_graph_index
+from .title_resolver import build_title_resolver, get_title_resolver
+from .genre_year_index import build_genre_year_index, get_genre_year_index
+from .title_extractor import build_title_extractor
 from neo4j import AsyncGraphDatabase
 from .config import settings
-from typing import List, Optional
+from typing import Dict, List, Optional
 import logging
 load_dotenv()
 import json
 from .qdrant_client_singleton import QdrantClientSingleton
+from .cache import LRUCache
+from .entity_cache import EntityCache
+from .rule_parser import RuleBasedParser
+from .multiplexer import multiplex
+from .speculation import CYPHER_FIELDS, SEARCH_FIELDS, SIMILARITY_FIELDS, SpeculativeBranch, complete_fields
+from .jina_client_singleton import JinaClientSingleton
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,8 +45,45 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Query templates are compiled once per process
+query_generator = CypherQueryGenerator()
+# Processed movie documents by ID for the detail endpoints
+movie_cache = LRUCache(settings.MOVIE_CACHE_SIZE, ttl=settings.MOVIE_CACHE_TTL)
+# Local fast path for simple queries, ahead of the LLM extractor
+rule_parser = RuleBasedParser()
+# Extracted entities for repeat and near-duplicate queries
+entity_cache = EntityCache(
+    embed_text,
+    maxsize=settings.ENTITY_CACHE_SIZE,
+    ttl=settings.ENTITY_CACHE_TTL,
+    similarity_threshold=settings.ENTITY_CACHE_SIMILARITY,
+    embed_timeout=settings.ENTITY_CACHE_EMBED_TIMEOUT,
+)
+
 async def get_qdrant_client():
     return await QdrantClientSingleton.get_instance()
+
+async def init_qdrant():
+    client = await get_qdrant_client()
+    if client is None:
+        return
+    try:
+        await ensure_payload_indexes(client)
+        if not await check_normalized_titles(client):
+            logger.warning(
+                f"Some movies_plot points have no {NORMALIZED_TITLE_FIELD} yet, title lookups use full-text "
+                "matching until 'python -m src.qdrant_schema' has run and the API restarts"
+            )
+    except Exception as e:
+        logger.error(f"Failed to ensure Qdrant payload indexes: {e}")
+    if settings.VECTOR_SEARCH_MODE in ("embedded", "quantized", "prefix"):
+        await asyncio.to_thread(
+            load_plot_index,
+            settings.VECTOR_SNAPSHOT_DIR,
+            quantized=settings.VECTOR_SEARCH_MODE == "quantized",
+            rescore=settings.VECTOR_RESCORE_CANDIDATES,
+            prefix_dims=settings.VECTOR_PREFIX_DIMS if settings.VECTOR_SEARCH_MODE == "prefix" else None,
+        )
 # Initialize Neo4j driver with connection validation
 
 async def init_neo4j():
@@ -60,16 +111,66 @@ async def init_neo4j():
         return False
     
 
+async def init_neo4j_schema():
+    try:
+        await ensure_schema(neo4j)
+    except Exception as e:
+        logger.error(f"Failed to ensure Neo4j schema: {e}")
+    # Warming doubles as the plan check for every generated query shape
+    offenders = await query_generator.warm_plan_cache(neo4j)
+    offenders += await check_query_plans(neo4j, DETAIL_QUERIES)
+    if offenders and settings.NEO4J_FAIL_ON_ALL_NODES_SCAN:
+        raise QueryPlanError(f"{len(offenders)} queries can't be planned or fall back to AllNodesScan: {offenders}")
+
+async def refresh_catalog_indexes():
+    """Rebuild the in-memory indexes over the Movie catalog; the old ones keep serving on failure"""
+    memory = settings.SIMILARITY_MODE == "memory"
+    genre_year = settings.GENRE_YEAR_INDEX_ENABLED
+    if not (memory or genre_year or settings.TITLE_RESOLVER_ENABLED or settings.LOCAL_TITLE_EXTRACTION):
+        return
+    try:
+        catalog = await load_catalog(neo4j, genres=memory or genre_year, people=memory)
+        if settings.TITLE_RESOLVER_ENABLED:
+            await asyncio.to_thread(build_title_resolver, catalog)
+        if memory:
+            await asyncio.to_thread(build_graph_index, catalog)
+        if genre_year:
+            await asyncio.to_thread(build_genre_year_index, catalog)
+        if settings.LOCAL_TITLE_EXTRACTION:
+            await asyncio.to_thread(build_title_extractor, catalog)
+    except Exception as e:
+        logger.error(f"Failed to refresh catalog indexes: {e}")
+
+async def refresh_catalog_indexes_periodically():
+    while True:
+        await asyncio.sleep(settings.CATALOG_REFRESH_SECONDS)
+        if neo4j:
+            try:
+                await sync_normalized_properties(neo4j)
+            except Exception as e:
+                logger.error(f"Failed to sync normalized properties: {e}")
+            await refresh_catalog_indexes()
+
 # Initialize at startup
 @app.on_event("startup")
 async def startup_event():
-    await init_neo4j()
-    await get_qdrant_client()
+    if await init_neo4j():
+        await init_neo4j_schema()
+        await refresh_catalog_indexes()
+        if settings.CATALOG_REFRESH_SECONDS > 0:
+            asyncio.create_task(refresh_catalog_indexes_periodically())
+    await init_qdrant()
+    await JinaClientSingleton.get_batcher()
+    await JinaClientSingleton.get_cache()
+    await LLMClientSingleton.get_entity_extractor()
+    await LLMClientSingleton.get_movie_extractor()
 @app.on_event("shutdown")
 async def shutdown_event():
     if neo4j:
         await neo4j.close()
     await QdrantClientSingleton.close()
+    await JinaClientSingleton.close()
+    await LLMClientSingleton.close()
 
 # Configure CORS
 app.add_middleware(
@@ -88,6 +189,19 @@ async def root():
 async def health():
     return {"status": "ok"}
 
+@app.get("/metrics")
+async def metrics():
+    batcher = await JinaClientSingleton.get_batcher()
+    embedding_cache = await JinaClientSingleton.get_cache()
+    return {
+        "embedding_batcher": batcher.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "title_vector_cache": title_vector_cache.stats(),
+        "movie_cache": movie_cache.stats(),
+        "entity_cache": entity_cache.stats(),
+        "llm": LLMClientSingleton.stats(),
+    }
+
 
 
 @app.get("/stream-response-summary")
@@ -121,6 +235,22 @@ async def stream_response_summary(
         }
     )
     
+async def live_similarity_fallback(session, entities: MovieEntities, movie_ids: Optional[List[int]] = None,
+                                   unresolved: Optional[List[str]] = None) -> Optional[List[Dict]]:
+    """
+    Records from live similarity scoring for an empty precomputed result, but
+    only when none of the reference movies has SIMILAR_TO neighbours yet;
+    None when they do and the filters simply left nothing.
+    """
+    probe, probe_params = query_generator.neighbours_probe(entities, movie_ids, unresolved)
+    result = await session.run(probe, probe_params)
+    record = await result.single()
+    if record is not None and record["has_neighbours"]:
+        return None
+    cypher_query, cypher_params = query_generator.generate_query_manually(entities, movie_ids=movie_ids, unresolved=unresolved)
+    result = await session.run(cypher_query, cypher_params)
+    return await result.data()
+
 @app.get("/stream-response")
 async def stream_response(
     query: str,
@@ -146,13 +276,34 @@ async def stream_response(
             # Initialize entity extractor
             yield "data: Initializing entity extractor agent...\n\n"
             
-            entity_extractor = EntityExtractorAgent()
+            entity_extractor = await LLMClientSingleton.get_entity_extractor()
             
             # Define async functions for each process
             
             async def process_entity_extraction():
                 yield "data: Analyzing query for movie references and parameters...\n\n"
-                entities = await entity_extractor.extract_entities(query,min_year,max_year,genres)
+                entities = None
+                if settings.RULE_PARSER_ENABLED:
+                    parsed, confidence = rule_parser.parse(query, min_year, max_year, genres)
+                    if confidence >= settings.RULE_PARSER_MIN_CONFIDENCE:
+                        entities = parsed
+                        yield f"data: Parsed query locally with confidence {confidence:.2f}...\n\n"
+                if entities is None:
+                    if settings.SPECULATIVE_PIPELINE:
+                        # Partial results let the branches below start before the LLM is done
+                        extractor = lambda: entity_extractor.stream_entities(query,min_year,max_year,genres)
+                    else:
+                        async def extractor():
+                            yield ("result", await entity_extractor.extract_entities(query,min_year,max_year,genres))
+                    # The cache's semantic lookup races the LLM rather than delaying it
+                    async for message in entity_cache.extract(query, extractor, min_year, max_year, genres):
+                        if message[0] == "cached":
+                            entities = message[1]
+                            yield "data: Reusing entities extracted for an earlier matching query...\n\n"
+                        elif message[0] == "result":
+                            entities = message[1]
+                        else:
+                            yield message
                 yield f"data: Entity extraction complete. Found entities: {entities}\n\n"
                 yield f"data:xx--data--entities--{json.dumps(entities.model_dump())}\n\n"
                 yield ("result", entities)
@@ -222,44 +373,71 @@ async def stream_response(
                     return
                 
                 links = reddit_links[0:min(len(reddit_links), 3)]
-                reddit_results:List[RedditResult] = []
-                
-                # Create tasks for processing each Reddit link in parallel
-                reddit_tasks = []
                 for link in links:
                     yield f"data:Searching in {link}...\n\n"
-                    
-                    # Define as a regular async function, not an async generator
-                    async def process_single_reddit_link(link_url):
-                        post = RedditPost(link_url)
-                        comments = post.get_comments()
-                        movie_extractor = MovieExtractor()
-                        movies = await asyncio.to_thread(movie_extractor.extract_movies, comments)
-                        return RedditResult(movies=movies.movies, site_url=link_url)
-                    
-                    reddit_tasks.append(process_single_reddit_link(link))
-                
-                # Process all Reddit links concurrently
-                if reddit_tasks:
-                    for task in asyncio.as_completed(reddit_tasks):
-                        result_data = await task
-                        reddit_results.append(result_data)
+
+                def fetch_comments(link_url):
+                    return RedditPost(link_url).get_comments()
+
+                # Fetch every thread concurrently, then extract movies from all of them in one LLM call
+                fetched = await asyncio.gather(*[asyncio.to_thread(fetch_comments, link) for link in links], return_exceptions=True)
+                threads = {}
+                for link, comments in zip(links, fetched):
+                    if isinstance(comments, Exception):
+                        yield f"data: Could not read {link}: {comments}\n\n"
+                    else:
+                        threads[link] = comments
+
+                reddit_results: List[RedditResult] = []
+                if threads:
+                    movie_extractor = await LLMClientSingleton.get_movie_extractor()
+                    movies_by_link = await movie_extractor.aextract_movies_batch(threads)
+                    reddit_results = [RedditResult(movies=movies, site_url=link) for link, movies in movies_by_link.items()]
 
                 yield f"data:xx--data--reddit_results--{json.dumps([x.model_dump() for x in reddit_results if x is not None])}\n\n"
             
             async def process_cypher_query(entities:MovieEntities):
+                llm_suggested = [x.lower() for x in entities.movie if x is not None] if entities.movies_present ==False and entities.movie is not None else []
+                movie_ids = None
+                unresolved = None
+                title_resolver = get_title_resolver()
+                if title_resolver is not None and entities.movie:
+                    resolved = title_resolver.resolve_many(entities.movie, settings.TITLE_MATCH_MIN_SCORE)
+                    matches = [m for m in resolved if m]
+                    if matches:
+                        movie_ids = list(dict.fromkeys(m.id for m in matches))
+                        # Titles the resolver couldn't place keep the title matching
+                        unresolved = [title for title, match in zip(entities.movie, resolved) if match is None]
+                        yield f"data: Resolved reference movies: {json.dumps([m.title for m in matches])}\n\n"
+
+                graph_index = get_graph_index() if settings.SIMILARITY_MODE == "memory" and entities.movie else None
+                if graph_index is not None:
+                    # Same scoring as the similarity queries, without a database round-trip
+                    yield "data: Scoring similar movies against the in-memory graph...\n\n"
+                    refs = graph_index.reference_positions(unresolved, movie_ids) if movie_ids else None
+                    records = [{"title": title} for _, title in await asyncio.to_thread(graph_index.similar, entities, 10, refs)]
+                    yield f"data:xx--data--related_movies--{json.dumps(llm_suggested + [x['title'].lower() for x in records])}\n\n"
+                    yield ("result", records)
+                    return
+
+                genre_year_index = get_genre_year_index()
+                if genre_year_index is not None and genre_year_index.can_answer(entities):
+                    # Genre/year-only queries are served most popular first from the buckets
+                    yield "data: Looking up the most popular matches in the genre/year index...\n\n"
+                    records = [{"title": title} for title in genre_year_index.top(entities)]
+                    yield f"data:xx--data--related_movies--{json.dumps(llm_suggested + [x['title'].lower() for x in records])}\n\n"
+                    yield ("result", records)
+                    return
+
                 yield "data: Starting Cypher query generation...\n\n"
-                yield "data: Initializing query generator...\n\n"
-                
-                query_generator = CypherQueryGenerator()
-                # Run query generation in a thread if it's CPU-intensive
-                cypher_query = await asyncio.to_thread(query_generator.generate_query_manually, entities)
+                precomputed = settings.SIMILARITY_MODE == "precomputed" and bool(entities.movie)
+                cypher_query, cypher_params = query_generator.generate_query_manually(entities, precomputed=precomputed, movie_ids=movie_ids, unresolved=unresolved)
                 
                 yield "data: Query generation complete\n\n"
                 
                 # Format the Cypher query to be SSE-friendly
                 formatted_query = cypher_query.replace('\n', ' ').replace('\r', ' ')
-                yield f"data: Generated Cypher query: {formatted_query}\n\n"
+                yield f"data: Generated Cypher query: {formatted_query} with parameters {json.dumps(cypher_params)}\n\n"
                 
                 # Neo4j query execution
                 yield "data: Initiating connection to Neo4j database...\n\n"
@@ -276,12 +454,17 @@ async def stream_response(
                     yield "data: Executing Cypher query...\n\n"
                     async with neo4j.session() as session:
                         yield "data: Database session established\n\n"
-                        result = await session.run(cypher_query)
+                        result = await session.run(cypher_query, cypher_params)
                         yield "data: Query executed, fetching results...\n\n"
                         records = await result.data()
+
+                        if precomputed and not records:
+                            live_records = await live_similarity_fallback(session, entities, movie_ids, unresolved)
+                            if live_records is not None:
+                                yield "data: No precomputed neighbours found, falling back to live similarity scoring...\n\n"
+                                records = live_records
                     
                     yield "data: Successfully retrieved results from database\n\n"
-                    llm_suggested = [x.lower() for x in entities.movie if x is not None] if entities.movies_present ==False and entities.movie is not None else []
                     yield f"data:xx--data--related_movies--{json.dumps(llm_suggested + [x['title'].lower() for x in records if x is not None])}\n\n"
                     yield ("result", records)
                 except Exception as e:
@@ -290,54 +473,45 @@ async def stream_response(
                     yield "data: Could not complete database operation. Continuing with other processes.\n\n"
                     yield ("result", [])
             
-            # First, extract entities (we need this for other processes)
-            entities_generator = process_entity_extraction()
-            entities_result = None
-            async for message in entities_generator:
-                if isinstance(message, tuple) and message[0] == "result":
-                    entities_result = message[1]
-                else:
-                    yield message
-            
-            if entities_result is None:
-                yield "data: Failed to extract entities from query\n\n"
-                return
-                
-            entities = entities_result
-            
-            # Helper function to drain a generator and capture its yield values
-            async def self_drain_generator(generator):
-                messages = []
-                result = None
-                async for message in generator:
-                    if isinstance(message, tuple) and message[0] == "result":
-                        result = message[1]
-                    else:
-                        messages.append(message)
-                return messages, result
-            
-            # Create the generators but don't start them yet
-            similarity_generator = process_movie_similarity(entities)
-            reddit_generator = process_reddit_search(entities)
-            cypher_generator = process_cypher_query(entities)
-            letterboxd_generator = process_letterboxd_search(entities)
-            # Run all generators concurrently
-            tasks = [
-                asyncio.create_task(self_drain_generator(similarity_generator)),
-                asyncio.create_task(self_drain_generator(cypher_generator)),
+            # Each branch starts as soon as the entity fields it reads are known
+            branches = [
+                SpeculativeBranch("similarity", SIMILARITY_FIELDS, process_movie_similarity),
+                SpeculativeBranch("cypher", CYPHER_FIELDS, process_cypher_query),
             ]
             if reddit:
-                tasks.append(asyncio.create_task(self_drain_generator(reddit_generator)))
+                branches.append(SpeculativeBranch("reddit", SEARCH_FIELDS, process_reddit_search))
             if letterboxd:
-                tasks.append(asyncio.create_task(self_drain_generator(letterboxd_generator)))
-            results = []
-            # Wait for all tasks to complete and yield their messages in the order they complete
-            for completed_task in asyncio.as_completed(tasks):
-                messages, result = await completed_task
-                for message in messages:
+                branches.append(SpeculativeBranch("letterboxd", SEARCH_FIELDS, process_letterboxd_search))
+
+            try:
+                # First, extract entities (we need this for other processes)
+                entities_generator = process_entity_extraction()
+                entities_result = None
+                async for message in entities_generator:
+                    if isinstance(message, tuple) and message[0] == "result":
+                        entities_result = message[1]
+                    elif isinstance(message, tuple) and message[0] == "partial":
+                        complete = complete_fields(message[1])
+                        for branch in branches:
+                            if branch.maybe_start(message[1], complete):
+                                yield f"data: Speculatively started {branch.name} search...\n\n"
+                    else:
+                        yield message
+
+                if entities_result is None:
+                    yield "data: Failed to extract entities from query\n\n"
+                    return
+
+                entities = entities_result
+
+                # Keep speculative runs that saw the final values, restart the rest
+                streams = [branch.reconcile(entities) for branch in branches]
+                # Interleave all branches, each message goes out as soon as it's yielded
+                async for message in multiplex(streams):
                     yield message
-                if result is not None:
-                    results.append(result)
+            finally:
+                for branch in branches:
+                    branch.cancel()
                 
         except Exception as e:
             yield f"data: Error occurred: {str(e)}\n\n"
@@ -353,121 +527,138 @@ async def stream_response(
         }
     )
 
+async def fetch_movies_by_ids(ids: List[int]) -> Dict[int, dict]:
+    """
+    Processed movie documents for the given IDs, read through movie_cache.
+    Only the IDs that miss are fetched, with a single UNWIND query.
+    """
+    movies = {}
+    missing = []
+    for movie_id in dict.fromkeys(ids):
+        movie = movie_cache.get(movie_id)
+        if movie is None:
+            missing.append(movie_id)
+        else:
+            movies[movie_id] = movie
+
+    if missing:
+        async with neo4j.session() as session:
+            result = await session.run(MOVIES_BY_IDS_QUERY, {"ids": missing})
+            records = await result.data()
+
+        for record in records:
+            movie = process_result(record)
+            movies[movie["id"]] = movie
+            movie_cache.set(movie["id"], movie)
+
+    return movies
+
 @app.get("/{id}")
 async def get_movie(id: int):
     if not neo4j:
         if not await init_neo4j():
             return {"error": "Database connection not available"}
 
-    cypher_query = """
-        MATCH (target {id: $id})
-        OPTIONAL MATCH (target)-[r]-(connected)
-        RETURN 
-            target { .* } AS target,
-            COLLECT({
-                relationship: TYPE(r),
-                direction: CASE WHEN startNode(r) = target THEN 'OUTGOING' ELSE 'INCOMING' END,
-                connected: connected { .* }
-            }) AS connections
-    """
-
     try:
-        async with neo4j.session() as session:
-            result = await session.run(cypher_query, {"id": id})
-            records = await result.data()
+        movies = await fetch_movies_by_ids([id])
 
-        if len(records) != 1:
+        if id not in movies:
             return {"message": "No movie found"}
 
-        return process_result(records[0])
+        return movies[id]
     except Exception as e:
         logger.error(f"Error retrieving movie with ID {id}: {e}")
         return {"error": f"Database error: {str(e)}"}
 
+async def stream_movies(ids: Optional[List[int]] = None, titles: Optional[List[str]] = None):
+    """
+    NDJSON lines of processed movies. The input is split into UNWIND chunks of
+    BATCH_STREAM_CHUNK_SIZE and each record is written as soon as the driver's
+    cursor yields it, so memory stays bounded by the chunk, not the request.
+    Within a chunk, cached movies come first.
+    """
+    values = ids if ids is not None else titles
+    chunk_size = settings.BATCH_STREAM_CHUNK_SIZE
+    try:
+        async with neo4j.session() as session:
+            for start in range(0, len(values), chunk_size):
+                chunk = list(dict.fromkeys(values[start:start + chunk_size]))
+                if ids is not None:
+                    missing = []
+                    for movie_id in chunk:
+                        movie = movie_cache.get(movie_id)
+                        if movie is None:
+                            missing.append(movie_id)
+                        else:
+                            yield json.dumps(movie, default=str) + "\n"
+                    if not missing:
+                        continue
+                    result = await session.run(MOVIES_BY_IDS_QUERY, {"ids": missing})
+                else:
+                    result = await session.run(MOVIES_BY_TITLES_QUERY, {"titles": chunk})
+
+                async for record in result:
+                    movie = process_result(record)
+                    if ids is not None:
+                        movie_cache.set(movie["id"], movie)
+                    yield json.dumps(movie, default=str) + "\n"
+    except Exception as e:
+        logger.error(f"Error streaming movies: {e}")
+        yield json.dumps({"error": f"Database error: {str(e)}"}) + "\n"
+
 @app.post("/movies/batch-by-ids")
-async def get_movies(ids: List[int]):
+async def get_movies(ids: List[int], stream: bool = False):
     if not neo4j:
         if not await init_neo4j():
             return {"error": "Database connection not available"}
-            
-    cypher_query = """
-        UNWIND $ids as id
-        MATCH (target {id: id})
-        OPTIONAL MATCH (target)-[r]-(connected)
-        RETURN 
-            target { .* } AS target,
-            COLLECT({
-                relationship: TYPE(r),
-                direction: CASE WHEN startNode(r) = target THEN 'OUTGOING' ELSE 'INCOMING' END,
-                connected: connected { .* }
-            }) AS connections
-    """
+
+    if stream:
+        return StreamingResponse(stream_movies(ids=ids), media_type="application/x-ndjson")
 
     try:
-        async with neo4j.session() as session:
-            result = await session.run(cypher_query, {"ids": ids})
-            records = await result.data()
+        movies = await fetch_movies_by_ids(ids)
 
-        if not records:
+        if not movies:
             return {"message": "No movies found"}
         
-        tasks = [asyncio.to_thread(process_result, record) for record in records]
-        processed_results = await asyncio.gather(*tasks)
-        return processed_results
+        # Results follow the request order
+        return [movies[movie_id] for movie_id in dict.fromkeys(ids) if movie_id in movies]
     except Exception as e:
         logger.error(f"Error retrieving movies with IDs {ids}: {e}")
         return {"error": f"Database error: {str(e)}"}
 
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Admin routes are disabled unless ADMIN_TOKEN is set and sent as X-Admin-Token"""
+    if not settings.ADMIN_TOKEN or not hmac.compare_digest(x_admin_token or "", settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.post("/movies/cache/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_movies(ids: Optional[List[int]] = None, invalidate_all: bool = Query(False, alias="all")):
+    """Drop the given movie IDs from the detail cache; clearing everything needs all=true"""
+    if invalidate_all:
+        movie_cache.clear()
+        return {"invalidated": "all"}
+    if not ids:
+        return {"error": "Pass the movie IDs to invalidate, or all=true"}
+    for movie_id in ids:
+        movie_cache.pop(movie_id)
+    return {"invalidated": len(ids)}
+
 @app.post("/movies/batch-by-title")
-async def get_movies(title: List[str]):
+async def get_movies(title: List[str], stream: bool = False):
     if not neo4j:
         if not await init_neo4j():
             return {"error": "Database connection not available"}
-            
-    # Modified query to use exact matches only
-    cypher_query = """
-        UNWIND $titles as search_title
-        MATCH (target)
-        WHERE target.title = search_title
-        OPTIONAL MATCH (target)-[r]-(connected)
-        RETURN 
-            target { .* } AS target,
-            COLLECT({
-                relationship: TYPE(r),
-                direction: CASE WHEN startNode(r) = target THEN 'OUTGOING' ELSE 'INCOMING' END,
-                connected: connected { .* }
-            }) AS connections
-    """
+
+    if stream:
+        return StreamingResponse(stream_movies(titles=title), media_type="application/x-ndjson")
 
     try:
         async with neo4j.session() as session:
-            result = await session.run(cypher_query, {"titles": title})
+            result = await session.run(MOVIES_BY_TITLES_QUERY, {"titles": title})
             records = await result.data()
 
-        if not records:
-            return []
-        
-        processed_results = []
-        failed_titles = []
-        
-        async def process_record_safely(record):
-            try:
-                return await asyncio.to_thread(process_result, record)
-            except Exception as e:
-                logger.error(f"Failed to process record: {e}")
-                if 'target' in record and 'title' in record['target']:
-                    failed_titles.append(record['target']['title'])
-                return None
-        
-        tasks = [process_record_safely(record) for record in records]
-        results = await asyncio.gather(*tasks)
-        
-        # Filter out None values (failed processing)
-        processed_results = [r for r in results if r is not None]
-        
-            
-        return processed_results
-        
+        return [process_result(record) for record in records]
     except Exception as e:
         logger.error(f"Error retrieving movies with titles {title}: {e}")
         return {"error": f"Database error: {str(e)}"}
@@ -0,0 +1,59 @@
+import asyncio
+from typing import Any, AsyncIterator, Iterable, Optional
+
+# Marks the end of a branch's messages
+_DONE = object()
+
+
+class BranchStream:
+    """
+    Runs a sub-pipeline generator in its own task and queues its messages as
+    they're yielded. ("result", value) tuples are kept aside in result, the
+    way the pipelines report their final value.
+    """
+
+    def __init__(self, generator: AsyncIterator):
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.task = asyncio.create_task(self._pump(generator))
+
+    async def _pump(self, generator: AsyncIterator):
+        try:
+            async for message in generator:
+                if isinstance(message, tuple) and message[0] == "result":
+                    self.result = message[1]
+                else:
+                    self.queue.put_nowait(message)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.queue.put_nowait(_DONE)
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+
+
+async def multiplex(streams: Iterable[BranchStream]) -> AsyncIterator:
+    """
+    Fan-in of several branches: every message is yielded as soon as its branch
+    produces it, in order within each branch. A branch's exception is raised
+    once its earlier messages have been yielded.
+    """
+    getters = {asyncio.create_task(stream.queue.get()): stream for stream in streams}
+    try:
+        while getters:
+            done, _ = await asyncio.wait(getters, return_when=asyncio.FIRST_COMPLETED)
+            for getter in done:
+                stream = getters.pop(getter)
+                message = getter.result()
+                if message is _DONE:
+                    if stream.error is not None:
+                        raise stream.error
+                    continue
+                yield message
+                getters[asyncio.create_task(stream.queue.get())] = stream
+    finally:
+        for getter in getters:
+            getter.cancel()
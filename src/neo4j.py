@@ -1,28 +1,37 @@
 from typing import Dict, Any
+from .neo4j_schema import NORMALIZED_PROPERTIES
 
-def process_result(result:Dict[str,Any]):
-    target = result.get("target", {})
-    connections = result.get("connections", [])
-     
-    # Use list comprehensions for better performance
-    actors = [conn["connected"]["name"] for conn in connections 
-              if conn.get("direction") == "OUTGOING" and conn.get("relationship") == "ACTED_IN"]
-    
-    directors = [conn["connected"]["name"] for conn in connections 
-                if conn.get("direction") == "OUTGOING" and conn.get("relationship") == "DIRECTED_BY"]
-    
-    genres = [conn["connected"]["name"] for conn in connections 
-             if conn.get("direction") == "OUTGOING" and conn.get("relationship") == "HAS_GENRE"]
-    
-    # Use next() with generator expression for year lookup
-    year = next((conn["connected"]["year"] for conn in connections 
-                 if conn.get("direction") == "OUTGOING" and conn.get("relationship") == "RELEASED_IN"), None)
-    
-    return {
-        **target,
-        "actors": actors,
-        "directors": directors,
-        "genres": genres,
-        "year": year
-    }
+# Lookup-only helper properties that shouldn't leak into API responses
+HIDDEN_PROPERTIES = {target for _, target in NORMALIZED_PROPERTIES.values()}
+
+# The final document shape is built server-side, so only these properties cross the wire
+MOVIE_PROJECTION = """
+    target {
+        .*,
+        actors: [(target)-[:ACTED_IN]->(actor) | actor.name],
+        directors: [(target)-[:DIRECTED_BY]->(director) | director.name],
+        genres: [(target)-[:HAS_GENRE]->(genre) | genre.name],
+        year: head([(target)-[:RELEASED_IN]->(released) | released.year])
+    } AS movie
+"""
+
+MOVIES_BY_IDS_QUERY = """
+    UNWIND $ids as id
+    MATCH (target:Movie {id: id})
+    RETURN""" + MOVIE_PROJECTION
 
+# Exact matches only
+MOVIES_BY_TITLES_QUERY = """
+    UNWIND $titles as search_title
+    MATCH (target:Movie)
+    WHERE target.title = search_title
+    RETURN""" + MOVIE_PROJECTION
+
+# (name, query, representative params) for plan checks at startup
+DETAIL_QUERIES = [
+    ("movies_by_ids", MOVIES_BY_IDS_QUERY, {"ids": [1]}),
+    ("movies_by_titles", MOVIES_BY_TITLES_QUERY, {"titles": ["warmup"]}),
+]
+
+def process_result(result:Dict[str,Any]):
+    return {key: value for key, value in result["movie"].items() if key not in HIDDEN_PROPERTIES}
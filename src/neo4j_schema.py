@@ -0,0 +1,99 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lowercased copies of the properties the API matches on; kept in sync at startup
+# and on the catalog refresh schedule
+NORMALIZED_PROPERTIES = {
+    "Movie": ("title", "title_lower"),
+    "Director": ("name", "name_lower"),
+    "Actor": ("name", "name_lower"),
+    "Genre": ("name", "name_lower"),
+}
+
+SCHEMA_STATEMENTS = [
+    "CREATE CONSTRAINT movie_id IF NOT EXISTS FOR (m:Movie) REQUIRE m.id IS UNIQUE",
+    "CREATE RANGE INDEX movie_title IF NOT EXISTS FOR (m:Movie) ON (m.title)",
+    "CREATE TEXT INDEX movie_title_lower IF NOT EXISTS FOR (m:Movie) ON (m.title_lower)",
+    "CREATE TEXT INDEX director_name_lower IF NOT EXISTS FOR (d:Director) ON (d.name_lower)",
+    "CREATE TEXT INDEX actor_name_lower IF NOT EXISTS FOR (a:Actor) ON (a.name_lower)",
+    "CREATE RANGE INDEX genre_name_lower IF NOT EXISTS FOR (g:Genre) ON (g.name_lower)",
+    "CREATE RANGE INDEX year_year IF NOT EXISTS FOR (y:Year) ON (y.year)",
+]
+
+
+class QueryPlanError(Exception):
+    """Raised when a query the API relies on can't be planned or would scan every node"""
+
+
+async def ensure_schema(driver):
+    """Idempotently create constraints and indexes, then backfill normalized properties"""
+    async with driver.session() as session:
+        for statement in SCHEMA_STATEMENTS:
+            try:
+                result = await session.run(statement)
+                await result.consume()
+            except Exception as e:
+                logger.error(f"Failed to apply schema statement '{statement}': {e}")
+
+    await sync_normalized_properties(driver)
+    async with driver.session() as session:
+        result = await session.run("CALL db.awaitIndexes(300)")
+        await result.consume()
+
+
+def normalize_statement(label: str, source: str, target: str) -> str:
+    # Missing copies and copies left stale by an edited title or name alike
+    return (
+        f"MATCH (n:{label}) WHERE n.{source} IS NOT NULL "
+        f"AND (n.{target} IS NULL OR n.{target} <> toLower(n.{source})) "
+        f"CALL {{ WITH n SET n.{target} = toLower(n.{source}) }} IN TRANSACTIONS OF 10000 ROWS"
+    )
+
+
+async def sync_normalized_properties(driver):
+    """Recompute the lowercased lookup properties that are missing or out of date"""
+    async with driver.session() as session:
+        for label, (source, target) in NORMALIZED_PROPERTIES.items():
+            result = await session.run(normalize_statement(label, source, target))
+            summary = await result.consume()
+            updated = summary.counters.properties_set
+            if updated:
+                logger.info(f"Updated {target} on {updated} {label} nodes")
+
+
+def find_operators(plan: Optional[Dict[str, Any]], prefix: str) -> List[str]:
+    """Names of the operators in an EXPLAIN plan tree starting with prefix"""
+    if not plan:
+        return []
+    found = []
+    operator = plan.get("operatorType", "")
+    if operator.startswith(prefix):
+        found.append(operator)
+    for child in plan.get("children", []):
+        found += find_operators(child, prefix)
+    return found
+
+
+async def check_query_plans(driver, queries: Iterable[Tuple[str, str, Dict[str, Any]]]) -> List[str]:
+    """
+    EXPLAIN each (name, query, params) and return the names of the ones
+    that fail to plan or whose plan contains an AllNodesScan. Running
+    EXPLAIN also leaves the plan in Neo4j's cache.
+    """
+    offenders = []
+    async with driver.session() as session:
+        for name, query, params in queries:
+            try:
+                result = await session.run(f"EXPLAIN {query}", params)
+                summary = await result.consume()
+            except Exception as e:
+                logger.error(f"Failed to plan {name}: {e}\n{query}")
+                offenders.append(name)
+                continue
+            if find_operators(summary.plan, "AllNodesScan"):
+                logger.error(f"Query plan for {name} falls back to AllNodesScan:\n{query}")
+                offenders.append(name)
+    return offenders
+
@@ -1,17 +1,24 @@
 from qdrant_client import  models
-import os
 import asyncio
 from typing import List
 import numpy as np
 from .entity import MovieEntities
 from .qdrant_client_singleton import QdrantClientSingleton
+from .jina_client_singleton import JinaClientSingleton
+from .qdrant_schema import NORMALIZED_TITLE_FIELD, normalized_titles_ready
+from .cache import LRUCache
+from .text import normalize_text
+from .config import settings
+from .vector_index import get_plot_index
+from .title_resolver import get_title_resolver
+
+# Process-local normalized title -> plot vector cache for reference movie lookups
+title_vector_cache = LRUCache(settings.TITLE_VECTOR_CACHE_SIZE)
 
 
 async def get_movie_by_title(title: str):
-        # Use asyncio.to_thread to make the synchronous Qdrant operation non-blocking
     client = await QdrantClientSingleton.get_instance()
-    reference_movie = await asyncio.to_thread(
-            client.scroll,
+    reference_movie = await client.scroll(
             collection_name="movies_plot",
             scroll_filter=models.Filter(
                 must=[
@@ -29,16 +36,65 @@ async def get_movie_by_title(title: str):
 
 
 async def get_movie_vectors(titles: List[str]):
-    # Use gather to fetch all movie vectors in parallel
-    tasks = [get_movie_by_title(title) for title in titles]
-    results = await asyncio.gather(*tasks)
-    
-    vectors = []
-    for result in results:
-        if result[0] and len(result[0]) > 0:
-            vectors.append(result[0][0].vector)
-    
-    return vectors
+    """
+    Resolve reference titles to plot vectors in title order.
+    Cached titles cost nothing, the rest are fetched in one batched request with
+    an exact match on the indexed normalized title per title; titles without an
+    exact match fall back to a full-text match each. Until the normalized titles
+    are backfilled only the full-text matches run.
+    """
+    keys = [normalize_text(title) for title in titles]
+    found = {key: title_vector_cache.get(key) for key in dict.fromkeys(keys)}
+    missing = [key for key, vector in found.items() if vector is None]
+
+    if missing:
+        client = await QdrantClientSingleton.get_instance()
+        if normalized_titles_ready():
+            # One request per title, so remakes and duplicates of one title can't crowd out the others
+            responses = await client.query_batch_points(
+                collection_name="movies_plot",
+                requests=[
+                    models.QueryRequest(
+                        filter=models.Filter(
+                            must=[
+                                models.FieldCondition(
+                                    key=NORMALIZED_TITLE_FIELD,
+                                    match=models.MatchValue(value=key)
+                                )
+                            ]
+                        ),
+                        limit=1,
+                        with_payload=False,
+                        with_vector=True,
+                    )
+                    for key in missing
+                ],
+            )
+            for key, response in zip(missing, responses):
+                if response.points:
+                    found[key] = response.points[0].vector
+
+        unmatched = [key for key in missing if found[key] is None]
+        if unmatched:
+            results = await asyncio.gather(*[get_movie_by_title(key) for key in unmatched])
+            for key, result in zip(unmatched, results):
+                if result[0] and len(result[0]) > 0:
+                    found[key] = result[0][0].vector
+
+        for key in missing:
+            if found[key] is not None:
+                title_vector_cache.set(key, found[key])
+
+    return [found[key] for key in keys if found[key] is not None]
+
+
+def canonical_titles(titles: List[str]) -> List[str]:
+    """Swap misspelled or partial titles for the catalog title they resolve to"""
+    resolver = get_title_resolver()
+    if resolver is None:
+        return titles
+    matches = resolver.resolve_many(titles, settings.TITLE_MATCH_MIN_SCORE)
+    return [match.title if match else title for title, match in zip(titles, matches)]
 
 
 def average_vectors(vectors: List[np.ndarray]) -> np.ndarray:
@@ -54,11 +110,13 @@ async def find_similar_by_embedding(embedding: List[float], top_k: int = 10) ->
     """
     Find similar movies by embedding
     """
+    plot_index = get_plot_index()
+    if plot_index is not None:
+        # The matrix-vector product releases the GIL, keep it off the event loop
+        return await asyncio.to_thread(plot_index.search, embedding, top_k, score_threshold=0.5)
 
-        # Use asyncio.to_thread to make the synchronous operation non-blocking
     client = await QdrantClientSingleton.get_instance()
-    results = await asyncio.to_thread(
-            client.search,
+    results = await client.search(
             collection_name="movies_plot",
             query_vector=embedding,
             limit=top_k,
@@ -72,13 +130,28 @@ async def find_similar_by_plot(entities: MovieEntities, top_k: int = 10) -> List
     Find similar movies by averaging plot embeddings of input titles
     Returns list of {title: str, similarity: float}
     """
-    # Get reference movie vectors (already parallelized with the updated get_movie_vectors)
-    vectors = await get_movie_vectors(entities.movie[0:min(len(entities.movie), 10)])
+    # Resolved titles hit the exact normalized-title lookups instead of full-text matching
+    titles = canonical_titles(entities.movie[0:min(len(entities.movie), 10)])
+    excluded = list(dict.fromkeys(entities.movie + titles))
+    plot_index = get_plot_index()
+
+    # Get reference movie vectors, from the embedded snapshot when it has them
+    if plot_index is not None:
+        local_vectors = plot_index.lookup(titles)
+        missing = [title for title, vector in zip(titles, local_vectors) if vector is None]
+        vectors = [vector for vector in local_vectors if vector is not None]
+        if missing:
+            vectors += await get_movie_vectors(missing)
+    else:
+        vectors = await get_movie_vectors(titles)
     if not vectors:
         return []
     # Create average vector
     query_vector = average_vectors(vectors)
 
+    if plot_index is not None:
+        return await asyncio.to_thread(plot_index.search, query_vector, top_k, exclude=excluded)
+
     # Exclude original movies from results
     exclude_filter = models.Filter(
         must_not=[
@@ -86,16 +159,13 @@ async def find_similar_by_plot(entities: MovieEntities, top_k: int = 10) -> List
                 key="title",
                 match=models.MatchText(text=title.lower())
             )
-            for title in entities.movie
+            for title in excluded
         ]
     )
 
     # Search Qdrant
-
-        # Use asyncio.to_thread to make the synchronous operation non-blocking
     client = await QdrantClientSingleton.get_instance()
-    results = await asyncio.to_thread(
-            client.search,
+    results = await client.search(
             collection_name="movies_plot",
             query_vector=query_vector,
             query_filter=exclude_filter,
@@ -107,27 +177,18 @@ async def find_similar_by_plot(entities: MovieEntities, top_k: int = 10) -> List
 
 
 
-import requests 
-jina_api_key = os.getenv("JINA_API_KEY")
-async def embed_text(text:str):
-    url = 'https://api.jina.ai/v1/embeddings'
-    headers = {
-        'Content-Type': 'application/json',
-        'Authorization': f'Bearer {jina_api_key}'
-    }
-    data = {
-        "model": "jina-embeddings-v3",
-        "task": "retrieval.query",
-        "input": [
-            text
-        ]
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-    json = response.json()
-    if "data" in json and len(json["data"]) > 0:
-        return json["data"][0]["embedding"]
-    else:
-        return None
-
-
+async def embed_text(text: str) -> List[float]:
+    """
+    Embed a query with Jina. Repeat queries are served from the embedding cache,
+    misses are coalesced into batched requests.
+    Raises EmbeddingError if no vector could be produced.
+    """
+    cache = await JinaClientSingleton.get_cache()
+    vector = await cache.get(text)
+    if vector is not None:
+        return vector
+
+    batcher = await JinaClientSingleton.get_batcher()
+    vector = await batcher.embed(text)
+    await cache.set(text, vector)
+    return vector
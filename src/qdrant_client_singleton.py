@@ -1,4 +1,5 @@
-from qdrant_client import QdrantClient
+import httpx
+from qdrant_client import AsyncQdrantClient
 from .config import settings
 import logging
 
@@ -11,9 +12,18 @@ class QdrantClientSingleton:
     async def get_instance(cls):
         if cls._instance is None:
             try:
-                cls._instance = QdrantClient(
+                cls._instance = AsyncQdrantClient(
                     url=settings.QDRANT_URI,
-                    api_key=settings.QDRANT_API_KEY
+                    api_key=settings.QDRANT_API_KEY,
+                    prefer_grpc=settings.QDRANT_PREFER_GRPC,
+                    grpc_port=settings.QDRANT_GRPC_PORT,
+                    timeout=settings.QDRANT_TIMEOUT,
+                    # The REST transport disables keep-alive unless limits are given explicitly
+                    limits=httpx.Limits(
+                        max_connections=settings.QDRANT_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.QDRANT_MAX_KEEPALIVE_CONNECTIONS,
+                    ),
+                    http2=settings.QDRANT_HTTP2,
                 )
             except Exception as e:
                 logger.error(f"Failed to connect to Qdrant: {e}")
@@ -24,4 +34,4 @@ class QdrantClientSingleton:
     async def close(cls):
         if cls._instance:
             await cls._instance.close()
-            cls._instance = None 
\ No newline at end of file
+            cls._instance = None
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from typing import Optional
+from qdrant_client import AsyncQdrantClient, models
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "movies_plot"
+# Exact-match lookup field holding normalize_text(title)
+NORMALIZED_TITLE_FIELD = "title_normalized"
+
+
+async def ensure_payload_indexes(client: AsyncQdrantClient):
+    """Idempotently create the payload indexes the API's lookups rely on"""
+    collection = await client.get_collection(COLLECTION_NAME)
+    if NORMALIZED_TITLE_FIELD in (collection.payload_schema or {}):
+        return
+    logger.info(f"Creating keyword index on {COLLECTION_NAME}.{NORMALIZED_TITLE_FIELD}")
+    await client.create_payload_index(
+        collection_name=COLLECTION_NAME,
+        field_name=NORMALIZED_TITLE_FIELD,
+        field_schema=models.PayloadSchemaType.KEYWORD,
+    )
+
+
+# Whether every point has NORMALIZED_TITLE_FIELD; None until checked
+_normalized_titles_ready: Optional[bool] = None
+
+
+def normalized_titles_ready() -> bool:
+    """False only once a check found points the backfill hasn't reached"""
+    return _normalized_titles_ready is not False
+
+
+async def check_normalized_titles(client: AsyncQdrantClient) -> bool:
+    """Look for a point without the normalized title; exact-match lookups miss those"""
+    global _normalized_titles_ready
+    points, _ = await client.scroll(
+        collection_name=COLLECTION_NAME,
+        scroll_filter=models.Filter(
+            must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=NORMALIZED_TITLE_FIELD))]
+        ),
+        limit=1,
+        with_payload=False,
+        with_vectors=False,
+    )
+    _normalized_titles_ready = not points
+    return _normalized_titles_ready
+
+
+async def backfill_normalized_titles(client: AsyncQdrantClient, batch_size: int = 256) -> int:
+    """Write the normalized title payload on every point that doesn't have it yet"""
+    updated = 0
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=COLLECTION_NAME,
+            scroll_filter=models.Filter(
+                must=[models.IsEmptyCondition(is_empty=models.PayloadField(key=NORMALIZED_TITLE_FIELD))]
+            ),
+            limit=batch_size,
+            offset=offset,
+            with_payload=["title"],
+            with_vectors=False,
+        )
+        operations = [
+            models.SetPayloadOperation(
+                set_payload=models.SetPayload(
+                    payload={NORMALIZED_TITLE_FIELD: normalize_text(point.payload["title"])},
+                    points=[point.id],
+                )
+            )
+            for point in points
+            if point.payload.get("title")
+        ]
+        if operations:
+            await client.batch_update_points(collection_name=COLLECTION_NAME, update_operations=operations)
+            updated += len(operations)
+        if offset is None:
+            break
+    return updated
+
+
+async def main():
+    from .qdrant_client_singleton import QdrantClientSingleton
+
+    client = await QdrantClientSingleton.get_instance()
+    try:
+        await ensure_payload_indexes(client)
+        updated = await backfill_normalized_titles(client)
+        logger.info(f"Backfilled {NORMALIZED_TITLE_FIELD} on {updated} points, restart the API to use it")
+    finally:
+        await QdrantClientSingleton.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,29 +1,201 @@
+import itertools
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 from dotenv import load_dotenv
 from .entity import MovieEntities
+from .neo4j_schema import check_query_plans
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Representative values for planning templates; only their types matter to the planner
+WARMUP_PARAMS = {
+    "movies": ["warmup"],
+    "movie_ids": [0],
+    "genres": ["drama"],
+    "year_start": 2000,
+    "year_end": 2000,
+    "directors": ["warmup"],
+    "actors": ["warmup"],
+}
+
+
+class QueryShape(NamedTuple):
+    """Everything that decides the text of a generated query; values never do"""
+    kind: str                 # "similarity", "combined" or "standard"
+    genre: Optional[str]      # None, "union" or "all"
+    year_start: bool
+    year_end: bool
+    director: bool
+    actor: Optional[str]      # None, "union" or "all"
+    precomputed: bool = False # similarity read from materialized SIMILAR_TO edges
+    by_id: bool = False       # reference movies resolved to IDs, leftovers matched by title
+
+
 class CypherQueryGenerator:
     def __init__(self):
-        pass
-    
-    def generate_query_manually(self, entities: MovieEntities) -> str:
-        # Handle similarity search first
+        # Every possible query is rendered once here; requests only pick a template
+        self.templates: Dict[QueryShape, str] = {
+            shape: self._render(shape) for shape in self.all_shapes()
+        }
+        # Whether the reference movies have SIMILAR_TO neighbours, keyed by by_id
+        self.neighbour_probes: Dict[bool, str] = {
+            by_id: self._neighbour_probe(by_id) for by_id in (False, True)
+        }
+
+    @classmethod
+    def all_shapes(cls):
+        for shape in cls._base_shapes():
+            yield shape
+            if shape.kind != "standard":
+                yield shape._replace(by_id=True)
+
+    @staticmethod
+    def _base_shapes():
+        flags = [False, True]
+        for year_start, year_end, director in itertools.product(flags, flags, flags):
+            for actor in (None, "union", "all"):
+                # Similarity queries only add OPTIONAL MATCHes for people, union doesn't matter
+                if actor != "union":
+                    yield QueryShape("similarity", None, year_start, year_end, director, actor)
+                for genre in ("union", "all"):
+                    if actor != "union":
+                        yield QueryShape("combined", genre, year_start, year_end, director, actor)
+                for genre in (None, "union", "all"):
+                    yield QueryShape("standard", genre, year_start, year_end, director, actor)
+        # Precomputed neighbours don't look at people, only at genre and year filters
+        for year_start, year_end in itertools.product(flags, flags):
+            yield QueryShape("similarity", None, year_start, year_end, False, None, True)
+            for genre in ("union", "all"):
+                yield QueryShape("combined", genre, year_start, year_end, False, None, True)
+
+    def shape_of(self, entities: MovieEntities, precomputed: bool = False, by_id: bool = False) -> QueryShape:
         if entities.movie and len(entities.movie) > 0:
             # If both movies and genres are provided, use a combined approach
-            if entities.genre and len(entities.genre) > 0:
-                return self._combined_similarity_genre_query(entities)
-            # Handle similarity search only
-            return self._similarity_query(entities)
-            
+            kind = "combined" if entities.genre and len(entities.genre) > 0 else "similarity"
+        else:
+            kind = "standard"
+
+        genre = None
+        if entities.genre and kind != "similarity":
+            genre = "union" if entities.genres_union else "all"
+        actor = None
+        if entities.actor:
+            actor = "union" if entities.actors_union and kind == "standard" else "all"
+
+        precomputed = precomputed and kind != "standard"
+        return QueryShape(
+            kind=kind,
+            genre=genre,
+            year_start=bool(entities.year_start),
+            year_end=bool(entities.year_end),
+            director=bool(entities.director) and not precomputed,
+            actor=None if precomputed else actor,
+            precomputed=precomputed,
+            by_id=by_id and kind != "standard",
+        )
+
+    def generate_query_manually(self, entities: MovieEntities, precomputed: bool = False,
+                                movie_ids: Optional[List[int]] = None,
+                                unresolved: Optional[List[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Build a (query, params) pair. Values only ever travel as parameters, so the
+        query text depends on the shape of the entities alone and Neo4j can reuse
+        its cached plan across requests.
+        With precomputed=True, 'movies like X' queries merge the reference movies'
+        SIMILAR_TO neighbours instead of scoring every Movie live.
+        Pass movie_ids (e.g. from the TitleResolver) to look the reference movies
+        up by ID instead of matching entities.movie against titles; titles that
+        didn't resolve go in unresolved and are still matched by title.
+        """
+        shape = self.shape_of(entities, precomputed=precomputed, by_id=bool(movie_ids))
+        params = self._build_params(entities, shape)
+        if shape.by_id:
+            params["movie_ids"] = movie_ids
+            params["movies"] = [x.lower() for x in unresolved or []]
+        return self.templates[shape], params
+
+    def neighbours_probe(self, entities: MovieEntities, movie_ids: Optional[List[int]] = None,
+                         unresolved: Optional[List[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        (query, params) returning has_neighbours: whether any of the reference
+        movies has materialized SIMILAR_TO edges. An empty precomputed result
+        only needs live scoring when it doesn't.
+        """
+        if movie_ids:
+            params = {"movie_ids": movie_ids, "movies": [x.lower() for x in unresolved or []]}
+        else:
+            params = {"movies": [x.lower() for x in entities.movie]}
+        return self.neighbour_probes[bool(movie_ids)], params
+
+    def plan_queries(self):
+        for shape, template in self.templates.items():
+            yield str(shape), template, WARMUP_PARAMS
+        for by_id, probe in self.neighbour_probes.items():
+            yield f"neighbours_probe(by_id={by_id})", probe, WARMUP_PARAMS
+
+    async def warm_plan_cache(self, driver):
+        """
+        EXPLAIN every template once so Neo4j has the plans cached before real traffic.
+        Returns the shapes whose plans fall back to an AllNodesScan.
+        """
+        offenders = await check_query_plans(driver, self.plan_queries())
+        logger.info(f"Warmed Neo4j plan cache with {len(self.templates)} query templates")
+        return offenders
+
+    def _build_params(self, entities: MovieEntities, shape: QueryShape) -> Dict[str, Any]:
+        params = {}
+        if shape.kind != "standard" and not shape.by_id:
+            params["movies"] = [x.lower() for x in entities.movie]
+        if shape.genre:
+            params["genres"] = [g.lower() for g in entities.genre]
+        if shape.year_start:
+            params["year_start"] = entities.year_start
+        if shape.year_end:
+            params["year_end"] = entities.year_end
+        if shape.kind == "standard":
+            if shape.director:
+                params["directors"] = [d.lower() for d in entities.director]
+            if shape.actor:
+                params["actors"] = [a.lower() for a in entities.actor]
+        return params
+
+    def _render(self, shape: QueryShape) -> str:
+        # Handle similarity search first
+        if shape.precomputed:
+            return self._precomputed_similarity_query(shape)
+        if shape.kind == "combined":
+            return self._combined_similarity_genre_query(shape)
+        if shape.kind == "similarity":
+            return self._similarity_query(shape)
         # Standard filtering query
-        return self._standard_filter_query(entities)
+        return self._standard_filter_query(shape)
 
-    def _similarity_query(self, entities: MovieEntities) -> str:
-        """Handle 'movies like X' queries with similarity scoring"""
-        cleaned_movie = [x.lower() for x in entities.movie]
-        query_lines = [
+    def _reference_lines(self, shape: QueryShape) -> list:
+        if shape.by_id:
+            # Resolved references by ID, the rest through the same title seek as below
+            return [
+                "CALL {",
+                "UNWIND $movie_ids AS movie_id",
+                "MATCH (ref:Movie {id: movie_id})",
+                "RETURN ref",
+                "UNION",
+                "UNWIND $movies AS movie",
+                "MATCH (ref:Movie)",
+                "WHERE ref.title_lower CONTAINS movie",
+                "RETURN ref",
+                "}",
+            ]
+        # One text-index CONTAINS seek per requested title instead of scanning every Movie
+        return [
+            "UNWIND $movies AS movie",
             "MATCH (ref:Movie)",
-            f"WHERE ANY(movie IN {cleaned_movie} WHERE toLower(ref.title) CONTAINS toLower(movie))",
+            "WHERE ref.title_lower CONTAINS movie",
+        ]
+
+    def _similarity_query(self, shape: QueryShape) -> str:
+        """Handle 'movies like X' queries with similarity scoring"""
+        query_lines = self._reference_lines(shape) + [
             "WITH COLLECT(DISTINCT ref) AS refs",
             "UNWIND refs AS ref",
             "OPTIONAL MATCH (ref)-[:DIRECTED_BY]->(d:Director)",
@@ -41,8 +213,7 @@ class CypherQueryGenerator:
         ]
 
         # Add additional filters
-        filter_lines, params = self._build_filters(entities)
-        query_lines += filter_lines
+        query_lines += self._build_filters(shape)
 
         # Add scoring and final return
         query_lines += [
@@ -56,70 +227,124 @@ class CypherQueryGenerator:
             "RETURN m.title AS title",
             "LIMIT 10"
         ]
-        
+
         return "\n".join(query_lines)
 
-    def _standard_filter_query(self, entities: MovieEntities) -> str:
+    def _precomputed_similarity_query(self, shape: QueryShape) -> str:
+        """Handle 'movies like X' queries from the materialized SIMILAR_TO neighbour lists"""
+        query_lines = self._reference_lines(shape) + [
+            "WITH COLLECT(DISTINCT ref) AS refs",
+            "UNWIND refs AS ref",
+            "MATCH (ref)-[s:SIMILAR_TO]->(m:Movie)",
+            "WHERE NOT m IN refs",
+            # Movies close to several references rank higher
+            "WITH m, SUM(s.score) AS score"
+        ]
+
+        if shape.genre == "union":
+            query_lines.append("MATCH (m)-[:HAS_GENRE]->(required_genre:Genre)")
+            query_lines.append("WHERE required_genre.name_lower IN $genres")
+            query_lines.append("WITH DISTINCT m, score")
+        elif shape.genre == "all":
+            query_lines.append("WHERE SIZE([genre IN $genres WHERE (m)-[:HAS_GENRE]->(:Genre {name_lower: genre}) | 1]) = SIZE($genres)")
+
+        query_lines += self._build_filters(shape)
+
+        query_lines += [
+            "WITH DISTINCT m, score",
+            "ORDER BY score DESC, m.popularity DESC",
+            "RETURN m.title AS title",
+            "LIMIT 10"
+        ]
+
+        return "\n".join(query_lines)
+
+    def _neighbour_probe(self, by_id: bool) -> str:
+        shape = QueryShape("similarity", None, False, False, False, None, precomputed=True, by_id=by_id)
+        return "\n".join(self._reference_lines(shape) + [
+            "WITH ref",
+            "WHERE EXISTS { (ref)-[:SIMILAR_TO]->() }",
+            "RETURN COUNT(ref) > 0 AS has_neighbours",
+        ])
+
+    def _standard_filter_query(self, shape: QueryShape) -> str:
         """Handle standard filtering without similarity"""
-        query_lines = ["MATCH (m:Movie)"]
         where_conditions = []
-        
+
+        # Start from the people when we have them: a text-index seek on the name
+        # is far narrower than every Movie
+        if shape.director:
+            query_lines = [
+                "UNWIND $directors AS director_name",
+                "MATCH (d:Director)",
+                "WHERE d.name_lower CONTAINS director_name",
+                "MATCH (m:Movie)-[:DIRECTED_BY]->(d)",
+                "WITH DISTINCT m",
+            ]
+        elif shape.actor == "union":
+            query_lines = [
+                "UNWIND $actors AS actor_name",
+                "MATCH (a:Actor)",
+                "WHERE a.name_lower CONTAINS actor_name",
+                "MATCH (m:Movie)-[:ACTED_IN]->(a)",
+                "WITH DISTINCT m",
+            ]
+        elif shape.actor == "all":
+            # Anchor on the first actor, the rest are checked below
+            query_lines = [
+                "WITH $actors[0] AS actor_name",
+                "MATCH (a:Actor)",
+                "WHERE a.name_lower CONTAINS actor_name",
+                "MATCH (m:Movie)-[:ACTED_IN]->(a)",
+                "WITH DISTINCT m",
+            ]
+        else:
+            query_lines = ["MATCH (m:Movie)"]
+
         # Genre filtering
-        if entities.genre:
-            genres = [g.lower() for g in entities.genre]
-            if entities.genres_union:
-                # OR condition: any of the genres
-                query_lines.append("MATCH (m)-[:HAS_GENRE]->(g:Genre)")
-                where_conditions.append(
-                    f"toLower(g.name) IN {genres}"
-                )
-            else:
-                # AND condition: all genres must exist
-                query_lines.append("MATCH (m)-[:HAS_GENRE]->(g:Genre)")
-                where_conditions.append(
-                    f"SIZE([genre IN {genres} WHERE (m)-[:HAS_GENRE]->(:Genre {{name: genre}}) | 1]) = SIZE({genres})"
-                )
+        if shape.genre == "union":
+            # OR condition: any of the genres
+            query_lines.append("MATCH (m)-[:HAS_GENRE]->(g:Genre)")
+            where_conditions.append(
+                "g.name_lower IN $genres"
+            )
+        elif shape.genre == "all":
+            # AND condition: all genres must exist
+            query_lines.append("MATCH (m)-[:HAS_GENRE]->(g:Genre)")
+            where_conditions.append(
+                "SIZE([genre IN $genres WHERE (m)-[:HAS_GENRE]->(:Genre {name_lower: genre}) | 1]) = SIZE($genres)"
+            )
 
         # Year filtering
-        if entities.year_start or entities.year_end:
+        if shape.year_start or shape.year_end:
             query_lines.append("MATCH (m)-[:RELEASED_IN]->(y:Year)")
-            if entities.year_start:
-                where_conditions.append(f"y.year >= {entities.year_start}")
-            if entities.year_end:
-                where_conditions.append(f"y.year <= {entities.year_end}")
-
-        # Director filtering
-        if entities.director:
-            query_lines.append("MATCH (m)-[:DIRECTED_BY]->(d:Director)")
-            dir_conditions = [f"toLower(d.name) CONTAINS '{d.lower()}'" for d in entities.director]
-            where_conditions.append(f"({' OR '.join(dir_conditions)})")
-
-        # Actor filtering
-        if entities.actor:
-            if entities.actors_union:
-                query_lines.append("MATCH (m)-[:ACTED_IN]->(a:Actor)")
-                actor_conds = [f"toLower(a.name) CONTAINS '{a.lower()}'" for a in entities.actor]
-                where_conditions.append(f"({' OR '.join(actor_conds)})")
-            else:
-                for i, actor in enumerate(entities.actor):
-                    query_lines.append(f"MATCH (m)-[:ACTED_IN]->(a{i}:Actor)")
-                    where_conditions.append(f"toLower(a{i}.name) CONTAINS '{actor.lower()}'")
+            if shape.year_start:
+                where_conditions.append("y.year >= $year_start")
+            if shape.year_end:
+                where_conditions.append("y.year <= $year_end")
+
+        # Actor filtering, unless the query already started from the actors
+        if shape.actor == "union" and shape.director:
+            query_lines.append("MATCH (m)-[:ACTED_IN]->(a:Actor)")
+            where_conditions.append("ANY(name IN $actors WHERE a.name_lower CONTAINS name)")
+        elif shape.actor == "all":
+            # Every actor must match, independent of how many were asked for
+            where_conditions.append(
+                "ALL(name IN $actors WHERE EXISTS { MATCH (m)-[:ACTED_IN]->(ca:Actor) WHERE ca.name_lower CONTAINS name })"
+            )
 
         # Build final query
         if where_conditions:
             query_lines.append(f"WHERE {' AND '.join(where_conditions)}")
-            
+
         query_lines.append("RETURN DISTINCT m.title AS title")
         query_lines.append("LIMIT 10")
-        
+
         return "\n".join(query_lines)
 
-    def _combined_similarity_genre_query(self, entities: MovieEntities) -> str:
+    def _combined_similarity_genre_query(self, shape: QueryShape) -> str:
         """Handle queries with both 'movies like X' and specific genre requirements"""
-        cleaned_movie = [x.lower() for x in entities.movie]
-        query_lines = [
-            "MATCH (ref:Movie)",
-            f"WHERE ANY(movie IN {cleaned_movie} WHERE toLower(ref.title) CONTAINS toLower(movie))",
+        query_lines = self._reference_lines(shape) + [
             "WITH COLLECT(DISTINCT ref) AS refs",
             "UNWIND refs AS ref",
             "OPTIONAL MATCH (ref)-[:DIRECTED_BY]->(d:Director)",
@@ -134,16 +359,15 @@ class CypherQueryGenerator:
         ]
 
         # Add strict genre filtering for the required genres
-        genres = [g.lower() for g in entities.genre]
-        if entities.genres_union:
+        if shape.genre == "union":
             # OR condition: match any of the requested genres
             query_lines.append("WITH m, all_directors, all_actors, all_genres")
             query_lines.append("MATCH (m)-[:HAS_GENRE]->(required_genre:Genre)")
-            query_lines.append(f"WHERE toLower(required_genre.name) IN {genres}")
+            query_lines.append("WHERE required_genre.name_lower IN $genres")
         else:
             # AND condition: all requested genres must be present
             query_lines.append("WITH m, all_directors, all_actors, all_genres")
-            query_lines.append(f"WHERE SIZE([genre IN {genres} WHERE (m)-[:HAS_GENRE]->(:Genre {{name: genre}}) | 1]) = SIZE({genres})")
+            query_lines.append("WHERE SIZE([genre IN $genres WHERE (m)-[:HAS_GENRE]->(:Genre {name_lower: genre}) | 1]) = SIZE($genres)")
 
         # Continue with similarity matching
         query_lines += [
@@ -154,8 +378,7 @@ class CypherQueryGenerator:
         ]
 
         # Add additional filters (year, director, actor)
-        filter_lines, params = self._build_filters(entities, skip_genre=True)
-        query_lines += filter_lines
+        query_lines += self._build_filters(shape)
 
         # Add scoring and final return
         query_lines += [
@@ -167,35 +390,29 @@ class CypherQueryGenerator:
             "RETURN m.title AS title",
             "LIMIT 10"
         ]
-        
+
         return "\n".join(query_lines)
 
-    def _build_filters(self, entities: MovieEntities, skip_genre=False) -> tuple:
+    def _build_filters(self, shape: QueryShape) -> list:
         """Build additional filter clauses for similarity query"""
         filter_lines = []
-        params = {}
-        
-        # Genre filters
-        if entities.genre and not skip_genre:
-            filter_lines.append("OPTIONAL MATCH (m)-[:HAS_GENRE]->(mg) WHERE mg IN all_genres")
-            params["genres"] = [g.lower() for g in entities.genre]
 
         # Year filters
-        if entities.year_start or entities.year_end:
+        if shape.year_start or shape.year_end:
             filter_lines.append("MATCH (m)-[:RELEASED_IN]->(y:Year)")
-            if entities.year_start:
-                filter_lines.append(f"WHERE y.year >= {entities.year_start}")
-            if entities.year_end:
-                filter_lines.append(f"AND y.year <= {entities.year_end}")
+            year_conditions = []
+            if shape.year_start:
+                year_conditions.append("y.year >= $year_start")
+            if shape.year_end:
+                year_conditions.append("y.year <= $year_end")
+            filter_lines.append(f"WHERE {' AND '.join(year_conditions)}")
 
         # Director filters
-        if entities.director:
+        if shape.director:
             filter_lines.append("OPTIONAL MATCH (m)-[:DIRECTED_BY]->(md) WHERE md IN all_directors")
 
         # Actor filters
-        if entities.actor:
+        if shape.actor:
             filter_lines.append("OPTIONAL MATCH (m)-[:ACTED_IN]->(ma) WHERE ma IN all_actors")
 
-        return filter_lines, params
-
-    
\ No newline at end of file
+        return filter_lines
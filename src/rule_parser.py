@@ -0,0 +1,240 @@
+import re
+from typing import Dict, List, Optional, Tuple
+from .entity import GENRES, MovieEntities
+from .genre_year_index import get_genre_year_index
+from .text import normalize_text
+from .title_resolver import get_title_resolver
+
+_tokens = re.compile(r"[\w'\-&+]+")
+_decade = re.compile(r"^'?(\d{2})s$")
+_full_decade = re.compile(r"^(\d{3})0s$")
+_year = re.compile(r"^(18|19|20)\d{2}$")
+
+# Spellings of the allowed genres, plus the theme mappings from the extractor prompt
+GENRE_PHRASES: Dict[str, List[str]] = {genre: [genre] for genre in GENRES}
+GENRE_PHRASES.update({
+    "dramas": ["drama"], "dramatic": ["drama"],
+    "crimes": ["crime"],
+    "animated": ["animation"], "anime": ["animation"],
+    "comedies": ["comedy"], "funny": ["comedy"],
+    "romances": ["romance"], "romantic": ["romance"],
+    "historical": ["history"],
+    "sci fi": ["sci-fi"], "scifi": ["sci-fi"], "science fiction": ["sci-fi"],
+    "documentaries": ["documentary"],
+    "musicals": ["musical"],
+    "tv movies": ["tv movie"],
+    "kids": ["children"],
+    "westerns": ["western"],
+    "film noir": ["film-noir"], "noir": ["film-noir"],
+    "fantasies": ["fantasy"],
+    "mysteries": ["mystery"],
+    "scary": ["horror"],
+    "thrillers": ["thriller"],
+    "adventures": ["adventure"],
+    "rom com": ["comedy", "romance"], "rom-com": ["comedy", "romance"], "romcom": ["comedy", "romance"],
+    "rom coms": ["comedy", "romance"], "rom-coms": ["comedy", "romance"], "romcoms": ["comedy", "romance"],
+    "mind-bending": ["thriller", "sci-fi"], "mind bending": ["thriller", "sci-fi"],
+    "tearjerker": ["drama"], "tearjerkers": ["drama"],
+    "parody": ["comedy"], "parodies": ["comedy"],
+})
+
+# Era mappings from the extractor prompt
+ERA_PHRASES: Dict[str, Tuple[Optional[int], Optional[int]]] = {
+    "old": (1920, 1960), "classic": (1920, 1960), "classics": (1920, 1960), "vintage": (1920, 1960),
+    "silent era": (1890, 1929), "silent": (1890, 1929),
+    "golden age hollywood": (1930, 1959), "golden age": (1930, 1959),
+    "cold war era": (1947, 1991), "cold war": (1947, 1991),
+    "modern": (2000, None),
+    "contemporary": (2010, None),
+    "nineties": (1990, 1999), "eighties": (1980, 1989), "seventies": (1970, 1979),
+    "sixties": (1960, 1969), "fifties": (1950, 1959),
+}
+
+# Two-digit decades from here on are read as this century ("10s" -> 2010s); "20s"
+# could be either the 1920s or the 2020s, so queries with it go to the LLM
+CENTURY_CUTOFF = 20
+AMBIGUOUS_DECADES = {20}
+
+UNION_WORDS = {"or", "either", "any"}
+INTERSECTION_WORDS = {"and", "both", "&", "+"}
+START_WORDS = {"after", "since", "post"}
+END_WORDS = {"before", "until", "till", "pre", "prior"}
+# "from 1999" is that year; "from 1990 to 1999" a range
+RANGE_END_WORDS = {"to", "through", "thru"}
+FILLER_WORDS = {
+    "movie", "movies", "film", "films", "flick", "flicks", "cinema", "genre", "genres",
+    "the", "a", "an", "some", "good", "great", "best", "top", "popular", "of", "in", "with",
+    "show", "me", "i", "want", "to", "watch", "recommend", "suggest", "give", "find", "list",
+    "please", "era", "decade", "released", "made", "year", "years", "that", "are", "is",
+}
+# "movies like X": everything after the marker is the reference title(s)
+LIKE_MARKERS = ["similar to", "in the vein of", "in the style of", "like"]
+_title_separators = re.compile(r"\s*(?:,|\band\b|\bor\b|&)\s*")
+# Rule 3 of the extractor prompt: queries without titles or people get 1-3 suggestions
+SUGGESTIONS = 3
+
+
+class RuleBasedParser:
+    """
+    Applies the extractor prompt's rules for the simple query shapes directly:
+    genres, eras and years ("90s horror", "comedy and romance movies") and
+    reference titles ("movies like Heat"). Like the LLM, it suggests movies for
+    genre/era queries, the most popular matches from the GenreYearIndex.
+    parse() returns the entities with a confidence in [0, 1]; anything it
+    doesn't fully understand scores low and should go to the LLM.
+    """
+
+    def __init__(self):
+        self.phrases = {}
+        for phrase, genres in GENRE_PHRASES.items():
+            self.phrases[tuple(phrase.split())] = ("genre", genres)
+        for phrase, years in ERA_PHRASES.items():
+            self.phrases[tuple(phrase.split())] = ("years", years)
+        self.max_phrase = max(len(phrase) for phrase in self.phrases)
+
+    def _filters(self, tokens: List[str]) -> Tuple[Dict, float]:
+        """Genres, years and union flag from filter words; the share of tokens understood"""
+        genres: List[str] = []
+        year_start = year_end = None
+        union = None
+        pending = None
+        understood = 0
+        i = 0
+        while i < len(tokens):
+            for length in range(min(self.max_phrase, len(tokens) - i), 0, -1):
+                match = self.phrases.get(tuple(tokens[i:i + length]))
+                if match:
+                    break
+            else:
+                length = 1
+            token = tokens[i]
+
+            if match and match[0] == "genre":
+                genres += [genre for genre in match[1] if genre not in genres]
+            elif match and match[0] == "years":
+                year_start, year_end = match[1]
+            elif _full_decade.match(token):
+                year_start, year_end = int(token[:4]), int(token[:4]) + 9
+            elif _decade.match(token) and int(_decade.match(token).group(1)) not in AMBIGUOUS_DECADES:
+                decade = int(_decade.match(token).group(1))
+                start = (2000 if decade < CENTURY_CUTOFF else 1900) + decade
+                year_start, year_end = start, start + 9
+            elif _year.match(token):
+                year = int(token)
+                if pending == "start":
+                    year_start = year
+                elif pending == "end":
+                    year_end = year
+                elif pending == "between":
+                    year_start, pending = year, "start_of_range"
+                    understood += 1
+                    i += 1
+                    continue
+                elif pending == "start_of_range":
+                    year_end = year
+                elif pending == "from":
+                    year_start = year_end = year
+                    pending = "from_year"
+                    understood += 1
+                    i += 1
+                    continue
+                else:
+                    year_start = year_end = year
+                pending = None
+            elif token in START_WORDS:
+                pending = "start"
+            elif token == "from":
+                pending = "from"
+            elif token in RANGE_END_WORDS and pending == "from_year":
+                pending = "end"
+            elif token in END_WORDS:
+                pending = "end"
+            elif token == "between":
+                pending = "between"
+            elif token in UNION_WORDS:
+                union = True
+            elif token in INTERSECTION_WORDS:
+                if pending != "start_of_range" and union is None:
+                    union = False
+            elif token not in FILLER_WORDS:
+                i += length
+                continue
+            understood += length
+            i += length
+
+        coverage = understood / len(tokens) if tokens else 1.0
+        return {
+            "genre": genres or None,
+            "genres_union": bool(union) if genres else None,
+            "year_start": year_start,
+            "year_end": year_end,
+        }, coverage
+
+    def _titles(self, text: str) -> Tuple[Optional[List[str]], float]:
+        """Reference titles resolved against the catalog, and the weakest match score"""
+        resolver = get_title_resolver()
+        if resolver is None or not text:
+            return None, 0.0
+        whole = resolver.resolve(text)
+        if whole and whole[0].score == 1.0:
+            return [whole[0].title], 1.0
+        parts = [part for part in _title_separators.split(text) if part]
+        matches = [resolver.resolve(part) for part in parts]
+        if not all(matches):
+            return ([whole[0].title], whole[0].score) if whole else (None, 0.0)
+        score = min(match[0].score for match in matches)
+        if whole and whole[0].score >= score:
+            return [whole[0].title], whole[0].score
+        return list(dict.fromkeys(match[0].title for match in matches)), score
+
+    def parse(self, query: str, min_year: Optional[str] = None, max_year: Optional[str] = None,
+              genres: Optional[str] = None) -> Tuple[MovieEntities, float]:
+        text = normalize_text(query)
+        title_text = None
+        for marker in LIKE_MARKERS:
+            match = re.search(rf"\b{marker}\b", text)
+            if match:
+                text, title_text = text[:match.start()], text[match.end():].strip(" ?!.")
+                break
+
+        filters, confidence = self._filters(_tokens.findall(text))
+        entities = MovieEntities(search_query=query.strip(), movies_present=False, **filters)
+        review = ["Parsed by the local rule-based parser."]
+
+        if title_text is not None:
+            titles, score = self._titles(title_text)
+            entities.movie = titles
+            entities.movies_present = titles is not None
+            confidence = min(confidence, score)
+            review.append(f"Reference titles {titles} matched with score {score:.2f}.")
+        elif not (entities.genre or entities.year_start or entities.year_end):
+            # Nothing this parser handles, the LLM has to suggest movies
+            confidence = 0.0
+
+        # Explicit filters from the UI, same handling as the LLM prompt's inputs
+        if min_year and min_year.isdigit():
+            entities.year_start = int(min_year)
+        if max_year and max_year.isdigit():
+            entities.year_end = int(max_year)
+        if genres:
+            for genre in genres.split(","):
+                mapped = GENRE_PHRASES.get(normalize_text(genre))
+                if mapped is None:
+                    if genre.strip():
+                        confidence = 0.0
+                    continue
+                entities.genre = list(dict.fromkeys((entities.genre or []) + mapped))
+            if entities.genre and entities.genres_union is None:
+                entities.genres_union = False
+
+        if title_text is None:
+            index = get_genre_year_index()
+            suggestions = index.top(entities, SUGGESTIONS) if index is not None else []
+            if not suggestions:
+                # The movie field must never be empty, only the LLM can fill it now
+                confidence = 0.0
+            entities.movie = suggestions or None
+            review.append(f"Suggested the most popular matches {suggestions}.")
+
+        entities.parsing_review = " ".join(review)
+        return entities, confidence
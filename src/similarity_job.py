@@ -0,0 +1,85 @@
+import argparse
+import asyncio
+import logging
+from typing import List, Optional
+from neo4j import AsyncGraphDatabase
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Same weights as CypherQueryGenerator's live scoring: shared director x2,
+# shared actor x1, shared genre x0.5. Existing edges of each movie are replaced.
+REBUILD_NEIGHBORS = """
+    CALL {
+        WITH ref
+        OPTIONAL MATCH (ref)-[old:SIMILAR_TO]->()
+        DELETE old
+        WITH DISTINCT ref
+        MATCH (ref)-[r1:DIRECTED_BY|ACTED_IN|HAS_GENRE]->(feature)<-[r2]-(m:Movie)
+        WHERE m <> ref AND type(r2) = type(r1)
+        WITH ref, m, SUM(
+            CASE type(r1) WHEN 'DIRECTED_BY' THEN 2.0 WHEN 'ACTED_IN' THEN 1.0 ELSE 0.5 END
+        ) AS score
+        ORDER BY score DESC, m.popularity DESC
+        WITH ref, COLLECT({movie: m, score: score})[0..$top_n] AS neighbors
+        UNWIND neighbors AS neighbor
+        WITH ref, neighbor.movie AS m, neighbor.score AS score
+        CREATE (ref)-[:SIMILAR_TO {score: score}]->(m)
+    } IN TRANSACTIONS OF %d ROWS
+"""
+
+SELECT_ALL = "MATCH (ref:Movie)"
+SELECT_MISSING = "MATCH (ref:Movie) WHERE NOT EXISTS { (ref)-[:SIMILAR_TO]->() }"
+SELECT_IDS = "UNWIND $movie_ids AS movie_id MATCH (ref:Movie {id: movie_id})"
+
+
+async def build_similar_to(driver, movie_ids: Optional[List[int]] = None, rebuild_all: bool = False,
+                           top_n: int = 50, batch_size: int = 100) -> int:
+    """
+    Precompute the top_n most similar movies for each selected movie as
+    weighted SIMILAR_TO relationships. By default only movies without any
+    neighbors yet are processed; pass movie_ids to refresh specific movies
+    or rebuild_all after large catalog changes.
+    """
+    if movie_ids:
+        select = SELECT_IDS
+    elif rebuild_all:
+        select = SELECT_ALL
+    else:
+        select = SELECT_MISSING
+
+    async with driver.session() as session:
+        result = await session.run(
+            select + REBUILD_NEIGHBORS % int(batch_size),
+            {"movie_ids": movie_ids, "top_n": top_n},
+        )
+        summary = await result.consume()
+    return summary.counters.relationships_created
+
+
+async def main(args):
+    driver = AsyncGraphDatabase.driver(
+        settings.NEO4J_URI,
+        auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+    )
+    try:
+        created = await build_similar_to(
+            driver,
+            movie_ids=args.movie_ids,
+            rebuild_all=args.all,
+            top_n=args.top_n,
+            batch_size=args.batch_size,
+        )
+        logger.info(f"Created {created} SIMILAR_TO relationships")
+    finally:
+        await driver.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Materialize SIMILAR_TO edges for 'movies like X' queries")
+    parser.add_argument("--all", action="store_true", help="Recompute every movie, not just those without neighbors")
+    parser.add_argument("--movie-ids", type=int, nargs="+", help="Recompute only these movies")
+    parser.add_argument("--top-n", type=int, default=settings.SIMILAR_TO_TOP_N)
+    parser.add_argument("--batch-size", type=int, default=100)
+    asyncio.run(main(parser.parse_args()))
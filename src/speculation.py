@@ -0,0 +1,78 @@
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional, Set
+from pydantic import ValidationError
+from .entity import MovieEntities
+from .multiplexer import BranchStream
+
+logger = logging.getLogger(__name__)
+
+# Entity fields each /stream-response branch reads
+SIMILARITY_FIELDS = ("movie",)
+CYPHER_FIELDS = (
+    "movie", "movies_present", "actor", "director", "year_start", "year_end",
+    "genre", "actors_union", "genres_union",
+)
+SEARCH_FIELDS = ("search_query",)
+# The order the model is asked to write fields in, from the schema
+FIELD_ORDER = {field: index for index, field in enumerate(MovieEntities.model_fields)}
+
+
+def complete_fields(partial: Dict[str, Any]) -> Set[str]:
+    """
+    Keys of a partially streamed JSON object whose values are final: the model
+    writes keys in order, so every key but the last one seen is done.
+    """
+    return set(list(partial)[:-1])
+
+
+class SpeculativeBranch:
+    """
+    A downstream pipeline that can start from a partially streamed MovieEntities
+    as soon as the fields it reads are complete. Its messages queue up in a
+    BranchStream; once the final entities are known, reconcile() keeps the run
+    if it started from the same values and otherwise cancels it and starts over,
+    so speculative output only reaches the client when it turned out right.
+    """
+
+    def __init__(self, name: str, fields: Iterable[str], start: Callable[[MovieEntities], AsyncIterator]):
+        self.name = name
+        self.fields = tuple(fields)
+        self.start = start
+        self.last_field = max(FIELD_ORDER[field] for field in self.fields)
+        self.stream: Optional[BranchStream] = None
+        self.started_with: Optional[Dict[str, Any]] = None
+
+    def values(self, entities: MovieEntities) -> Dict[str, Any]:
+        return {field: getattr(entities, field) for field in self.fields}
+
+    def maybe_start(self, partial: Dict[str, Any], complete: Set[str]) -> bool:
+        """Start speculatively once every field this branch reads is complete"""
+        if self.stream is not None:
+            return False
+        # A field written after all of ours means the model is past them, even if it skipped some
+        past = any(FIELD_ORDER.get(key, -1) > self.last_field for key in partial)
+        if not (past or all(field in complete for field in self.fields)):
+            return False
+        try:
+            entities = MovieEntities(**{key: partial[key] for key in complete})
+        except ValidationError:
+            return False
+        self.started_with = self.values(entities)
+        self.stream = BranchStream(self.start(entities))
+        logger.info(f"Speculatively started {self.name} with {self.started_with}")
+        return True
+
+    def reconcile(self, entities: MovieEntities) -> BranchStream:
+        """The run for the final entities, reusing the speculative one when it matches"""
+        if self.stream is not None and self.started_with == self.values(entities):
+            return self.stream
+        if self.stream is not None:
+            logger.info(f"Restarting {self.name}, final entities differ from the speculative start")
+            self.stream.cancel()
+        self.started_with = self.values(entities)
+        self.stream = BranchStream(self.start(entities))
+        return self.stream
+
+    def cancel(self):
+        if self.stream is not None:
+            self.stream.cancel()
@@ -0,0 +1,10 @@
+import re
+import unicodedata
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Case- and whitespace-insensitive form of free text used for cache keys and lookups"""
+    text = unicodedata.normalize("NFKC", text or "")
+    return _whitespace.sub(" ", text.casefold()).strip()
@@ -0,0 +1,202 @@
+import logging
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from .catalog import Catalog
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_words = re.compile(r"\w+")
+_sentence_end = re.compile(r"[.!?:;\n]")
+# "- Heat" or "2. Heat": a list item's first word is capitalized because it's a title
+_list_item = re.compile(r"^\s*(?:[-*•>]|\d+[.)])\s*$")
+
+# Common shorthand in movie threads -> canonical title; only used when the
+# catalog has the title
+ALIASES = {
+    "tdk": "The Dark Knight",
+    "tdkr": "The Dark Knight Rises",
+    "lotr": "The Lord of the Rings: The Fellowship of the Ring",
+    "fotr": "The Lord of the Rings: The Fellowship of the Ring",
+    "ttt": "The Lord of the Rings: The Two Towers",
+    "rotk": "The Lord of the Rings: The Return of the King",
+    "esotsm": "Eternal Sunshine of the Spotless Mind",
+    "bttf": "Back to the Future",
+    "t2": "Terminator 2: Judgment Day",
+    "gotg": "Guardians of the Galaxy",
+    "mmfr": "Mad Max: Fury Road",
+    "ncfom": "No Country for Old Men",
+    "twbb": "There Will Be Blood",
+}
+
+# Titles made only of these words are everyday phrases ("It", "Up", "Us", "Her")
+# and would match almost every comment
+STOPWORDS = {
+    "a", "about", "after", "again", "all", "also", "am", "an", "and", "any", "are", "as", "at",
+    "be", "because", "been", "before", "being", "best", "better", "big", "both", "but", "by",
+    "can", "could", "day", "did", "do", "does", "done", "down", "each", "even", "ever", "every",
+    "few", "film", "first", "for", "from", "get", "go", "going", "good", "got", "great", "had",
+    "has", "have", "he", "her", "here", "him", "his", "how", "i", "if", "in", "into", "is", "it",
+    "its", "just", "know", "last", "least", "let", "like", "little", "long", "lot", "love", "made",
+    "make", "man", "many", "me", "more", "most", "movie", "much", "must", "my", "never", "new",
+    "no", "not", "now", "of", "off", "old", "on", "one", "only", "or", "other", "our", "out",
+    "over", "people", "really", "right", "s", "same", "saw", "say", "see", "seen", "she", "should",
+    "so", "some", "still", "such", "t", "than", "that", "the", "their", "them", "then", "there",
+    "these", "they", "thing", "think", "this", "those", "though", "time", "to", "too", "two",
+    "up", "us", "very", "was", "watch", "watched", "way", "we", "well", "were", "what", "when",
+    "where", "which", "while", "who", "why", "will", "with", "would", "yes", "yet", "you", "your",
+}
+
+
+# Words a title-cased title may leave lowercase ("Gone with the Wind"), plus
+# the pieces \w+ splits contractions into
+MINOR_WORDS = {
+    "a", "an", "and", "as", "at", "but", "by", "for", "from", "in", "into", "nor", "of", "on",
+    "or", "over", "the", "to", "vs", "with", "d", "ll", "m", "re", "s", "t", "ve",
+}
+
+
+def title_cased(words: List[str], sentence_start: bool) -> bool:
+    """
+    Whether a matched span is written like a title: every significant word
+    capitalized, with at least one capital that isn't just the start of a
+    sentence ("Taken together, ..." is not the movie).
+    """
+    evidence = False
+    for position, word in enumerate(words):
+        if not word[:1].isalpha():
+            continue  # "2049", "7"
+        if position == 0 and sentence_start:
+            continue
+        if word[:1].isupper():
+            evidence = True
+        elif position == 0 or normalize_text(word) not in MINOR_WORDS:
+            return False
+    return evidence
+
+
+class TitleExtractor:
+    """
+    Word-level Aho-Corasick automaton over normalized catalog titles and
+    ALIASES. extract() scans a text once and returns the canonical titles it
+    mentions, preferring the longest match where titles overlap ("The Dark
+    Knight Rises" over "The Dark Knight"). A local hit skips the LLM, so
+    titles only count when written title-cased: "the game last night" or
+    "unlike the others" are ordinary words.
+    """
+
+    def __init__(self, titles: List[str], popularity: Optional[List[float]] = None,
+                 aliases: Optional[Dict[str, str]] = None):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        # (pattern length in words, canonical title, is alias) of the pattern ending here
+        self.output: List[Optional[Tuple[int, str, bool]]] = [None]
+        # Nearest node along the failure chain with an output
+        self.output_link: List[int] = [-1]
+
+        popularity = popularity or [0.0] * len(titles)
+        patterns: Dict[Tuple[str, ...], Tuple[float, str]] = {}
+        for title, score in zip(titles, popularity):
+            words = tuple(_words.findall(normalize_text(title)))
+            if not words or all(word in STOPWORDS for word in words):
+                continue
+            # Remakes share a title, keep the most popular spelling
+            if words not in patterns or patterns[words][0] < score:
+                patterns[words] = (score, title)
+
+        catalog_titles = {normalize_text(title): title for _, title in patterns.values()}
+        for alias, title in (ALIASES if aliases is None else aliases).items():
+            canonical = catalog_titles.get(normalize_text(title))
+            if canonical:
+                self._insert(tuple(_words.findall(normalize_text(alias))), canonical, True)
+        for words, (_, title) in patterns.items():
+            self._insert(words, title, False)
+        self._link()
+        self.patterns = len(patterns)
+
+    @classmethod
+    def from_catalog(cls, catalog: Catalog) -> "TitleExtractor":
+        return cls(catalog.titles, catalog.popularity)
+
+    def _insert(self, words: Tuple[str, ...], title: str, alias: bool):
+        node = 0
+        for word in words:
+            child = self.goto[node].get(word)
+            if child is None:
+                child = len(self.goto)
+                self.goto[node][word] = child
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.output_link.append(-1)
+            node = child
+        if self.output[node] is None or alias:
+            self.output[node] = (len(words), title, alias)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for word, child in self.goto[node].items():
+                state = self.fail[node]
+                while state and word not in self.goto[state]:
+                    state = self.fail[state]
+                fallback = self.goto[state].get(word, 0)
+                self.fail[child] = fallback if fallback != child else 0
+                target = self.fail[child]
+                self.output_link[child] = target if self.output[target] is not None else self.output_link[target]
+                queue.append(child)
+
+    @staticmethod
+    def sentence_start(text: str, tokens: List[re.Match], i: int) -> bool:
+        start = tokens[i].start()
+        if _list_item.match(text[text.rfind("\n", 0, start) + 1:start]):
+            return False
+        return i == 0 or bool(_sentence_end.search(text[tokens[i - 1].end():start]))
+
+    def matches(self, text: str) -> List[Tuple[int, int, str]]:
+        """Every (start word, end word, title) occurrence in text"""
+        tokens = list(_words.finditer(text))
+        original = [token.group() for token in tokens]
+        sentence_starts = [self.sentence_start(text, tokens, i) for i in range(len(tokens))]
+        found = []
+        state = 0
+        for position, token in enumerate(original):
+            word = normalize_text(token)
+            while state and word not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(word, 0)
+            node = state if self.output[state] is not None else self.output_link[state]
+            while node > 0:
+                length, title, alias = self.output[node]
+                start = position - length + 1
+                if alias or title_cased(original[start:position + 1], sentence_starts[start]):
+                    found.append((start, position + 1, title))
+                node = self.output_link[node]
+        return found
+
+    def extract(self, text: str) -> List[str]:
+        """Canonical titles mentioned in text, leftmost-longest and in order of appearance"""
+        titles = []
+        covered = -1
+        for start, end, title in sorted(self.matches(text), key=lambda m: (m[0], m[0] - m[1])):
+            if start < covered:
+                continue
+            covered = end
+            titles.append(title)
+        return list(dict.fromkeys(titles))
+
+
+_title_extractor: Optional[TitleExtractor] = None
+
+
+def get_title_extractor() -> Optional[TitleExtractor]:
+    return _title_extractor
+
+
+def build_title_extractor(catalog: Catalog) -> TitleExtractor:
+    global _title_extractor
+    _title_extractor = TitleExtractor.from_catalog(catalog)
+    logger.info(f"Built title extraction automaton over {_title_extractor.patterns} titles")
+    return _title_extractor
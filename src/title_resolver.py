@@ -0,0 +1,117 @@
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional
+import numpy as np
+from .catalog import Catalog
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+_words = re.compile(r"\w+")
+
+
+def trigrams(text: str) -> List[str]:
+    """pg_trgm style trigrams: each word padded with two leading spaces and one trailing"""
+    grams = []
+    for word in _words.findall(normalize_text(text)):
+        padded = f"  {word} "
+        grams += [padded[i:i + 3] for i in range(len(padded) - 2)]
+    return list(dict.fromkeys(grams))
+
+
+class TitleMatch(NamedTuple):
+    id: int
+    title: str
+    score: float  # share of the query's trigrams found in the title, 1.0 for exact matches
+
+
+class TitleResolver:
+    """
+    Maps free-text, misspelled or partial movie titles to catalog movies through
+    a trigram inverted index. Candidates are ranked by how much of the query
+    they contain, then by overall trigram similarity (so "godfather" prefers
+    "The Godfather" over "The Godfather Part II"), then by popularity.
+    """
+
+    def __init__(self, ids: List[int], titles: List[str], popularity: Optional[List[float]] = None):
+        self.ids = list(ids)
+        self.titles = list(titles)
+        self.popularity = np.asarray(popularity if popularity is not None else [0.0] * len(self.titles), dtype=np.float32)
+
+        # Most popular movie per exact normalized title
+        self.exact: Dict[str, int] = {}
+        for position in np.argsort(-self.popularity, kind="stable"):
+            self.exact.setdefault(normalize_text(self.titles[position]), int(position))
+
+        self.gram_ids: Dict[str, int] = {}
+        rows, cols = [], []
+        for position, title in enumerate(self.titles):
+            for gram in trigrams(title):
+                rows.append(position)
+                cols.append(self.gram_ids.setdefault(gram, len(self.gram_ids)))
+        rows = np.asarray(rows, dtype=np.int32)
+        cols = np.asarray(cols, dtype=np.int32)
+        self.gram_counts = np.bincount(rows, minlength=len(self.titles)).astype(np.float32)
+
+        # trigram -> title positions
+        order = np.argsort(cols, kind="stable")
+        self.indptr = np.zeros(len(self.gram_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cols, minlength=len(self.gram_ids)), out=self.indptr[1:])
+        self.postings = rows[order]
+
+    @classmethod
+    def from_catalog(cls, catalog: Catalog) -> "TitleResolver":
+        return cls(catalog.ids, catalog.titles, catalog.popularity)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def match_at(self, position: int, score: float) -> TitleMatch:
+        return TitleMatch(self.ids[position], self.titles[position], score)
+
+    def resolve(self, query: str, limit: int = 1, min_score: float = 0.0) -> List[TitleMatch]:
+        """Best catalog matches for query, most likely first"""
+        position = self.exact.get(normalize_text(query))
+        if position is not None and limit == 1:
+            return [self.match_at(position, 1.0)]
+
+        query_grams = trigrams(query)
+        grams = [self.gram_ids[g] for g in query_grams if g in self.gram_ids]
+        query_size = len(query_grams)
+        if not grams:
+            return [self.match_at(position, 1.0)] if position is not None else []
+
+        hits = np.concatenate([self.postings[self.indptr[g]:self.indptr[g + 1]] for g in grams])
+        shared = np.bincount(hits, minlength=len(self.titles)).astype(np.float32)
+        candidates = np.flatnonzero(shared)
+        shared = shared[candidates]
+        containment = shared / query_size
+        similarity = shared / (query_size + self.gram_counts[candidates] - shared)
+
+        keep = containment >= min_score
+        candidates, containment, similarity = candidates[keep], containment[keep], similarity[keep]
+        # lexsort sorts by the last key first
+        order = np.lexsort((-self.popularity[candidates], -similarity, -containment))[:limit]
+        return [self.match_at(int(candidates[i]), float(containment[i])) for i in order]
+
+    def resolve_many(self, queries: List[str], min_score: float = 0.0) -> List[Optional[TitleMatch]]:
+        """Best match per query, None where nothing scores at least min_score"""
+        result = []
+        for query in queries:
+            matches = self.resolve(query, min_score=min_score)
+            result.append(matches[0] if matches else None)
+        return result
+
+
+_title_resolver: Optional[TitleResolver] = None
+
+
+def get_title_resolver() -> Optional[TitleResolver]:
+    return _title_resolver
+
+
+def build_title_resolver(catalog: Catalog) -> TitleResolver:
+    global _title_resolver
+    _title_resolver = TitleResolver.from_catalog(catalog)
+    logger.info(f"Indexed {len(_title_resolver)} titles for fuzzy title resolution")
+    return _title_resolver
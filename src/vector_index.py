@@ -0,0 +1,413 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Iterable, List, Optional
+import numpy as np
+from qdrant_client import models
+from .config import settings
+from .text import normalize_text
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_NAME = "movies_plot"
+VECTORS_FILE = "vectors.npy"
+TITLES_FILE = "titles.json"
+META_FILE = "meta.json"
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+# Which snapshot the codes were built from
+QUANTIZED_META_FILE = "quantized.json"
+# Rows widened to float32 at a time when scoring float16 or int8 rows; small
+# enough that the temporary stays in cache, which matters more than BLAS call overhead
+SCORE_CHUNK_ROWS = 256
+
+
+class PlotVectorIndex:
+    """
+    In-process copy of the movies_plot collection: one contiguous matrix,
+    memory-mapped from a local snapshot, with the titles alongside.
+    Similarity is a single matrix-vector product followed by top-k selection.
+    """
+
+    def __init__(self, vectors: np.ndarray, titles: List[str], metric: str = "Cosine",
+                 snapshot_id: Optional[str] = None):
+        if metric not in ("Cosine", "Dot"):
+            raise ValueError(f"Unsupported distance for the embedded index: {metric}")
+        self.vectors = vectors
+        self.titles = titles
+        self.metric = metric
+        self.snapshot_id = snapshot_id
+        self.keys = [normalize_text(title) for title in titles]
+        self.positions = {}
+        for position, key in enumerate(self.keys):
+            self.positions.setdefault(key, position)
+
+    @classmethod
+    def load(cls, directory: str) -> "PlotVectorIndex":
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, TITLES_FILE)) as f:
+            titles = json.load(f)
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        if len(titles) != vectors.shape[0]:
+            raise ValueError(f"Snapshot in {directory} has {vectors.shape[0]} vectors but {len(titles)} titles")
+        return cls(vectors, titles, metric=meta.get("metric", "Cosine"), snapshot_id=meta.get("snapshot_id"))
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def prepare_query(self, vector: Iterable[float]) -> np.ndarray:
+        query = np.asarray(vector, dtype=np.float32)
+        if self.metric == "Cosine":
+            norm = np.linalg.norm(query)
+            if norm > 0:
+                query = query / norm
+        return query
+
+    def lookup(self, titles: List[str]) -> List[Optional[np.ndarray]]:
+        """Exact normalized-title lookup; None for titles not in the snapshot"""
+        result = []
+        for title in titles:
+            position = self.positions.get(normalize_text(title))
+            result.append(None if position is None else np.asarray(self.vectors[position], dtype=np.float32))
+        return result
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        if self.vectors.dtype == np.float32:
+            return self.vectors @ query
+        # NumPy has no BLAS path for float16, widen in cache-friendly chunks
+        out = np.empty(self.vectors.shape[0], dtype=np.float32)
+        for start in range(0, self.vectors.shape[0], SCORE_CHUNK_ROWS):
+            chunk = self.vectors[start:start + SCORE_CHUNK_ROWS]
+            out[start:start + len(chunk)] = chunk.astype(np.float32) @ query
+        return out
+
+    def top_k(self, scores: np.ndarray, k: int) -> np.ndarray:
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    def ranked(self, query: np.ndarray, k: int):
+        """Positions and scores of the k best rows, best first"""
+        scores = self.scores(query)
+        positions = self.top_k(scores, k)
+        return positions, scores[positions]
+
+    def rescored(self, candidates: np.ndarray, query: np.ndarray, k: int):
+        """The k best candidates by their exact float32 scores"""
+        candidates = np.sort(candidates)  # sequential reads from the memory map
+        exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+        order = np.argsort(-exact, kind="stable")[:k]
+        return candidates[order], exact[order]
+
+    def search(
+        self,
+        vector: Iterable[float],
+        top_k: int = 10,
+        score_threshold: Optional[float] = None,
+        exclude: Iterable[str] = (),
+    ) -> List[str]:
+        """
+        Titles of the top_k nearest movies. Titles containing any of the
+        normalized `exclude` strings are skipped, mirroring the full-text
+        must_not filter used against Qdrant.
+        """
+        exclude = [normalize_text(title) for title in exclude]
+        # Over-fetch so excluded titles don't leave the result short
+        positions, scores = self.ranked(self.prepare_query(vector), top_k + 4 * len(exclude))
+
+        titles = []
+        for position, score in zip(positions, scores):
+            if score_threshold is not None and score < score_threshold:
+                break
+            if any(title in self.keys[position] for title in exclude):
+                continue
+            titles.append(self.titles[position])
+            if len(titles) == top_k:
+                break
+        return titles
+
+
+class QuantizedPlotIndex(PlotVectorIndex):
+    """
+    PlotVectorIndex scored on int8 scalar-quantized codes (per-dimension
+    scales, ~4x smaller than float32). The best `rescore` candidates are
+    re-ranked with exact float32 rows read from the memory-mapped snapshot.
+    """
+
+    def __init__(self, vectors: np.ndarray, titles: List[str], codes: np.ndarray, scales: np.ndarray,
+                 metric: str = "Cosine", rescore: int = 256, snapshot_id: Optional[str] = None):
+        super().__init__(vectors, titles, metric=metric, snapshot_id=snapshot_id)
+        self.codes = codes
+        self.scales = scales
+        self.rescore = rescore
+
+    @classmethod
+    def load(cls, directory: str, rescore: int = 256) -> "QuantizedPlotIndex":
+        exact = PlotVectorIndex.load(directory)
+        quantized_meta_path = os.path.join(directory, QUANTIZED_META_FILE)
+        built_from = None
+        if os.path.exists(quantized_meta_path):
+            with open(quantized_meta_path) as f:
+                built_from = json.load(f).get("snapshot_id")
+        # Codes left over from an earlier export would pick candidates from stale vectors
+        if exact.snapshot_id is None or built_from != exact.snapshot_id:
+            raise ValueError(f"Quantized codes in {directory} weren't built from this snapshot, re-run quantize")
+        codes = np.load(os.path.join(directory, CODES_FILE))
+        scales = np.load(os.path.join(directory, SCALES_FILE))
+        if codes.shape != exact.vectors.shape:
+            raise ValueError(f"Quantized codes in {directory} don't match the snapshot, re-run quantize")
+        return cls(exact.vectors, exact.titles, codes, scales, metric=exact.metric, rescore=rescore,
+                   snapshot_id=exact.snapshot_id)
+
+    def approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        # Fold the per-dimension scales into the query once instead of dequantizing rows
+        scaled_query = query * self.scales
+        out = np.empty(self.codes.shape[0], dtype=np.float32)
+        for start in range(0, self.codes.shape[0], SCORE_CHUNK_ROWS):
+            chunk = self.codes[start:start + SCORE_CHUNK_ROWS]
+            out[start:start + len(chunk)] = chunk.astype(np.float32) @ scaled_query
+        return out
+
+    def ranked(self, query: np.ndarray, k: int):
+        return self.rescored(self.top_k(self.approximate_scores(query), max(k, self.rescore)), query, k)
+
+
+class PrefixPlotIndex(PlotVectorIndex):
+    """
+    PlotVectorIndex that picks candidates on the first `dims` dimensions of
+    each vector. Matryoshka embeddings such as jina-embeddings-v3 are trained
+    to rank well when truncated, and a 128-dimension prefix is an eighth of
+    the bytes the full product has to stream. The best `rescore` candidates
+    are re-ranked with the full rows from the memory-mapped snapshot.
+    """
+
+    def __init__(self, vectors: np.ndarray, titles: List[str], dims: int = 128,
+                 metric: str = "Cosine", rescore: int = 256, snapshot_id: Optional[str] = None):
+        super().__init__(vectors, titles, metric=metric, snapshot_id=snapshot_id)
+        if not 0 < dims < vectors.shape[1]:
+            raise ValueError(f"Prefix of {dims} dimensions for {vectors.shape[1]}-dimension vectors")
+        prefix = np.ascontiguousarray(vectors[:, :dims], dtype=np.float32)
+        if metric == "Cosine":
+            # Truncated Matryoshka embeddings are compared after renormalizing
+            norms = np.linalg.norm(prefix, axis=1, keepdims=True)
+            prefix /= np.where(norms == 0, 1, norms)
+        self.prefix = prefix
+        self.dims = dims
+        self.rescore = rescore
+
+    @classmethod
+    def load(cls, directory: str, dims: int = 128, rescore: int = 256) -> "PrefixPlotIndex":
+        exact = PlotVectorIndex.load(directory)
+        return cls(exact.vectors, exact.titles, dims=dims, metric=exact.metric, rescore=rescore,
+                   snapshot_id=exact.snapshot_id)
+
+    def ranked(self, query: np.ndarray, k: int):
+        # Scaling the query prefix doesn't change the order, no need to renormalize it
+        candidates = self.top_k(self.prefix @ query[:self.dims], max(k, self.rescore))
+        return self.rescored(candidates, query, k)
+
+
+def quantize(vectors: np.ndarray, quantile: float = 1.0):
+    """
+    Symmetric per-dimension int8 quantization. Values beyond the given
+    quantile of each dimension's magnitude are clipped.
+    """
+    magnitudes = np.abs(np.asarray(vectors, dtype=np.float32))
+    limits = np.quantile(magnitudes, quantile, axis=0) if quantile < 1.0 else magnitudes.max(axis=0)
+    scales = (np.where(limits == 0, 1.0, limits) / 127).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+def write_quantized(directory: str, quantile: float = 1.0) -> int:
+    exact = PlotVectorIndex.load(directory)
+    if exact.vectors.dtype != np.float32:
+        raise ValueError("Quantized mode rescores against exact vectors, export the snapshot as float32")
+    if exact.snapshot_id is None:
+        raise ValueError(f"Snapshot in {directory} has no snapshot_id, re-export it")
+    codes, scales = quantize(exact.vectors, quantile)
+    quantized_meta = {"snapshot_id": exact.snapshot_id, "quantile": quantile}
+    # The meta file goes last, so interrupted writes leave codes that load refuses
+    for name, write in (
+        (CODES_FILE, lambda f: np.save(f, codes)),
+        (SCALES_FILE, lambda f: np.save(f, scales)),
+        (QUANTIZED_META_FILE, lambda f: f.write(json.dumps(quantized_meta).encode("utf-8"))),
+    ):
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+    return len(exact)
+
+
+def recall_report(directory: str, quantiles: List[float], rescores: List[int],
+                  queries: int = 200, k: int = 10, seed: int = 0, prefix_dims: List[int] = ()) -> List[dict]:
+    """Recall@k of quantized and prefix search against exact search, using snapshot rows as queries"""
+    exact = PlotVectorIndex.load(directory)
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(exact), size=min(queries, len(exact)), replace=False)
+    query_vectors = [exact.prepare_query(exact.vectors[position]) for position in sample]
+    truth = [set(exact.ranked(query, k)[0].tolist()) for query in query_vectors]
+
+    report = []
+    for quantile in quantiles:
+        codes, scales = quantize(exact.vectors, quantile)
+        for rescore in rescores:
+            index = QuantizedPlotIndex(exact.vectors, exact.titles, codes, scales, metric=exact.metric, rescore=rescore)
+            hits = sum(
+                len(expected & set(index.ranked(query, k)[0].tolist()))
+                for query, expected in zip(query_vectors, truth)
+            )
+            report.append({
+                "quantile": quantile,
+                "rescore": rescore,
+                f"recall@{k}": hits / (k * len(query_vectors)),
+                "code_bytes": int(codes.nbytes),
+                "float32_bytes": int(exact.vectors.nbytes),
+            })
+    for dims in prefix_dims:
+        index = PrefixPlotIndex(exact.vectors, exact.titles, dims=dims, metric=exact.metric)
+        for rescore in rescores:
+            index.rescore = rescore
+            hits = sum(
+                len(expected & set(index.ranked(query, k)[0].tolist()))
+                for query, expected in zip(query_vectors, truth)
+            )
+            report.append({
+                "prefix_dims": dims,
+                "rescore": rescore,
+                f"recall@{k}": hits / (k * len(query_vectors)),
+                "prefix_bytes": int(index.prefix.nbytes),
+                "float32_bytes": int(exact.vectors.nbytes),
+            })
+    return report
+
+
+_plot_index: Optional[PlotVectorIndex] = None
+
+
+def get_plot_index() -> Optional[PlotVectorIndex]:
+    return _plot_index
+
+
+def load_plot_index(directory: str, quantized: bool = False, rescore: int = 256,
+                    prefix_dims: Optional[int] = None) -> Optional[PlotVectorIndex]:
+    global _plot_index
+    try:
+        if quantized:
+            _plot_index = QuantizedPlotIndex.load(directory, rescore=rescore)
+        elif prefix_dims:
+            _plot_index = PrefixPlotIndex.load(directory, dims=prefix_dims, rescore=rescore)
+        else:
+            _plot_index = PlotVectorIndex.load(directory)
+        logger.info(f"Loaded {len(_plot_index)} plot vectors from {directory}")
+    except Exception as e:
+        logger.error(f"Failed to load plot vector snapshot from {directory}, using Qdrant: {e}")
+        _plot_index = None
+    return _plot_index
+
+
+def snapshot_id(vectors: np.ndarray, titles: List[str]) -> str:
+    """Checksum of a snapshot's contents; quantized codes are only valid for the same id"""
+    digest = hashlib.sha256()
+    digest.update(str(vectors.dtype).encode("utf-8"))
+    digest.update(np.ascontiguousarray(vectors).tobytes())
+    digest.update(json.dumps(titles).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+async def export_snapshot(directory: str, dtype: str = "float32", batch_size: int = 1024) -> int:
+    """Dump movies_plot to a snapshot directory, replacing any previous snapshot atomically"""
+    from .qdrant_client_singleton import QdrantClientSingleton
+
+    client = await QdrantClientSingleton.get_instance()
+    collection = await client.get_collection(COLLECTION_NAME)
+    metric = collection.config.params.vectors.distance.value
+
+    titles, rows = [], []
+    offset = None
+    while True:
+        points, offset = await client.scroll(
+            collection_name=COLLECTION_NAME,
+            limit=batch_size,
+            offset=offset,
+            with_payload=["title"],
+            with_vectors=True,
+        )
+        for point in points:
+            if point.vector is None or not point.payload.get("title"):
+                continue
+            titles.append(point.payload["title"])
+            rows.append(point.vector)
+        if offset is None:
+            break
+
+    vectors = np.asarray(rows, dtype=np.float32)
+    if metric == models.Distance.COSINE.value:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+    vectors = np.ascontiguousarray(vectors.astype(dtype))
+
+    os.makedirs(directory, exist_ok=True)
+    meta = {
+        "collection": COLLECTION_NAME,
+        "metric": metric,
+        "dtype": dtype,
+        "count": len(titles),
+        "dim": int(vectors.shape[1]) if len(titles) else 0,
+        "exported_at": int(time.time()),
+        "snapshot_id": snapshot_id(vectors, titles),
+    }
+    for name, write in (
+        (VECTORS_FILE, lambda f: np.save(f, vectors)),
+        (TITLES_FILE, lambda f: f.write(json.dumps(titles).encode("utf-8"))),
+        (META_FILE, lambda f: f.write(json.dumps(meta).encode("utf-8"))),
+    ):
+        tmp_path = os.path.join(directory, f".{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(directory, name))
+
+    await QdrantClientSingleton.close()
+    return len(titles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the local movies_plot vector snapshot")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    export = subcommands.add_parser("export", help="Export (or refresh) the snapshot from Qdrant")
+    export.add_argument("--path", default=settings.VECTOR_SNAPSHOT_DIR)
+    export.add_argument("--dtype", default=settings.VECTOR_SNAPSHOT_DTYPE, choices=["float32", "float16"])
+    quantize_parser = subcommands.add_parser("quantize", help="Build int8 codes for an exported float32 snapshot")
+    quantize_parser.add_argument("--path", default=settings.VECTOR_SNAPSHOT_DIR)
+    quantize_parser.add_argument("--quantile", type=float, default=settings.VECTOR_QUANTIZATION_QUANTILE)
+    recall = subcommands.add_parser("recall", help="Report recall@10 of quantized and prefix against exact search")
+    recall.add_argument("--path", default=settings.VECTOR_SNAPSHOT_DIR)
+    recall.add_argument("--quantiles", type=float, nargs="+", default=[1.0, 0.999, 0.99])
+    recall.add_argument("--rescore", type=int, nargs="+", default=[0, 64, 256, 512])
+    recall.add_argument("--prefix-dims", type=int, nargs="*", default=[128, 256, 512])
+    recall.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        count = asyncio.run(export_snapshot(args.path, dtype=args.dtype))
+        logger.info(f"Exported {count} vectors to {args.path}")
+    elif args.command == "quantize":
+        count = write_quantized(args.path, args.quantile)
+        logger.info(f"Quantized {count} vectors in {args.path}")
+    elif args.command == "recall":
+        for row in recall_report(args.path, args.quantiles, args.rescore, queries=args.queries,
+                                 prefix_dims=args.prefix_dims):
+            print(json.dumps(row))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,10 @@
+import os
+
+# Settings require the service credentials; none of the tests reach those services
+for name in (
+    "OPENAI_API_KEY", "NEO4J_URI", "NEO4J_USER", "NEO4J_PASSWORD", "GROQ_API_KEY",
+    "QDRANT_API_KEY", "QDRANT_URI", "SERP_API_KEY", "BRAVE_SEARCH_API_KEY",
+    "GEMINI_API_KEY", "REDDIT_CLIENT_ID", "REDDIT_SECRET", "JINA_API_KEY",
+):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("EMBEDDING_CACHE_PATH", "")
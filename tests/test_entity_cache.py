@@ -0,0 +1,117 @@
+import asyncio
+import time
+import numpy as np
+from src.cache import LRUCache
+from src.entity import MovieEntities
+from src.entity_cache import EntityCache, QueryVectors
+
+VECTORS = {
+    "90s horror movies": [1.0, 0.0, 0.0],
+    "horror films from the 90s": [0.99, 0.1, 0.0],
+    "scary movies from the nineties": [0.98, 0.0, 0.15],
+    "movies like heat": [0.0, 1.0, 0.0],
+}
+HORROR = MovieEntities(genre=["horror"], year_start=1990, year_end=1999)
+FROM_LLM = MovieEntities(genre=["comedy"])
+
+
+def embedder(delay: float = 0.0):
+    async def embed(text):
+        await asyncio.sleep(delay)
+        return VECTORS[text]
+    return embed
+
+
+def llm(delay: float, entities: MovieEntities = FROM_LLM, calls=None):
+    async def extractor():
+        try:
+            yield ("partial", {"genre": entities.genre})
+            await asyncio.sleep(delay)
+            yield ("result", entities)
+        except asyncio.CancelledError:
+            if calls is not None:
+                calls.append("cancelled")
+            raise
+    return extractor
+
+
+async def collect(cache: EntityCache, query: str, extractor):
+    return [message async for message in cache.extract(query, extractor)]
+
+
+async def settle(cache: EntityCache):
+    await asyncio.gather(*cache._tasks)
+
+
+def test_slow_embedding_does_not_delay_the_llm():
+    async def run():
+        cache = EntityCache(embedder(delay=0.5), similarity_threshold=0.9)
+        cache.set("90s horror movies", HORROR)
+        await asyncio.sleep(0.6)
+        started = time.perf_counter()
+        messages = await collect(cache, "movies like heat", llm(0.05))
+        return messages, time.perf_counter() - started, cache
+
+    messages, elapsed, cache = asyncio.run(run())
+    assert messages[-1] == ("result", FROM_LLM)
+    assert elapsed < 0.3
+    assert cache.get("movies like heat") == FROM_LLM
+
+
+def test_semantic_hit_cancels_a_slower_llm():
+    async def run():
+        cache = EntityCache(embedder(), similarity_threshold=0.9)
+        cache.set("90s horror movies", HORROR)
+        await settle(cache)
+        calls = []
+        started = time.perf_counter()
+        messages = await collect(cache, "horror films from the 90s", llm(1.0, calls=calls))
+        return messages, time.perf_counter() - started, calls, cache
+
+    messages, elapsed, calls, cache = asyncio.run(run())
+    assert messages[-1] == ("cached", HORROR)
+    assert elapsed < 0.5
+    assert calls == ["cancelled"]
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_expired_best_match_falls_through_to_the_next_one():
+    async def run():
+        cache = EntityCache(embedder(), ttl=0.1, similarity_threshold=0.9)
+        cache.set("horror films from the 90s", MovieEntities(genre=["horror"], year_start=1991))
+        await settle(cache)
+        await asyncio.sleep(0.15)
+        cache.set("scary movies from the nineties", HORROR)
+        await settle(cache)
+        return await collect(cache, "90s horror movies", llm(1.0))
+
+    # The expired entry scores 0.99, the live one 0.98
+    assert asyncio.run(run())[-1] == ("cached", HORROR)
+
+
+def test_filters_are_part_of_the_key():
+    async def run():
+        cache = EntityCache(embedder(), similarity_threshold=0.9)
+        cache.set("90s horror movies", HORROR, min_year="1990")
+        await settle(cache)
+        return await collect(cache, "horror films from the 90s", llm(0.01))
+
+    assert asyncio.run(run())[-1] == ("result", FROM_LLM)
+
+
+def test_lru_membership_respects_ttl():
+    cache = LRUCache(ttl=0.05)
+    cache.set("a", 1)
+    assert "a" in cache
+    time.sleep(0.1)
+    assert "a" not in cache
+
+
+def test_query_vectors_stay_contiguous():
+    vectors = QueryVectors(dim=2, capacity=2)
+    for i, query in enumerate(["a", "b", "c", "d"]):
+        vectors.add(query, np.array([i, 1], dtype=np.float32))
+    vectors.remove("b")
+    assert sorted(vectors) == ["a", "c", "d"]
+    scores = dict(zip(vectors.queries, vectors.scores(np.array([1, 0], dtype=np.float32))))
+    assert scores == {"a": 0.0, "c": 2.0, "d": 3.0}
@@ -0,0 +1,102 @@
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+import pytest
+from src import title_extractor
+from src.extractor import MovieExtractor
+from src.title_extractor import TitleExtractor
+
+# What the LLM finds in each comment the local extractor can't place
+LLM_ANSWERS = {
+    "that one with the spinning top at the end": ["Inception"],
+    "nolan's batman films": ["Batman Begins", "The Dark Knight"],
+    "great thread, thanks": [],
+}
+
+
+class FakeLLM:
+    """Answers the batch prompt from LLM_ANSWERS and records the comments it was sent"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.prompts = []
+
+    async def ainvoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if self.error is not None:
+            raise self.error
+        comments = re.findall(r"^\s*\[(t\d+c\d+)\] (.*)$", prompt, flags=re.MULTILINE)
+        answer = {"comments": [{"id": comment_id, "movies": LLM_ANSWERS[text]} for comment_id, text in comments]}
+        return SimpleNamespace(content=json.dumps(answer))
+
+    def sent(self):
+        return [text for prompt in self.prompts for _, text in re.findall(r"^\s*\[(t\d+c\d+)\] (.*)$", prompt, flags=re.MULTILINE)]
+
+
+THREADS = {
+    "https://www.reddit.com/r/movies/1": ["Rewatched Heat last night", "that one with the spinning top at the end"],
+    "https://www.reddit.com/r/movies/2": ["nolan's batman films", "I'd go with Heat and Collateral", "great thread, thanks"],
+}
+
+
+@pytest.fixture(autouse=True)
+def local_titles(monkeypatch):
+    monkeypatch.setattr(title_extractor, "_title_extractor", TitleExtractor(["Heat", "Collateral", "Inception"]))
+
+
+def test_local_and_llm_results_are_merged_per_thread():
+    llm = FakeLLM()
+    results = asyncio.run(MovieExtractor(llm=llm).aextract_movies_batch(THREADS))
+    assert results == {
+        "https://www.reddit.com/r/movies/1": ["Heat", "Inception"],
+        "https://www.reddit.com/r/movies/2": ["Batman Begins", "The Dark Knight", "Heat", "Collateral"],
+    }
+    # One request for both threads, with only the comments the local extractor couldn't place
+    assert len(llm.prompts) == 1
+    assert sorted(llm.sent()) == sorted(LLM_ANSWERS)
+
+
+def test_seen_comments_never_go_back_to_the_llm():
+    llm = FakeLLM()
+    extractor = MovieExtractor(llm=llm)
+    first = asyncio.run(extractor.aextract_movies_batch(THREADS))
+    # Same comments, different threads and spacing/case: the comment hash still matches
+    reposted = {"https://www.reddit.com/r/movies/3": ["That one  with the spinning top at the end", "Great thread, thanks"]}
+    again = asyncio.run(extractor.aextract_movies_batch(reposted))
+    assert len(llm.prompts) == 1
+    assert again == {"https://www.reddit.com/r/movies/3": ["Inception"]}
+    assert asyncio.run(extractor.aextract_movies_batch(THREADS)) == first
+    assert len(llm.prompts) == 1
+
+
+def test_duplicate_comments_are_sent_once():
+    llm = FakeLLM()
+    threads = {"a": ["great thread, thanks"], "b": ["great thread, thanks"]}
+    asyncio.run(MovieExtractor(llm=llm).aextract_movies_batch(threads))
+    assert llm.sent() == ["great thread, thanks"]
+
+
+def test_llm_failure_keeps_local_matches():
+    llm = FakeLLM(error=RuntimeError("provider down"))
+    extractor = MovieExtractor(llm=llm)
+    results = asyncio.run(extractor.aextract_movies_batch(THREADS))
+    assert results == {
+        "https://www.reddit.com/r/movies/1": ["Heat"],
+        "https://www.reddit.com/r/movies/2": ["Heat", "Collateral"],
+    }
+    # Failures aren't cached, the next search asks again
+    llm.error = None
+    results = asyncio.run(extractor.aextract_movies_batch(THREADS))
+    assert results["https://www.reddit.com/r/movies/1"] == ["Heat", "Inception"]
+    assert len(llm.prompts) == 2
+
+
+def test_unparseable_response_keeps_local_matches():
+    class Garbled(FakeLLM):
+        async def ainvoke(self, prompt, **kwargs):
+            self.prompts.append(prompt)
+            return SimpleNamespace(content="Sorry, I can't help with that.")
+
+    results = asyncio.run(MovieExtractor(llm=Garbled()).aextract_movies_batch(THREADS))
+    assert results["https://www.reddit.com/r/movies/2"] == ["Heat", "Collateral"]
@@ -0,0 +1,103 @@
+import random
+import pytest
+from src.catalog import Catalog
+from src.entity import MovieEntities
+from src.genre_year_index import GenreYearIndex
+
+GENRES = ["action", "comedy", "drama", "horror", "romance"]
+
+
+def random_catalog(movies: int = 400, seed: int = 0) -> Catalog:
+    """Coarse popularity so ties are common, and some movies without a year"""
+    rng = random.Random(seed)
+    catalog = Catalog()
+    for movie_id in range(movies):
+        catalog.append({
+            "id": movie_id,
+            "title": f"movie {movie_id}",
+            "popularity": float(rng.randrange(10)),
+            "year": None if rng.random() < 0.1 else rng.randrange(1980, 2000),
+            "genres": rng.sample(GENRES, rng.randint(0, 3)),
+        })
+    return catalog
+
+
+catalog = random_catalog()
+index = GenreYearIndex(catalog)
+
+
+def brute_force(entities: MovieEntities, limit: int):
+    """Filter the whole catalog, most popular first, ties in catalog order"""
+    genres = {genre.lower() for genre in entities.genre or []}
+    matches = []
+    for position in range(len(catalog)):
+        year, movie_genres = catalog.years[position], set(catalog.genres[position])
+        if genres:
+            if entities.genres_union and not genres & movie_genres:
+                continue
+            if not entities.genres_union and not genres <= movie_genres:
+                continue
+        if entities.year_start or entities.year_end:
+            if year is None:
+                continue
+            if entities.year_start and year < entities.year_start:
+                continue
+            if entities.year_end and year > entities.year_end:
+                continue
+        matches.append(position)
+    matches.sort(key=lambda position: -catalog.popularity[position])
+    return [catalog.titles[position] for position in matches[:limit]]
+
+
+CASES = {
+    "everything": MovieEntities(),
+    "one genre": MovieEntities(genre=["drama"]),
+    "genre case": MovieEntities(genre=["Drama"]),
+    "union": MovieEntities(genre=["horror", "romance"], genres_union=True),
+    "intersection": MovieEntities(genre=["horror", "romance"], genres_union=False),
+    "intersection of three": MovieEntities(genre=["action", "comedy", "drama"]),
+    "closed range": MovieEntities(year_start=1985, year_end=1989),
+    "single year": MovieEntities(year_start=1990, year_end=1990),
+    "open end": MovieEntities(year_start=1995),
+    "open start": MovieEntities(year_end=1983),
+    "union in range": MovieEntities(genre=["action", "comedy"], genres_union=True, year_start=1990, year_end=1994),
+    "intersection in range": MovieEntities(genre=["action", "drama"], year_start=1985),
+    "range outside the catalog": MovieEntities(year_start=2010),
+    "unknown genre": MovieEntities(genre=["western"]),
+    "unknown genre in union": MovieEntities(genre=["western", "horror"], genres_union=True),
+    "unknown genre in intersection": MovieEntities(genre=["western", "horror"]),
+}
+
+
+@pytest.mark.parametrize("limit", [1, 10, 1000])
+@pytest.mark.parametrize("case", CASES)
+def test_top_matches_brute_force(case, limit):
+    assert index.top(CASES[case], limit) == brute_force(CASES[case], limit)
+
+
+def test_movies_without_a_year_only_match_without_year_filters():
+    no_year = {catalog.titles[p] for p in range(len(catalog)) if catalog.years[p] is None}
+    assert no_year
+    assert no_year <= set(index.top(MovieEntities(), len(catalog)))
+    assert not no_year & set(index.top(MovieEntities(year_start=1900), len(catalog)))
+    assert not no_year & set(index.top(MovieEntities(year_end=2100), len(catalog)))
+
+
+def test_union_lists_each_movie_once():
+    titles = index.top(MovieEntities(genre=GENRES, genres_union=True), len(catalog))
+    assert len(titles) == len(set(titles))
+
+
+def test_popularity_ties_keep_catalog_order():
+    tied = Catalog()
+    for movie_id, popularity in enumerate([1.0, 5.0, 1.0, 5.0, 1.0]):
+        tied.append({"id": movie_id, "title": f"movie {movie_id}", "popularity": popularity,
+                     "year": 2000, "genres": ["drama"]})
+    titles = GenreYearIndex(tied).top(MovieEntities(genre=["drama"], year_start=1999), 5)
+    assert titles == ["movie 1", "movie 3", "movie 0", "movie 2", "movie 4"]
+
+
+def test_can_answer_only_genre_and_year_queries():
+    assert GenreYearIndex.can_answer(MovieEntities(genre=["drama"], year_start=1990))
+    assert not GenreYearIndex.can_answer(MovieEntities(genre=["drama"], movie=["Heat"]))
+    assert not GenreYearIndex.can_answer(MovieEntities(actor=["Al Pacino"]))
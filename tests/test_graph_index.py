@@ -0,0 +1,43 @@
+from src.catalog import Catalog
+from src.entity import MovieEntities
+from src.graph_index import GraphSimilarityIndex
+
+MOVIES = [
+    # id, title, popularity, year, genres, directors, actors
+    (1, "Heat", 50.0, 1995, ["crime", "thriller"], ["mann"], ["pacino", "de niro"]),
+    (2, "Collateral", 30.0, 2004, ["crime", "action"], ["mann"], ["cruise"]),
+    (3, "The Insider", 20.0, 1999, ["drama"], ["mann"], ["pacino", "crowe"]),
+    (4, "Frozen", 90.0, 2013, ["animation", "family"], ["buck"], ["bell"]),
+    (5, "Toy Story", 80.0, 1995, ["animation", "family"], ["lasseter"], ["hanks"]),
+]
+
+
+def catalog() -> Catalog:
+    catalog = Catalog()
+    for movie_id, title, popularity, year, genres, directors, actors in MOVIES:
+        catalog.append({
+            "id": movie_id, "title": title, "popularity": popularity, "year": year,
+            "genres": genres, "directors": directors, "actors": actors,
+        })
+    return catalog
+
+
+index = GraphSimilarityIndex(catalog())
+
+
+def test_similar_ranks_shared_people_and_genres():
+    titles = [title for _, title in index.similar(MovieEntities(movie=["Heat"]))]
+    assert titles[:2] == ["The Insider", "Collateral"]
+    assert "Heat" not in titles
+
+
+def test_unknown_reference_returns_nothing():
+    assert index.similar(MovieEntities(movie=["Nonexistent movie"])) == []
+    assert index.similar(MovieEntities(movie=["Nonexistent movie"], genre=["animation"], genres_union=True)) == []
+
+
+def test_resolved_ids_and_unresolved_titles_both_count_as_references():
+    refs = index.reference_positions(["toy story"], movie_ids=[1])
+    assert sorted(index.ids[p] for p in refs) == [1, 5]
+    titles = [title for _, title in index.similar(MovieEntities(movie=["Heat", "toy story"]), refs=refs)]
+    assert "Heat" not in titles and "Toy Story" not in titles
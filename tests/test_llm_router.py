@@ -0,0 +1,147 @@
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from src.llm_router import HedgedLLMRouter, LLMDeadlineError
+
+
+class FakeModel:
+    """Chat model with scripted latency: `latency` to the response or first chunk, `gap` between chunks"""
+
+    def __init__(self, name, latency=0.0, chunks=3, gap=0.0, error=None, gate=None):
+        self.name = name
+        self.latency = latency
+        self.chunks = chunks
+        self.gap = gap
+        self.error = error
+        self.gate = gate
+        self.calls = 0
+        self.closed = 0
+
+    async def _wait(self):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        await asyncio.sleep(self.latency)
+        if self.error is not None:
+            raise self.error
+
+    async def ainvoke(self, prompt, **kwargs):
+        await self._wait()
+        return SimpleNamespace(content=self.name)
+
+    async def astream(self, prompt, **kwargs):
+        try:
+            await self._wait()
+            for i in range(self.chunks):
+                if i:
+                    await asyncio.sleep(self.gap)
+                yield SimpleNamespace(content=f"{self.name}{i}")
+        finally:
+            self.closed += 1
+
+
+def router(*models, **kwargs):
+    kwargs.setdefault("default_hedge_delay", 0.1)
+    kwargs.setdefault("min_hedge_delay", 0.0)
+    return HedgedLLMRouter([(model.name, model) for model in models], **kwargs)
+
+
+async def timed(coroutine):
+    started = time.perf_counter()
+    result = await coroutine
+    return result, time.perf_counter() - started
+
+
+async def collect(stream):
+    return [chunk.content async for chunk in stream]
+
+
+def test_slow_primary_is_hedged():
+    slow, fast = FakeModel("slow", latency=1.0), FakeModel("fast", latency=0.05)
+    llm = router(slow, fast)
+    response, elapsed = asyncio.run(timed(llm.ainvoke("prompt")))
+    assert response.content == "fast"
+    assert elapsed < 0.4
+    assert llm.hedges == 1
+    assert llm.providers[1].wins == 1
+
+
+def test_fast_primary_is_not_hedged():
+    primary, backup = FakeModel("primary", latency=0.01), FakeModel("backup")
+    llm = router(primary, backup)
+    assert asyncio.run(llm.ainvoke("prompt")).content == "primary"
+    assert backup.calls == 0
+
+
+def test_failure_fails_over_without_waiting_for_the_hedge_delay():
+    broken, backup = FakeModel("broken", error=RuntimeError("503")), FakeModel("backup", latency=0.01)
+    llm = router(broken, backup, default_hedge_delay=5.0)
+    response, elapsed = asyncio.run(timed(llm.ainvoke("prompt")))
+    assert response.content == "backup"
+    assert elapsed < 0.5
+    assert llm.providers[0].errors == 1
+
+
+def test_last_error_is_raised_when_every_provider_fails():
+    llm = router(FakeModel("a", error=RuntimeError("a down")), FakeModel("b", error=ValueError("b down")))
+    with pytest.raises(ValueError, match="b down"):
+        asyncio.run(llm.ainvoke("prompt"))
+
+
+def test_ainvoke_deadline():
+    llm = router(FakeModel("a", latency=2.0), FakeModel("b", latency=2.0), deadline=0.3)
+    with pytest.raises(LLMDeadlineError):
+        asyncio.run(llm.ainvoke("prompt"))
+    assert llm.deadline_errors == 1
+
+
+def test_stream_hedges_on_first_chunk_and_closes_the_loser():
+    slow, fast = FakeModel("slow", latency=1.0), FakeModel("fast", latency=0.05)
+    llm = router(slow, fast)
+
+    async def run():
+        chunks, elapsed = await timed(collect(llm.astream("prompt")))
+        return chunks, elapsed, (slow.closed, fast.closed)
+
+    chunks, elapsed, closed = asyncio.run(run())
+    assert chunks == ["fast0", "fast1", "fast2"]
+    assert elapsed < 0.4
+    assert closed == (1, 1)
+
+
+def test_stream_deadline_covers_every_chunk():
+    # First chunk right away, then a second-long gap: the deadline must still hold
+    llm = router(FakeModel("a", chunks=4, gap=1.0), deadline=0.5)
+
+    async def run():
+        chunks = []
+        with pytest.raises(LLMDeadlineError):
+            async for chunk in llm.astream("prompt"):
+                chunks.append(chunk.content)
+        return chunks
+
+    chunks, elapsed = asyncio.run(timed(run()))
+    assert chunks == ["a0"]
+    assert elapsed < 0.8
+    assert llm.deadline_errors == 1
+    assert llm.providers[0].model.closed == 1
+
+
+def test_streams_finishing_together_with_the_winner_are_closed():
+    gate = asyncio.Event()
+    first, second = FakeModel("first", gate=gate), FakeModel("second", gate=gate)
+    llm = router(first, second, default_hedge_delay=0.0)
+
+    async def run():
+        stream = llm.astream("prompt")
+        consumer = asyncio.create_task(collect(stream))
+        await asyncio.sleep(0.05)
+        gate.set()
+        chunks = await consumer
+        # Checked before asyncio.run finalizes leftover generators itself
+        return chunks, (first.closed, second.closed)
+
+    chunks, closed = asyncio.run(run())
+    assert len(chunks) == 3
+    assert closed == (1, 1)
@@ -0,0 +1,47 @@
+import asyncio
+import httpx
+from src import main
+from src.config import settings
+
+
+def post(path, headers=None, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+            return await api.post(path, headers=headers or {}, **kwargs)
+    return asyncio.run(run())
+
+
+def fill_cache():
+    main.movie_cache.clear()
+    for movie_id in (1, 2, 3):
+        main.movie_cache.set(movie_id, {"id": movie_id})
+
+
+def test_invalidation_is_disabled_without_admin_token(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "")
+    fill_cache()
+    assert post("/movies/cache/invalidate?all=true", headers={"X-Admin-Token": ""}).status_code == 403
+    assert len(main.movie_cache) == 3
+
+
+def test_invalidation_requires_the_admin_token(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    fill_cache()
+    assert post("/movies/cache/invalidate?all=true").status_code == 403
+    assert post("/movies/cache/invalidate?all=true", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert len(main.movie_cache) == 3
+
+
+def test_clearing_everything_needs_all_true(monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_TOKEN", "secret")
+    admin = {"X-Admin-Token": "secret"}
+    fill_cache()
+    assert "error" in post("/movies/cache/invalidate", headers=admin).json()
+    assert len(main.movie_cache) == 3
+
+    assert post("/movies/cache/invalidate", headers=admin, json=[1, 2]).json() == {"invalidated": 2}
+    assert 3 in main.movie_cache and 1 not in main.movie_cache
+
+    assert post("/movies/cache/invalidate?all=true", headers=admin).json() == {"invalidated": "all"}
+    assert len(main.movie_cache) == 0
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import httpx
+import pytest
+from src import main
+from src.config import settings
+
+CATALOG = {
+    movie_id: {"id": movie_id, "title": title, "title_lower": title.lower(), "genres": ["drama"], "year": 1990 + movie_id}
+    for movie_id, title in enumerate(["Heat", "Alien", "Ran", "Up", "Jaws"], start=1)
+}
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def data(self):
+        return self.rows
+
+    async def __aiter__(self):
+        for row in self.rows:
+            yield row
+
+
+class FakeSession:
+    """Answers the detail queries from CATALOG, in the order of the UNWIND list"""
+
+    def __init__(self):
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, params=None):
+        self.queries.append(params)
+        if "ids" in params:
+            movies = [CATALOG[movie_id] for movie_id in params["ids"] if movie_id in CATALOG]
+        else:
+            movies = [movie for title in params["titles"] for movie in CATALOG.values() if movie["title"] == title]
+        return FakeResult([{"movie": dict(movie)} for movie in movies])
+
+
+class FakeDriver:
+    def __init__(self):
+        self.session_ = FakeSession()
+
+    def session(self):
+        return self.session_
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    fake = FakeDriver()
+    # main.neo4j only exists once init_neo4j has run
+    monkeypatch.setattr(main, "neo4j", fake, raising=False)
+    monkeypatch.setattr(settings, "BATCH_STREAM_CHUNK_SIZE", 2)
+    main.movie_cache.clear()
+    yield fake
+    main.movie_cache.clear()
+
+
+def post(path, **kwargs):
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+            return await api.post(path, **kwargs)
+    return asyncio.run(run())
+
+
+def expected(*ids):
+    return [{key: value for key, value in CATALOG[movie_id].items() if key != "title_lower"} for movie_id in ids]
+
+
+def test_stream_writes_one_json_object_per_line(driver):
+    response = post("/movies/batch-by-ids?stream=true", json=[3, 1, 5, 4, 99])
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text.endswith("\n")
+    lines = response.text.splitlines()
+    assert [json.loads(line) for line in lines] == expected(3, 1, 5, 4)
+    # Chunks of two IDs, one query each
+    assert [params["ids"] for params in driver.session_.queries] == [[3, 1], [5, 4], [99]]
+
+
+def test_stream_serves_cached_movies_without_a_query(driver):
+    post("/movies/batch-by-ids?stream=true", json=[1, 2])
+    driver.session_.queries.clear()
+    response = post("/movies/batch-by-ids?stream=true", json=[2, 1])
+    assert [json.loads(line) for line in response.text.splitlines()] == expected(2, 1)
+    assert driver.session_.queries == []
+
+
+def test_stream_of_no_ids_is_empty(driver):
+    response = post("/movies/batch-by-ids?stream=true", json=[])
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text == ""
+    assert driver.session_.queries == []
+
+
+def test_stream_by_title(driver):
+    response = post("/movies/batch-by-title?stream=true", json=["Jaws", "Heat", "Nope"])
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == expected(5, 1)
+
+
+def test_without_stream_the_response_is_a_json_array(driver):
+    response = post("/movies/batch-by-ids", json=[3, 1, 3, 99])
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected(3, 1)
+
+    response = post("/movies/batch-by-title", json=["Heat", "Alien"])
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected(1, 2)
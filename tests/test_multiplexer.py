@@ -0,0 +1,104 @@
+import asyncio
+import time
+import pytest
+from src.entity import MovieEntities
+from src.multiplexer import BranchStream, multiplex
+from src.speculation import SpeculativeBranch
+
+# Slack for event loop scheduling when comparing arrival times with the script
+TOLERANCE = 0.05
+
+
+async def scripted(name, times, error=None):
+    """Yields f"{name}{i}" at each offset in times (seconds from the start), then its result"""
+    started = time.perf_counter()
+    for i, at in enumerate(times):
+        await asyncio.sleep(max(0.0, at - (time.perf_counter() - started)))
+        yield f"{name}{i}"
+    if error is not None:
+        raise error
+    yield ("result", name)
+
+
+async def arrivals(streams):
+    started = time.perf_counter()
+    return [(message, time.perf_counter() - started) async for message in multiplex(streams)]
+
+
+SCRIPT = {
+    "similarity": [0.02, 0.30],
+    "cypher": [0.10, 0.15, 0.20],
+    "reddit": [0.40],
+}
+
+
+def test_events_arrive_when_their_branch_yields_them():
+    async def run():
+        streams = [BranchStream(scripted(name, times)) for name, times in SCRIPT.items()]
+        return await arrivals(streams), [stream.result for stream in streams]
+
+    events, results = asyncio.run(run())
+    expected = {f"{name}{i}": at for name, times in SCRIPT.items() for i, at in enumerate(times)}
+
+    assert [message for message, _ in events] == sorted(expected, key=expected.get)
+    # Time to first byte is the fastest branch's first event, not the slowest branch's last
+    assert events[0][1] < SCRIPT["similarity"][0] + TOLERANCE
+    for message, arrived in events:
+        assert abs(arrived - expected[message]) < TOLERANCE, message
+    assert results == list(SCRIPT)
+
+
+def test_per_branch_order_is_kept():
+    async def run():
+        return await arrivals([BranchStream(scripted(name, [0.0] * 20)) for name in ("a", "b", "c")])
+
+    messages = [message for message, _ in asyncio.run(run())]
+    for name in ("a", "b", "c"):
+        assert [m for m in messages if m.startswith(name)] == [f"{name}{i}" for i in range(20)]
+
+
+def test_branch_error_surfaces_after_its_earlier_events():
+    async def run():
+        streams = [
+            BranchStream(scripted("ok", [0.0, 0.5])),
+            BranchStream(scripted("bad", [0.0, 0.05], error=RuntimeError("branch failed"))),
+        ]
+        seen = []
+        with pytest.raises(RuntimeError, match="branch failed"):
+            async for message in multiplex(streams):
+                seen.append(message)
+        for stream in streams:
+            stream.cancel()
+        return seen
+
+    assert sorted(asyncio.run(run())) == ["bad0", "bad1", "ok0"]
+
+
+def test_speculative_events_wait_for_reconcile():
+    async def run():
+        runs = []
+
+        def start(entities):
+            runs.append(entities.movie)
+            return scripted(f"run{len(runs)}.", [0.0, 0.05])
+
+        kept = SpeculativeBranch("similarity", ["movie"], start)
+        restarted = SpeculativeBranch("cypher", ["movie"], start)
+        for branch in (kept, restarted):
+            branch.maybe_start({"movie": ["Heat"], "actor": None}, {"movie"})
+        # Both speculative runs finish while the entities are still streaming
+        await asyncio.sleep(0.1)
+
+        streams = [
+            kept.reconcile(MovieEntities(movie=["Heat"])),
+            restarted.reconcile(MovieEntities(movie=["Heat", "Ronin"])),
+        ]
+        return runs, dict(await arrivals(streams))
+
+    runs, events = asyncio.run(run())
+    assert runs == [["Heat"], ["Heat"], ["Heat", "Ronin"]]
+    # The kept run's buffered events go out at once, the restarted branch streams
+    # live and the events of its discarded speculative run never reach the client
+    assert set(events) == {"run1.0", "run1.1", "run3.0", "run3.1"}
+    assert events["run1.0"] < TOLERANCE and events["run1.1"] < TOLERANCE
+    assert abs(events["run3.1"] - 0.05) < TOLERANCE
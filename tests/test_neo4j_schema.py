@@ -0,0 +1,64 @@
+import asyncio
+from types import SimpleNamespace
+from src.neo4j_schema import NORMALIZED_PROPERTIES, check_query_plans, sync_normalized_properties
+
+
+class FakeResult:
+    def __init__(self, plan):
+        self.plan = plan
+
+    async def consume(self):
+        return SimpleNamespace(plan=self.plan)
+
+
+class FakeSession:
+    """Plans by query text: 'BROKEN' fails to plan, 'SCAN' plans with an AllNodesScan"""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, params=None):
+        if "BROKEN" in query:
+            raise RuntimeError("Invalid input 'BROKEN'")
+        leaf = "AllNodesScan" if "SCAN" in query else "NodeIndexSeek"
+        return FakeResult({"operatorType": "ProduceResults", "children": [{"operatorType": leaf}]})
+
+
+class FakeDriver:
+    def session(self):
+        return FakeSession()
+
+
+def test_unplannable_and_scanning_queries_are_offenders():
+    queries = [
+        ("seek", "MATCH (m:Movie {id: $id}) RETURN m", {"id": 1}),
+        ("scan", "MATCH (m) SCAN RETURN m", {}),
+        ("broken", "BROKEN", {}),
+    ]
+    assert asyncio.run(check_query_plans(FakeDriver(), queries)) == ["scan", "broken"]
+
+
+class RecordingSession(FakeSession):
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def run(self, query, params=None):
+        self.statements.append(query)
+        return SimpleNamespace(consume=self.summary)
+
+    async def summary(self):
+        return SimpleNamespace(counters=SimpleNamespace(properties_set=0))
+
+
+def test_normalized_properties_are_recomputed_when_stale():
+    statements = []
+    driver = SimpleNamespace(session=lambda: RecordingSession(statements))
+    asyncio.run(sync_normalized_properties(driver))
+    assert len(statements) == len(NORMALIZED_PROPERTIES)
+    assert "MATCH (n:Movie) WHERE n.title IS NOT NULL AND (n.title_lower IS NULL OR n.title_lower <> toLower(n.title))" in statements[0]
+    for statement, (source, target) in zip(statements, NORMALIZED_PROPERTIES.values()):
+        assert f"n.{target} <> toLower(n.{source})" in statement
+        assert f"SET n.{target} = toLower(n.{source})" in statement
@@ -0,0 +1,117 @@
+import asyncio
+import re
+from types import SimpleNamespace
+from src import main, similarity_job
+from src.entity import MovieEntities
+from src.graph_index import FEATURE_WEIGHTS
+from src.query import CypherQueryGenerator
+
+generator = CypherQueryGenerator()
+HEAT = MovieEntities(movie=["Heat"], movies_present=True)
+HEAT_1995_HORROR = MovieEntities(movie=["Heat"], movies_present=True, genre=["horror"], genres_union=False, year_start=1995)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def data(self):
+        return self.rows
+
+    async def single(self):
+        return self.rows[0] if self.rows else None
+
+    async def consume(self):
+        return SimpleNamespace(counters=SimpleNamespace(relationships_created=len(self.rows)))
+
+
+class FakeSession:
+    """Answers the neighbour probe with has_neighbours and every other query with rows"""
+
+    def __init__(self, has_neighbours=False, rows=()):
+        self.has_neighbours = has_neighbours
+        self.rows = list(rows)
+        self.queries = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def run(self, query, params=None):
+        self.queries.append((query, params))
+        if "has_neighbours" in query:
+            return FakeResult([{"has_neighbours": self.has_neighbours}])
+        return FakeResult(self.rows)
+
+
+class FakeDriver:
+    def __init__(self, session):
+        self._session = session
+
+    def session(self):
+        return self._session
+
+
+def test_precomputed_template_reads_neighbours_instead_of_scoring_every_movie():
+    query, params = generator.generate_query_manually(HEAT_1995_HORROR, precomputed=True)
+    assert "SIMILAR_TO" in query
+    assert "MATCH (m:Movie)\n" not in query and "OPTIONAL MATCH" not in query
+    assert params == {"movies": ["heat"], "genres": ["horror"], "year_start": 1995}
+    live, _ = generator.generate_query_manually(HEAT_1995_HORROR)
+    assert "SIMILAR_TO" not in live
+
+
+def test_probe_covers_resolved_ids_and_unresolved_titles():
+    query, params = generator.neighbours_probe(HEAT)
+    assert params == {"movies": ["heat"]}
+    query, params = generator.neighbours_probe(HEAT, movie_ids=[1], unresolved=["Some Obscure Film"])
+    assert params == {"movie_ids": [1], "movies": ["some obscure film"]}
+    assert "$movie_ids" in query and "SIMILAR_TO" in query
+    assert any(name.startswith("neighbours_probe") for name, _, _ in generator.plan_queries())
+
+
+def test_filters_that_match_nothing_do_not_trigger_live_scoring():
+    session = FakeSession(has_neighbours=True, rows=[{"title": "The Insider"}])
+    assert asyncio.run(main.live_similarity_fallback(session, HEAT_1995_HORROR)) is None
+    # Only the cheap probe ran, not the whole-graph live query
+    assert len(session.queries) == 1
+
+
+def test_references_without_neighbours_fall_back_to_live_scoring():
+    session = FakeSession(has_neighbours=False, rows=[{"title": "The Insider"}])
+    records = asyncio.run(main.live_similarity_fallback(session, HEAT, movie_ids=[1], unresolved=[]))
+    assert records == [{"title": "The Insider"}]
+    live_query, live_params = session.queries[-1]
+    assert (live_query, live_params) == generator.generate_query_manually(HEAT, movie_ids=[1], unresolved=[])
+
+
+def test_rebuild_uses_the_live_scoring_weights():
+    weights = dict(re.findall(r"WHEN '(\w+)' THEN ([\d.]+)", similarity_job.REBUILD_NEIGHBORS))
+    other = float(re.search(r"ELSE ([\d.]+) END", similarity_job.REBUILD_NEIGHBORS).group(1))
+    assert {
+        "directors": float(weights["DIRECTED_BY"]),
+        "actors": float(weights["ACTED_IN"]),
+        "genres": other,
+    } == FEATURE_WEIGHTS
+    live, _ = generator.generate_query_manually(HEAT)
+    assert "COUNT(DISTINCT md) * 2 " in live and "COUNT(DISTINCT mg) * 0.5 " in live
+
+
+def test_rebuild_selects_movies_and_batches_writes():
+    def job(**kwargs):
+        session = FakeSession(rows=[{}] * 3)
+        created = asyncio.run(similarity_job.build_similar_to(FakeDriver(session), **kwargs))
+        (query, params), = session.queries
+        return created, query, params
+
+    created, query, params = job(top_n=20, batch_size=50)
+    assert created == 3
+    assert query.startswith(similarity_job.SELECT_MISSING)
+    assert "IN TRANSACTIONS OF 50 ROWS" in query
+    assert params == {"movie_ids": None, "top_n": 20}
+    assert job(rebuild_all=True)[1].startswith(similarity_job.SELECT_ALL + "\n")
+    _, query, params = job(movie_ids=[4, 7], rebuild_all=True)
+    assert query.startswith(similarity_job.SELECT_IDS)
+    assert params["movie_ids"] == [4, 7]
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+from src import qdrant, qdrant_schema
+from src.qdrant_client_singleton import QdrantClientSingleton
+from src.qdrant_schema import NORMALIZED_TITLE_FIELD
+from src.text import normalize_text
+
+# Twenty remakes of one title ahead of the others in the collection
+TITLES = ["Hamlet"] * 20 + ["Heat", "Alien"]
+
+
+class CountingClient:
+    """Passes calls through to an in-memory client, counting them by method"""
+
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        method = getattr(self.client, name)
+
+        async def counted(*args, **kwargs):
+            self.calls.append(name)
+            return await method(*args, **kwargs)
+        return counted
+
+
+async def collection(backfilled: bool = True) -> CountingClient:
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        "movies_plot", vectors_config=models.VectorParams(size=2, distance=models.Distance.DOT),
+    )
+    await client.upsert("movies_plot", points=[
+        models.PointStruct(
+            id=i, vector=[1.0, float(i)],
+            # Lowercase titles: local Qdrant's MatchText is a case-sensitive substring test
+            payload={"title": title.lower(), **({NORMALIZED_TITLE_FIELD: normalize_text(title)} if backfilled else {})},
+        )
+        for i, title in enumerate(TITLES)
+    ])
+    return CountingClient(client)
+
+
+@pytest.fixture
+def lookup(monkeypatch):
+    def run(backfilled=True, titles=("Hamlet", "Heat", "Alien")):
+        async def go():
+            client = await collection(backfilled)
+            monkeypatch.setattr(QdrantClientSingleton, "_instance", client)
+            monkeypatch.setattr(qdrant_schema, "_normalized_titles_ready", None)
+            qdrant.title_vector_cache.clear()
+            ready = await qdrant_schema.check_normalized_titles(client)
+            client.calls.clear()
+            return ready, await qdrant.get_movie_vectors(list(titles)), client.calls
+        return asyncio.run(go())
+    return run
+
+
+def test_duplicates_of_one_title_do_not_crowd_out_the_others(lookup):
+    ready, vectors, calls = lookup()
+    assert ready
+    assert vectors == [[1.0, 0.0], [1.0, 20.0], [1.0, 21.0]]
+    # One batched request, no full-text fallbacks
+    assert calls == ["query_batch_points"]
+
+
+def test_missing_backfill_skips_the_exact_lookup(lookup):
+    ready, vectors, calls = lookup(backfilled=False, titles=("Heat", "Alien"))
+    assert not ready
+    assert vectors == [[1.0, 20.0], [1.0, 21.0]]
+    assert calls == ["scroll", "scroll"]
+
+
+def test_cached_titles_make_no_calls(monkeypatch):
+    async def go():
+        client = await collection()
+        monkeypatch.setattr(QdrantClientSingleton, "_instance", client)
+        monkeypatch.setattr(qdrant_schema, "_normalized_titles_ready", None)
+        qdrant.title_vector_cache.clear()
+        first = await qdrant.get_movie_vectors(["Heat"])
+        client.calls.clear()
+        return first, await qdrant.get_movie_vectors(["heat"]), client.calls
+
+    first, again, calls = asyncio.run(go())
+    assert first == again == [[1.0, 20.0]]
+    assert calls == []
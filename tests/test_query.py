@@ -0,0 +1,83 @@
+import itertools
+import pytest
+from src.entity import MovieEntities
+from src.query import CypherQueryGenerator
+
+generator = CypherQueryGenerator()
+
+# Pairs of entities with the same shape but different values
+SAME_SHAPE = [
+    (
+        MovieEntities(movie=["Heat"], movies_present=True),
+        MovieEntities(movie=["Alien", "Aliens", "Blade Runner"], movies_present=True),
+    ),
+    (
+        MovieEntities(genre=["horror"], year_start=1990, year_end=1999),
+        MovieEntities(genre=["comedy", "romance"], year_start=2001, year_end=2010),
+    ),
+    (
+        MovieEntities(actor=["Al Pacino", "Robert De Niro"], actors_union=True, genre=["crime"], genres_union=True),
+        MovieEntities(actor=["Meryl Streep"], actors_union=True, genre=["drama", "war"], genres_union=True),
+    ),
+    (
+        MovieEntities(director=["Michael Mann"], year_start=1980),
+        MovieEntities(director=["Kathryn Bigelow", "Denis Villeneuve"], year_start=2015),
+    ),
+    (
+        MovieEntities(movie=["Heat"], genre=["crime"], genres_union=False, actor=["Al Pacino"], year_end=2000),
+        MovieEntities(movie=["Se7en"], genre=["thriller", "mystery"], genres_union=False, actor=["Brad Pitt"], year_end=1999),
+    ),
+]
+
+
+@pytest.mark.parametrize("first, second", SAME_SHAPE)
+@pytest.mark.parametrize("precomputed", [False, True])
+def test_same_shape_gives_identical_query_text(first, second, precomputed):
+    first_query, first_params = generator.generate_query_manually(first, precomputed=precomputed)
+    second_query, second_params = generator.generate_query_manually(second, precomputed=precomputed)
+    assert first_query == second_query
+    assert first_params != second_params
+    assert first_params.keys() == second_params.keys()
+
+
+@pytest.mark.parametrize("first, second", SAME_SHAPE)
+def test_values_only_travel_as_parameters(first, second):
+    query, params = generator.generate_query_manually(first)
+    for value in params.values():
+        for item in value if isinstance(value, list) else [value]:
+            assert str(item) not in query
+    for name in params:
+        assert f"${name}" in query
+
+
+def test_different_shapes_give_different_templates():
+    heat = MovieEntities(movie=["Heat"], movies_present=True)
+    heat_1995 = MovieEntities(movie=["Heat"], movies_present=True, year_start=1995)
+    assert generator.generate_query_manually(heat)[0] != generator.generate_query_manually(heat_1995)[0]
+
+
+def test_every_reachable_shape_has_a_template():
+    people = [None, ["someone"]]
+    for movie, genre, genres_union, year_start, year_end, director, actor, actors_union, precomputed in itertools.product(
+        [None, ["Heat"]], [None, ["drama"]], [False, True], [None, 1990], [None, 2000],
+        people, people, [False, True], [False, True],
+    ):
+        entities = MovieEntities(
+            movie=movie, genre=genre, genres_union=genres_union, year_start=year_start, year_end=year_end,
+            director=director, actor=actor, actors_union=actors_union,
+        )
+        assert generator.shape_of(entities, precomputed=precomputed) in generator.templates
+        assert generator.shape_of(entities, precomputed=precomputed, by_id=True) in generator.templates
+
+
+def test_unresolved_titles_are_still_matched_by_title():
+    entities = MovieEntities(movie=["Heat", "Some Obscure Film"], movies_present=True)
+    query, params = generator.generate_query_manually(entities, movie_ids=[4], unresolved=["Some Obscure Film"])
+    assert params["movie_ids"] == [4]
+    assert params["movies"] == ["some obscure film"]
+    assert "$movie_ids" in query and "CONTAINS movie" in query
+
+    # Everything resolved: the same template, no title matching at run time
+    all_resolved, params = generator.generate_query_manually(entities, movie_ids=[4, 9])
+    assert all_resolved == query
+    assert params["movies"] == []
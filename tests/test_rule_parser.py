@@ -0,0 +1,169 @@
+import itertools
+import time
+import pytest
+from src import genre_year_index, title_resolver
+from src.catalog import Catalog
+from src.config import settings
+from src.entity import GENRES
+from src.genre_year_index import GenreYearIndex
+from src.rule_parser import SUGGESTIONS, RuleBasedParser
+from src.title_resolver import TitleResolver
+
+THRESHOLD = settings.RULE_PARSER_MIN_CONFIDENCE
+FIELDS = ("movies_present", "year_start", "year_end", "genre", "genres_union")
+
+# One movie per genre pair and year, so every filter in the corpus has matches
+CATALOG = [
+    (f"{first} {second} {year}", year, [first, second])
+    for year in range(1920, 2025)
+    for first, second in itertools.combinations(GENRES, 2)
+]
+GENRES_OF = {title: set(genres) for title, _, genres in CATALOG}
+YEAR_OF = {title: year for title, year, _ in CATALOG}
+
+# Queries the parser should answer on its own, with the entities the LLM prompt's rules
+# give; without a reference "movie" holds 1-3 suggestions matching the filters (rule 3)
+LOCAL = [
+    ("90s horror movies", {"year_start": 1990, "year_end": 1999, "genre": ["horror"], "genres_union": False}),
+    ("80s action", {"year_start": 1980, "year_end": 1989, "genre": ["action"], "genres_union": False}),
+    ("00s comedies", {"year_start": 2000, "year_end": 2009, "genre": ["comedy"], "genres_union": False}),
+    ("10s horror", {"year_start": 2010, "year_end": 2019, "genre": ["horror"], "genres_union": False}),
+    ("30s musicals", {"year_start": 1930, "year_end": 1939, "genre": ["musical"], "genres_union": False}),
+    ("films from the 1920s", {"year_start": 1920, "year_end": 1929}),
+    ("best sci-fi films from the 1980s", {"year_start": 1980, "year_end": 1989, "genre": ["sci-fi"], "genres_union": False}),
+    ("comedy and romance movies", {"genre": ["comedy", "romance"], "genres_union": False}),
+    ("horror or thriller", {"genre": ["horror", "thriller"], "genres_union": True}),
+    ("romcoms from the 2000s", {"year_start": 2000, "year_end": 2009, "genre": ["comedy", "romance"], "genres_union": False}),
+    ("anime movies", {"genre": ["animation"], "genres_union": False}),
+    ("action movies after 2010", {"year_start": 2010, "genre": ["action"], "genres_union": False}),
+    ("horror movies before 1980", {"year_end": 1980, "genre": ["horror"], "genres_union": False}),
+    ("drama from 1999", {"year_start": 1999, "year_end": 1999, "genre": ["drama"], "genres_union": False}),
+    ("movies from 1990 to 1999", {"year_start": 1990, "year_end": 1999}),
+    ("westerns between 1960 and 1970", {"year_start": 1960, "year_end": 1970, "genre": ["western"], "genres_union": False}),
+    ("classic film noir", {"year_start": 1920, "year_end": 1960, "genre": ["film-noir"], "genres_union": False}),
+    ("modern horror", {"year_start": 2000, "genre": ["horror"], "genres_union": False}),
+    ("mind-bending movies", {"genre": ["thriller", "sci-fi"], "genres_union": False}),
+    ("movies like Heat", {"movie": ["Heat"], "movies_present": True}),
+    ("movies like alien", {"movie": ["Alien"], "movies_present": True}),
+    ("movies similar to Alien and Inception", {"movie": ["Alien", "Inception"], "movies_present": True}),
+    ("movies like the dark knight or inception", {"movie": ["The Dark Knight", "Inception"], "movies_present": True}),
+]
+
+# Queries that need the LLM: people, themes, ambiguity, references the catalog can't place
+LLM = [
+    "20s movies",
+    "horror movies from the 20s",
+    "movies with Tom Hanks",
+    "nolan movies",
+    "sad movies about dogs",
+    "space movies",
+    "something to watch tonight",
+    "anything but horror",
+    "comedy but not romance",
+    "horror movies that aren't scary",
+    "thriller movies with twists",
+    "top rated dramas",
+    "movies like heat but funnier",
+    "movies like the dark night",
+    "movies like the one with the spinning top",
+    "the godfather",
+]
+
+
+def genre_year_catalog() -> Catalog:
+    catalog = Catalog()
+    for i, (title, year, genres) in enumerate(CATALOG):
+        catalog.append({"id": i, "title": title, "popularity": (i * 7919) % 1000, "year": year, "genres": genres})
+    return catalog
+
+
+GENRE_YEAR_INDEX = GenreYearIndex(genre_year_catalog())
+
+
+@pytest.fixture(autouse=True)
+def catalog_indexes(monkeypatch):
+    resolver = TitleResolver(
+        [1, 2, 3, 4, 5, 6],
+        ["Heat", "The Dark Knight", "Alien", "Aliens", "Inception", "The Godfather"],
+        [5, 9, 7, 6, 8, 10],
+    )
+    monkeypatch.setattr(title_resolver, "_title_resolver", resolver)
+    monkeypatch.setattr(genre_year_index, "_genre_year_index", GENRE_YEAR_INDEX)
+
+
+def matches_filters(title, entities) -> bool:
+    genres = set(entities.genre or [])
+    if genres and not (genres & GENRES_OF[title] if entities.genres_union else genres <= GENRES_OF[title]):
+        return False
+    return (entities.year_start or 0) <= YEAR_OF[title] <= (entities.year_end or 9999)
+
+
+parser = RuleBasedParser()
+
+
+@pytest.mark.parametrize("query, expected", LOCAL)
+def test_simple_queries_are_parsed_locally(query, expected):
+    entities, confidence = parser.parse(query)
+    assert confidence >= THRESHOLD
+    expected = {"movies_present": False, **expected}
+    assert entities.model_dump(include=set(FIELDS), exclude_none=True) == {
+        field: value for field, value in expected.items() if field != "movie"
+    }
+    if "movie" in expected:
+        assert entities.movie == expected["movie"]
+    else:
+        # Suggestions, never an empty movie field
+        assert 1 <= len(entities.movie) <= SUGGESTIONS
+        assert all(matches_filters(title, entities) for title in entities.movie), entities.movie
+    assert entities.search_query == query
+
+
+@pytest.mark.parametrize("query", LLM)
+def test_everything_else_goes_to_the_llm(query):
+    _, confidence = parser.parse(query)
+    assert confidence < THRESHOLD
+
+
+def test_twenties_are_ambiguous():
+    # 1920s or 2020s: a 2020-2029 filter on a silent-film query would return nothing useful
+    _, confidence = parser.parse("20s movies")
+    assert confidence < THRESHOLD
+    entities, confidence = parser.parse("1920s movies")
+    assert (entities.year_start, entities.year_end, confidence) == (1920, 1929, 1.0)
+    entities, confidence = parser.parse("2020s movies")
+    assert (entities.year_start, entities.year_end, confidence) == (2020, 2029, 1.0)
+
+
+def test_no_suggestions_means_the_llm(monkeypatch):
+    # Without the genre/year index, or with nothing matching, the movie field would be empty
+    entities, confidence = parser.parse("90s horror movies", genres="imax, western")
+    assert (entities.movie, confidence) == (None, 0.0)
+    monkeypatch.setattr(genre_year_index, "_genre_year_index", None)
+    entities, confidence = parser.parse("90s horror movies")
+    assert (entities.movie, confidence) == (None, 0.0)
+    assert parser.parse("movies like Heat")[0].movie == ["Heat"]
+
+
+def test_suggestions_follow_ui_filters():
+    entities, _ = parser.parse("horror movies", min_year="2001", max_year="2001")
+    assert entities.movie and all(YEAR_OF[title] == 2001 for title in entities.movie)
+
+
+def test_ui_filters_are_applied():
+    entities, confidence = parser.parse("90s movies", min_year="1995", genres="Horror, sci fi")
+    assert (entities.year_start, entities.year_end) == (1995, 1999)
+    assert entities.genre == ["horror", "sci-fi"]
+    assert confidence >= THRESHOLD
+    _, confidence = parser.parse("90s movies", genres="space opera")
+    assert confidence < THRESHOLD
+
+
+def test_parse_latency():
+    queries = [query for query, _ in LOCAL] + LLM
+    started = time.perf_counter()
+    for _ in range(20):
+        for query in queries:
+            parser.parse(query)
+    per_query = (time.perf_counter() - started) / (20 * len(queries))
+    print(f"rule-based parse: {per_query * 1e6:.0f}us per query (an LLM extraction takes ~1-3s)")
+    assert per_query < 0.005
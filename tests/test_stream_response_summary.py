@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+import httpx
+import numpy as np
+from src import main, vector_index
+from src.embedding_cache import EmbeddingCache
+from src.jina import EmbeddingBatcher, JinaEmbeddingClient
+from src.jina_client_singleton import JinaClientSingleton
+from src.vector_index import PlotVectorIndex
+
+JINA_DELAY = 0.2
+REQUESTS = 20
+DIM = 8
+
+
+def test_overlapping_summary_requests_embed_concurrently(monkeypatch):
+    inflight = 0
+    peak = 0
+
+    async def jina(request: httpx.Request) -> httpx.Response:
+        nonlocal inflight, peak
+        inflight += 1
+        peak = max(peak, inflight)
+        await asyncio.sleep(JINA_DELAY)
+        inflight -= 1
+        texts = json.loads(request.content)["input"]
+        return httpx.Response(200, json={"data": [
+            {"index": i, "embedding": [1.0] + [0.0] * (DIM - 1)} for i in range(len(texts))
+        ]})
+
+    vectors = np.eye(DIM, dtype=np.float32)
+    monkeypatch.setattr(vector_index, "_plot_index", PlotVectorIndex(vectors, [f"Movie {i}" for i in range(DIM)]))
+    client = JinaEmbeddingClient(
+        api_key="test", url="https://jina.test/v1/embeddings", model="m", task="t",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(jina)),
+    )
+    monkeypatch.setattr(JinaClientSingleton, "_instance", client)
+    # One HTTP call per query, so the test exercises the connection pool rather than batching
+    monkeypatch.setattr(JinaClientSingleton, "_batcher", EmbeddingBatcher(client, max_batch_size=1))
+    monkeypatch.setattr(JinaClientSingleton, "_cache", EmbeddingCache(model="m", task="t", maxsize=100))
+
+    async def run():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as api:
+            started = time.perf_counter()
+            responses = await asyncio.gather(*[
+                api.get("/stream-response-summary", params={"query": f"query {i}"})
+                for i in range(REQUESTS)
+            ])
+            return responses, time.perf_counter() - started
+
+    responses, elapsed = asyncio.run(run())
+
+    for response in responses:
+        assert response.status_code == 200
+        assert 'xx--data--similar_movies--["Movie 0"]' in response.text
+    assert peak == REQUESTS
+    # Serialized embedding calls would take REQUESTS * JINA_DELAY = 4s
+    assert elapsed < JINA_DELAY * 4
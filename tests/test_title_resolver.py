@@ -0,0 +1,67 @@
+import time
+import numpy as np
+import pytest
+from src.title_resolver import TitleResolver, trigrams
+
+TITLES = [
+    (1, "The Godfather", 90.0),
+    (2, "The Godfather Part II", 80.0),
+    (3, "Eternal Sunshine of the Spotless Mind", 60.0),
+    (4, "Heat", 70.0),
+    (5, "Heat", 5.0),
+    (6, "The Lord of the Rings: The Fellowship of the Ring", 85.0),
+    (7, "Blade Runner", 75.0),
+    (8, "Blade Runner 2049", 72.0),
+    (10, "Se7en", 65.0),
+]
+
+resolver = TitleResolver(*zip(*TITLES))
+
+
+def test_trigrams_are_padded_per_word():
+    assert trigrams("Heat") == ["  h", " he", "hea", "eat", "at "]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("The Godfather", "The Godfather"),
+    ("the godfather", "The Godfather"),
+    ("godfather", "The Godfather"),
+    ("godfather part 2", "The Godfather Part II"),
+    ("godfather part ii", "The Godfather Part II"),
+    ("eternal sunshine", "Eternal Sunshine of the Spotless Mind"),
+    ("eternal sunshin of the spotless mind", "Eternal Sunshine of the Spotless Mind"),
+    ("fellowship of the ring", "The Lord of the Rings: The Fellowship of the Ring"),
+    ("blade runer", "Blade Runner"),
+    ("blade runner 2049", "Blade Runner 2049"),
+    ("the godfahter", "The Godfather"),
+])
+def test_typos_and_partial_titles_resolve(query, expected):
+    match = resolver.resolve(query, min_score=0.6)
+    assert match and match[0].title == expected
+
+
+def test_exact_title_prefers_the_most_popular_movie():
+    assert resolver.resolve("heat")[0] == (4, "Heat", 1.0)
+
+
+def test_resolve_many_leaves_unknown_titles_unresolved():
+    matches = resolver.resolve_many(["godfather", "Completely Unknown Picture"], min_score=0.6)
+    assert matches[0].id == 1
+    assert matches[1] is None
+
+
+def test_lookup_throughput():
+    rng = np.random.default_rng(0)
+    words = ["night", "dark", "love", "city", "king", "blood", "star", "dead", "last", "river",
+             "summer", "house", "ghost", "war", "secret", "road", "girl", "man", "moon", "fire"]
+    titles = [" ".join(rng.choice(words, size=rng.integers(1, 5))) + f" {i}" for i in range(20000)]
+    big = TitleResolver(list(range(len(titles))), titles, rng.random(len(titles)).tolist())
+    queries = [title[:-2].replace("a", "e", 1) for title in rng.choice(titles, size=200)]
+
+    started = time.perf_counter()
+    for query in queries:
+        big.resolve(query, min_score=0.6)
+    rate = len(queries) / (time.perf_counter() - started)
+    print(f"{rate:.0f} title lookups/s over {len(titles)} titles")
+    # About 1k/s on a laptop; the floor only catches accidental quadratic behaviour
+    assert rate > 100
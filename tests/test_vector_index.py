@@ -0,0 +1,72 @@
+import asyncio
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+from src.qdrant_client_singleton import QdrantClientSingleton
+from src.vector_index import (
+    PlotVectorIndex, PrefixPlotIndex, QuantizedPlotIndex, export_snapshot, load_plot_index, write_quantized,
+)
+
+DIM = 8
+
+
+def export(directory, monkeypatch, movies: int, seed: int):
+    async def run():
+        client = AsyncQdrantClient(location=":memory:")
+        await client.create_collection(
+            "movies_plot",
+            vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+        )
+        vectors = np.random.default_rng(seed).normal(size=(movies, DIM))
+        await client.upsert("movies_plot", points=[
+            models.PointStruct(id=i, vector=vectors[i].tolist(), payload={"title": f"Movie {i}"})
+            for i in range(movies)
+        ])
+        monkeypatch.setattr(QdrantClientSingleton, "_instance", client)
+        return await export_snapshot(str(directory))
+    return asyncio.run(run())
+
+
+def test_quantized_codes_follow_the_snapshot(tmp_path, monkeypatch):
+    export(tmp_path, monkeypatch, movies=50, seed=0)
+    write_quantized(str(tmp_path))
+    assert len(QuantizedPlotIndex.load(str(tmp_path))) == 50
+
+    # Same row count, different vectors: the old codes must not be used
+    export(tmp_path, monkeypatch, movies=50, seed=1)
+    with pytest.raises(ValueError, match="re-run quantize"):
+        QuantizedPlotIndex.load(str(tmp_path))
+    assert load_plot_index(str(tmp_path), quantized=True) is None
+
+    write_quantized(str(tmp_path))
+    assert len(QuantizedPlotIndex.load(str(tmp_path))) == 50
+
+
+def test_reexporting_identical_data_keeps_codes_valid(tmp_path, monkeypatch):
+    export(tmp_path, monkeypatch, movies=20, seed=3)
+    write_quantized(str(tmp_path))
+    export(tmp_path, monkeypatch, movies=20, seed=3)
+    assert len(QuantizedPlotIndex.load(str(tmp_path))) == 20
+
+
+def test_prefix_search_rescores_to_the_exact_ranking():
+    rng = np.random.default_rng(5)
+    # Leading dimensions carry most of the variance, as in Matryoshka embeddings
+    vectors = (rng.normal(size=(2000, 64)) / np.sqrt(1 + np.arange(64))).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    titles = [f"Movie {i}" for i in range(2000)]
+    exact = PlotVectorIndex(vectors, titles)
+    prefix = PrefixPlotIndex(vectors, titles, dims=16, rescore=200)
+    for query in vectors[:20] + rng.normal(scale=0.05, size=(20, 64)):
+        assert prefix.search(query, 10) == exact.search(query, 10)
+    # Without rescoring the prefix scores alone decide, and the order differs
+    prefix.rescore = 0
+    assert any(prefix.search(q, 10) != exact.search(q, 10) for q in vectors[:20])
+
+
+def test_prefix_mode_loads_from_the_snapshot(tmp_path, monkeypatch):
+    export(tmp_path, monkeypatch, movies=30, seed=4)
+    index = load_plot_index(str(tmp_path), prefix_dims=4)
+    assert isinstance(index, PrefixPlotIndex) and len(index) == 30
+    assert np.allclose(np.linalg.norm(index.prefix, axis=1), 1.0)
+    assert load_plot_index(str(tmp_path), prefix_dims=DIM) is None
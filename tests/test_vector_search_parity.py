@@ -0,0 +1,76 @@
+import asyncio
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient, models
+from src import qdrant, vector_index
+from src.entity import MovieEntities
+from src.qdrant_client_singleton import QdrantClientSingleton
+from src.qdrant_schema import NORMALIZED_TITLE_FIELD
+from src.text import normalize_text
+from src.vector_index import PlotVectorIndex
+
+DIM = 16
+MOVIES = 300
+
+
+def snapshot():
+    rng = np.random.default_rng(7)
+    vectors = rng.normal(size=(MOVIES, DIM)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    # Lowercase titles: local Qdrant's MatchText is a case-sensitive substring test,
+    # the server's full-text index lowercases
+    titles = [f"movie {i:03d}" for i in range(MOVIES)]
+    return vectors, titles
+
+
+async def qdrant_over(vectors, titles) -> AsyncQdrantClient:
+    client = AsyncQdrantClient(location=":memory:")
+    await client.create_collection(
+        "movies_plot",
+        vectors_config=models.VectorParams(size=DIM, distance=models.Distance.COSINE),
+    )
+    await client.upsert("movies_plot", points=[
+        models.PointStruct(id=i, vector=vectors[i].tolist(),
+                           payload={"title": title, NORMALIZED_TITLE_FIELD: normalize_text(title)})
+        for i, title in enumerate(titles)
+    ])
+    return client
+
+
+@pytest.fixture
+def searches(monkeypatch):
+    """Runs a search coroutine against Qdrant and against the embedded index over the same snapshot"""
+    vectors, titles = snapshot()
+    index = PlotVectorIndex(vectors, titles)
+
+    def run(make_search):
+        async def both():
+            monkeypatch.setattr(QdrantClientSingleton, "_instance", await qdrant_over(vectors, titles))
+            monkeypatch.setattr(vector_index, "_plot_index", None)
+            qdrant.title_vector_cache.clear()
+            remote = await make_search()
+            monkeypatch.setattr(vector_index, "_plot_index", index)
+            return remote, await make_search()
+        return asyncio.run(both())
+
+    return vectors, run
+
+
+def test_embedding_search_matches_qdrant(searches):
+    vectors, run = searches
+    rng = np.random.default_rng(1)
+    for row in rng.choice(MOVIES, size=20, replace=False):
+        query = (vectors[row] + rng.normal(scale=0.3, size=DIM)).tolist()
+        remote, embedded = run(lambda: qdrant.find_similar_by_embedding(query, 10))
+        assert remote
+        assert embedded == remote
+
+
+def test_plot_search_matches_qdrant(searches):
+    _, run = searches
+    for references in (["movie 010"], ["movie 042", "movie 137"], ["Movie 200", "movie 201", "movie 202"]):
+        entities = MovieEntities(movie=references, movies_present=True)
+        remote, embedded = run(lambda: qdrant.find_similar_by_plot(entities, 10))
+        assert len(remote) == 10
+        assert embedded == remote
+        assert not {normalize_text(title) for title in references} & set(embedded)